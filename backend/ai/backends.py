@@ -0,0 +1,83 @@
+"""Interpreter backends for the diagnostic model.
+
+TensorFlow is only imported when no lighter backend is installed, and only
+when a model is actually loaded. Select a backend explicitly with the
+DIAGNOSTIC_BACKEND environment variable (``auto`` tries them in order).
+"""
+import importlib.util
+import os
+import threading
+
+DEFAULT_BACKEND = os.getenv('DIAGNOSTIC_BACKEND', 'auto')
+
+def _load_tflite_runtime():
+    from tflite_runtime.interpreter import Interpreter
+    return Interpreter
+
+def _load_litert():
+    from ai_edge_litert.interpreter import Interpreter
+    return Interpreter
+
+def _load_tensorflow():
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+def _load_numpy():
+    from ai.numpy_engine import NumpyInterpreter
+    return NumpyInterpreter
+
+# Backend name -> loader returning an Interpreter class
+BACKEND_LOADERS = {
+    'tflite_runtime': _load_tflite_runtime,
+    'ai_edge_litert': _load_litert,
+    'tensorflow': _load_tensorflow,
+    'numpy': _load_numpy,
+}
+
+# Module each backend imports, so worker processes can have it preloaded
+BACKEND_MODULES = {
+    'tflite_runtime': 'tflite_runtime.interpreter',
+    'ai_edge_litert': 'ai_edge_litert.interpreter',
+    'tensorflow': 'tensorflow',
+    'numpy': 'ai.numpy_engine',
+}
+
+# Order tried by ``auto``: lightest first, full TensorFlow last. The NumPy
+# engine only handles dense chains with float activations, so it is opt-in rather than a fallback
+AUTO_ORDER = ['tflite_runtime', 'ai_edge_litert', 'tensorflow']
+
+_resolved = {}
+_resolve_lock = threading.Lock()
+
+def resolve_backend(name=None):
+    """Return ``(backend_name, interpreter_class)`` for the requested backend"""
+    name = name or DEFAULT_BACKEND
+    if name != 'auto' and name not in BACKEND_LOADERS:
+        raise ValueError(f"Unknown interpreter backend '{name}' (choose from auto, {', '.join(BACKEND_LOADERS)})")
+    
+    candidates = AUTO_ORDER if name == 'auto' else [name]
+    errors = []
+    with _resolve_lock:
+        for candidate in candidates:
+            if candidate in _resolved:
+                return candidate, _resolved[candidate]
+            try:
+                _resolved[candidate] = BACKEND_LOADERS[candidate]()
+                return candidate, _resolved[candidate]
+            except ImportError as e:
+                errors.append(f"{candidate}: {e}")
+    raise ImportError(f"No interpreter backend available ({'; '.join(errors)})")
+
+def backend_module(name=None):
+    """Module the requested backend would import, found without importing it (None if unavailable)"""
+    name = name or DEFAULT_BACKEND
+    for candidate in AUTO_ORDER if name == 'auto' else [name]:
+        module = BACKEND_MODULES.get(candidate)
+        if module and importlib.util.find_spec(module.split('.')[0]) is not None:
+            return module
+    return None
+
+def interpreter_factory(model_path, backend=None):
+    """Return ``(backend_name, factory)`` where ``factory()`` builds an interpreter for ``model_path``"""
+    name, interpreter_class = resolve_backend(backend)
+    return name, lambda: interpreter_class(model_path=model_path)
@@ -1,172 +1,194 @@
 import os
-import json
-import numpy as np
-import tensorflow as tf
+import threading
+
+from ai.model_registry import MODEL_WATCH_INTERVAL, ModelRegistry, ModelVersion
+from ai.postprocess import HIGH_RISK_SYMPTOMS, condition_severity
+from ai.result_cache import ResultCache, canonical_symptom_key, copy_result
+
+# Ranked diagnoses returned per request
+DEFAULT_TOP_K = 3
+
+SEVERITY_LABELS = ("low", "medium", "high")
 
 class DiagnosticModel:
-    def __init__(self):
+    def __init__(self, pool_size=None, pool_timeout=None, cache_size=None, cache_ttl=None,
+                 backend=None, lazy=True, top_k=None):
         self.model_path = os.path.join(os.path.dirname(__file__), 'models/diagnostic_model.tflite')
         self.symptom_mapping_path = os.path.join(os.path.dirname(__file__), 'models/symptom_mapping.json')
+        self.symptom_synonyms_path = os.path.join(os.path.dirname(__file__), 'models/symptom_synonyms.json')
         self.condition_mapping_path = os.path.join(os.path.dirname(__file__), 'models/condition_mapping.json')
+        self.rules_path = os.path.join(os.path.dirname(__file__), 'models/diagnosis_rules.json')
         
-        # Load the TFLite model
-        self.interpreter = None
-        self.load_model()
+        # The TFLite model is loaded into a pool of interpreters on first use
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.backend = backend
+        self.top_k = max(1, top_k or DEFAULT_TOP_K)
         
-        # Load mappings
-        self.load_mappings()
+        # Results for repeated symptom sets, dropped whenever the model or mappings change
+        self.result_cache = ResultCache(
+            cache_size, cache_ttl,
+            watched_paths=[self.model_path, self.symptom_mapping_path, self.symptom_synonyms_path,
+                           self.condition_mapping_path, self.rules_path]
+        )
+        if self.result_cache.maxsize <= 0:
+            self.result_cache = None
+        
+        # Model and mappings are loaded as one version so a reload replaces them together
+        self.registry = ModelRegistry(self._build_version, self._build_version(), on_swap=self._on_model_swap)
+        if not lazy:
+            self.load_model()
+        if MODEL_WATCH_INTERVAL > 0:
+            self.registry.start_watching(MODEL_WATCH_INTERVAL)
+    
+    def _build_version(self, strict=False):
+        return ModelVersion(
+            self.model_path, self.symptom_mapping_path, self.symptom_synonyms_path, self.condition_mapping_path,
+            severity_labels=SEVERITY_LABELS, backend=self.backend, pool_size=self.pool_size,
+            pool_timeout=self.pool_timeout, strict=strict, rules_path=self.rules_path
+        )
+    
+    def _on_model_swap(self, new_version, old_version):
+        if self.result_cache is not None:
+            self.result_cache.clear()
+    
+    def reload_model(self, force=False):
+        """Swap in changed model/mapping files once they load and pass a smoke test"""
+        return self.registry.reload(force)
+    
+    @property
+    def model_version(self):
+        """The version new requests are served from"""
+        return self.registry.active
     
     def load_model(self):
         """Load the TFLite model"""
-        try:
-            self.interpreter = tf.lite.Interpreter(model_path=self.model_path)
-            self.interpreter.allocate_tensors()
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
-            print("Model loaded successfully")
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            # Fallback to rule-based inference if model fails to load
-            self.interpreter = None
+        self.model_version.load_model()
     
     def load_mappings(self):
         """Load symptom and condition mappings"""
-        try:
-            with open(self.symptom_mapping_path, 'r') as f:
-                self.symptom_mapping = json.load(f)
-            
-            with open(self.condition_mapping_path, 'r') as f:
-                self.conditions = json.load(f)
-            
-            print("Mappings loaded successfully")
-        except Exception as e:
-            print(f"Error loading mappings: {e}")
-            self.symptom_mapping = {}
-            self.conditions = []
+        self.model_version.load_mappings()
+    
+    @property
+    def interpreter_pool(self):
+        """Pool of interpreters, loaded on first use; None if the model failed to load"""
+        return self.model_version.interpreter_pool
+    
+    @property
+    def interpreter(self):
+        """First pooled interpreter, or None if the model failed to load"""
+        if self.interpreter_pool is None:
+            return None
+        return self.interpreter_pool.interpreters[0].interpreter
+    
+    @property
+    def backend_name(self):
+        return self.model_version.backend_name
+    
+    @property
+    def symptom_mapping(self):
+        return self.model_version.symptom_mapping
+    
+    @property
+    def conditions(self):
+        return self.model_version.conditions
+    
+    @property
+    def encoder(self):
+        return self.model_version.encoder
+    
+    @property
+    def normalizer(self):
+        return self.model_version.normalizer
+    
+    @property
+    def postprocessor(self):
+        return self.model_version.postprocessor
     
     def preprocess_symptoms(self, symptoms):
         """Convert symptom text to model input format"""
         # Create a one-hot encoded vector
-        input_vector = np.zeros(50, dtype=np.float32)
-        
-        for symptom in symptoms:
-            symptom = symptom.lower()
-            if symptom in self.symptom_mapping:
-                input_vector[self.symptom_mapping[symptom]] = 1.0
-        
-        return input_vector
+        return self.encoder.encode(symptoms)
     
     def diagnose(self, symptoms):
         """Perform diagnosis based on symptoms"""
-        # Preprocess symptoms
-        input_data = self.preprocess_symptoms(symptoms)
+        # One version serves the whole request, even if a reload swaps it meanwhile
+        version = self.model_version
+        
+        # Map free-text variants ("feverish", "short of breath") to known symptoms
+        symptoms = version.normalizer.canonicalize(symptoms)
+        
+        cache_key = None
+        if self.result_cache is not None:
+            # The rules' vocabulary covers the model's and symptoms only the rules look at
+            cache_key = canonical_symptom_key(symptoms, version.rules.bits, HIGH_RISK_SYMPTOMS) + (version.version,)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return copy_result(cached)
         
         # If model is available, use it
-        if self.interpreter:
+        pool = version.interpreter_pool
+        if pool:
             try:
-                # Reshape input data to match model's expected shape
-                input_data = np.expand_dims(input_data, axis=0).astype(np.float32)
-                
-                # Set input tensor
-                self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-                
-                # Run inference
-                self.interpreter.invoke()
+                # Encode straight into a reusable (1, 50) input buffer
+                input_data = version.encoder.encode_batch([symptoms])
                 
-                # Get output tensor
-                output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
+                # Run inference on a free interpreter from the pool
+                output_data = pool.run(input_data)
                 
-                # Get top 3 predictions
-                top_indices = np.argsort(output_data[0])[-3:][::-1]
-                top_probs = output_data[0][top_indices]
-                
-                results = []
-                for i, idx in enumerate(top_indices):
-                    results.append({
-                        "diagnosis": self.conditions[idx],
-                        "confidence": float(top_probs[i]),
-                        "severity": self._determine_severity(self.conditions[idx], symptoms)
-                    })
-                
-                return results
+                # Top-k predictions with table-driven severity
+                results = version.postprocessor.rank(output_data, [symptoms], self.top_k, recommendations=False)[0]
             except Exception as e:
                 print(f"Error during model inference: {e}")
-                # Fall back to rule-based approach
+                # Fall back to rule-based approach, without caching a transient failure
                 return self.rule_based_diagnosis(symptoms)
         else:
             # Use rule-based approach if model isn't available
-            return self.rule_based_diagnosis(symptoms)
+            results = self.rule_based_diagnosis(symptoms)
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, copy_result(results))
+        return results
     
     def rule_based_diagnosis(self, symptoms):
         """Fallback rule-based diagnostic approach"""
-        symptoms_lower = [s.lower() for s in symptoms]
-        
-        # Simple rule-based logic (for demonstration)
-        if "fever" in symptoms_lower and "cough" in symptoms_lower:
-            if "shortness of breath" in symptoms_lower:
-                return [{
-                    "diagnosis": "Possible Pneumonia",
-                    "confidence": 0.75,
-                    "severity": "high",
-                    "recommendations": ["Seek medical attention", "Rest", "Stay hydrated"]
-                }]
-            else:
-                return [{
-                    "diagnosis": "Common Cold or Influenza",
-                    "confidence": 0.85,
-                    "severity": "medium",
-                    "recommendations": ["Rest", "Fluids", "Over-the-counter medication"]
-                }]
-        
-        if "headache" in symptoms_lower and "nausea" in symptoms_lower:
-            return [{
-                "diagnosis": "Possible Migraine",
-                "confidence": 0.70,
-                "severity": "medium",
-                "recommendations": ["Rest in dark room", "Stay hydrated", "Pain relievers"]
-            }]
-        
-        # Default response if no rules match
-        return [{
-            "diagnosis": "Unspecified Condition",
-            "confidence": 0.50,
-            "severity": "low",
-            "recommendations": ["Monitor symptoms", "Consult with healthcare provider if symptoms persist"]
-        }]
+        return [self.model_version.rules.diagnose(symptoms, SEVERITY_LABELS)]
     
     def _determine_severity(self, condition, symptoms):
         """Determine severity based on condition and symptoms"""
-        high_risk_symptoms = ["shortness of breath", "chest pain", "confusion", "severe pain"]
-        
         # Check for high-risk symptoms
-        for symptom in symptoms:
-            if symptom.lower() in high_risk_symptoms:
-                return "high"
-        
-        # Condition-based severity
-        high_severity_conditions = ["Pneumonia", "Asthma"]
-        medium_severity_conditions = ["Influenza", "Hypertension", "Type 2 Diabetes"]
-        
-        if any(cond in condition for cond in high_severity_conditions):
+        if self.postprocessor.is_high_risk(symptoms):
             return "high"
-        elif any(cond in condition for cond in medium_severity_conditions):
-            return "medium"
         
-        return "low"
+        # Condition-based severity
+        return SEVERITY_LABELS[condition_severity(condition)]
 
 # Singleton instance
 _model_instance = None
+_model_lock = threading.Lock()
 
 def init_diagnostic_model(app):
     """Initialize the diagnostic model and attach it to the Flask app"""
     global _model_instance
-    _model_instance = DiagnosticModel()
+    _model_instance = DiagnosticModel(
+        backend=app.config.get('DIAGNOSTIC_BACKEND'),
+        pool_size=app.config.get('INTERPRETER_POOL_SIZE'),
+        pool_timeout=app.config.get('INTERPRETER_POOL_TIMEOUT'),
+        cache_size=app.config.get('DIAGNOSIS_CACHE_SIZE'),
+        cache_ttl=app.config.get('DIAGNOSIS_CACHE_TTL'),
+        top_k=app.config.get('DIAGNOSIS_TOP_K')
+    )
     app.config['DIAGNOSTIC_MODEL'] = _model_instance
     return _model_instance
 
 def get_model():
-    """Get the singleton instance of the diagnostic model"""
+    """Get the singleton instance of the diagnostic model.
+    
+    Its ``interpreter_pool`` is safe to share across request threads.
+    """
     global _model_instance
     if _model_instance is None:
-        _model_instance = DiagnosticModel()
+        with _model_lock:
+            if _model_instance is None:
+                _model_instance = DiagnosticModel()
     return _model_instance
@@ -0,0 +1,163 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.metrics import Histogram
+
+# Pool defaults, overridable per deployment
+DEFAULT_POOL_SIZE = int(os.getenv('INTERPRETER_POOL_SIZE', str(min(4, os.cpu_count() or 1))))
+DEFAULT_POOL_TIMEOUT = float(os.getenv('INTERPRETER_POOL_TIMEOUT', '5.0'))
+
+# Wait-time buckets in seconds
+WAIT_TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+class PoolTimeoutError(Exception):
+    """Raised when no interpreter becomes free within the wait timeout"""
+
+def _quantization(details):
+    """``(scale, zero_point, dtype, low, high)`` of an integer tensor, or None for a float one"""
+    dtype = details.get('dtype')
+    scale, zero_point = details.get('quantization', (0.0, 0))
+    if dtype is None or not np.issubdtype(dtype, np.integer) or not scale:
+        return None
+    limits = np.iinfo(dtype)
+    return np.float32(scale), zero_point, dtype, limits.min, limits.max
+
+def quantize(values, quantization):
+    """Map float values onto an integer tensor's grid: ``round(x / scale) + zero_point``"""
+    scale, zero_point, dtype, low, high = quantization
+    # In-place minimum/maximum: np.clip costs several times more on kiosk-sized batches
+    scaled = values / scale
+    scaled += zero_point
+    np.rint(scaled, out=scaled)
+    np.minimum(scaled, high, out=scaled)
+    np.maximum(scaled, low, out=scaled)
+    return scaled.astype(dtype)
+
+def dequantize(values, quantization):
+    """Inverse of ``quantize``: ``(q - zero_point) * scale`` as float32"""
+    scale, zero_point = quantization[:2]
+    result = values.astype(np.float32)
+    result -= zero_point
+    result *= scale
+    return result
+
+class PooledInterpreter:
+    """An allocated interpreter together with the tensor details needed to run it.
+    
+    Full-integer models take and return int8/uint8 tensors; callers still
+    pass float32 symptom vectors and get float32 probabilities back, with
+    the conversion done here from each tensor's scale and zero point.
+    """
+    
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.interpreter.allocate_tensors()
+        self.input_details = interpreter.get_input_details()
+        self.output_details = interpreter.get_output_details()
+        self.batch_size = self.input_details[0]['shape'][0]
+        self.input_quantization = _quantization(self.input_details[0])
+        self.output_quantization = _quantization(self.output_details[0])
+    
+    def run(self, input_data, observe=None):
+        """Run the interpreter over an (N, features) input matrix.
+        
+        ``observe(stage, seconds)`` is called with the set_tensor and invoke
+        times; converting to and from integer tensors counts towards them.
+        """
+        input_index = self.input_details[0]['index']
+        
+        # Resize the input tensor only when the batch size changes
+        if input_data.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(input_index, list(input_data.shape))
+            self.interpreter.allocate_tensors()
+            self.batch_size = input_data.shape[0]
+        
+        started = time.perf_counter() if observe is not None else None
+        if self.input_quantization is not None:
+            input_data = quantize(input_data, self.input_quantization)
+        self.interpreter.set_tensor(input_index, input_data)
+        set_done = time.perf_counter() if observe is not None else None
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_details[0]['index'])
+        if self.output_quantization is not None:
+            output = dequantize(output, self.output_quantization)
+        
+        if observe is not None:
+            observe('set_tensor', set_done - started)
+            observe('invoke', time.perf_counter() - set_done)
+        return output
+
+class InterpreterPool:
+    """Fixed-size pool of pre-allocated interpreters.
+    
+    TFLite interpreters are not safe for concurrent ``set_tensor``/``invoke``,
+    so each request checks one out exclusively and returns it afterwards.
+    """
+    
+    def __init__(self, interpreter_factory, size=None, timeout=None):
+        self.size = max(1, size or DEFAULT_POOL_SIZE)
+        self.timeout = DEFAULT_POOL_TIMEOUT if timeout is None else timeout
+        self.interpreters = [PooledInterpreter(interpreter_factory()) for _ in range(self.size)]
+        
+        # LIFO so the most recently used (cache-warm) interpreter is reused first
+        self._available = queue.LifoQueue()
+        for pooled in self.interpreters:
+            self._available.put(pooled)
+        
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = Histogram(WAIT_TIME_BUCKETS)
+    
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow an interpreter for the duration of a ``with`` block"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            pooled = self._available.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeoutError(f"No interpreter available after {timeout:.3f}s (pool size {self.size})")
+        
+        self.wait_time.observe(time.perf_counter() - start)
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        
+        try:
+            yield pooled
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._available.put(pooled)
+    
+    def run(self, input_data, timeout=None, observe=None):
+        """Run one inference on whichever interpreter is free first"""
+        with self.checkout(timeout) as pooled:
+            return pooled.run(input_data, observe)
+    
+    def stats(self):
+        """Saturation and wait-time metrics for monitoring"""
+        with self._lock:
+            in_use = self.in_use
+            stats = {
+                "size": self.size,
+                "in_use": in_use,
+                "available": self.size - in_use,
+                "saturation": in_use / self.size,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts
+            }
+        stats["wait_seconds"] = self.wait_time.snapshot()
+        return stats
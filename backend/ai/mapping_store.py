@@ -0,0 +1,102 @@
+"""Compiled binary form of the symptom, synonym and condition mappings.
+
+The JSON files stay the source of truth; ``compile_mappings`` packs them
+into one flat file that ``load_mappings`` reads through ``mmap`` without a
+JSON parser, so every worker process maps the same page-cache pages. The
+header records the size and mtime of each JSON file it was built from,
+and a file that no longer matches them is ignored.
+
+Layout (little-endian)::
+
+    magic           8s   b"PNMAP\\x00\\x00\\x01"
+    sources         3 x (size uint64, mtime_ns uint64)
+    counts          symptoms, conditions, synonyms, blob_size (uint32 each)
+    symptom index   uint32 per symptom
+    blob            NUL-terminated UTF-8 strings: symptom names, condition
+                    names, then one (alias, canonical) pair per synonym
+
+Usage: python -m ai.mapping_store [models_dir]
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"PNMAP\x00\x00\x01"
+HEADER = struct.Struct('<8s6Q4I')
+
+# File name of the compiled mappings, next to the JSON they are built from
+COMPILED_NAME = 'mappings.bin'
+
+def _sources_stamp(paths):
+    """(size, mtime_ns) of each source; a missing file stamps as zeros"""
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamp += [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            stamp += [0, 0]
+    return stamp
+
+def compile_mappings(symptom_mapping_path, condition_mapping_path, symptom_synonyms_path, output_path):
+    """Pack the JSON mappings into ``output_path``, replacing it atomically"""
+    sources = [symptom_mapping_path, condition_mapping_path, symptom_synonyms_path]
+    # Stamped before reading, so a source changed meanwhile makes the output stale
+    stamp = _sources_stamp(sources)
+    with open(symptom_mapping_path, 'r') as f:
+        symptom_mapping = json.load(f)
+    with open(condition_mapping_path, 'r') as f:
+        conditions = json.load(f)
+    synonyms = {}
+    if os.path.exists(symptom_synonyms_path):
+        with open(symptom_synonyms_path, 'r', encoding='utf-8') as f:
+            synonyms = json.load(f)
+    
+    pairs = [(alias, canonical) for canonical, aliases in synonyms.items() for alias in aliases]
+    strings = list(symptom_mapping) + list(conditions) + [s for pair in pairs for s in pair]
+    blob = b''.join(s.encode('utf-8') + b'\0' for s in strings)
+    index = struct.pack(f'<{len(symptom_mapping)}I', *symptom_mapping.values())
+    
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, *stamp, len(symptom_mapping), len(conditions), len(pairs), len(blob)))
+        f.write(index)
+        f.write(blob)
+    os.replace(tmp_path, output_path)
+
+def load_mappings(path, symptom_mapping_path, condition_mapping_path, symptom_synonyms_path):
+    """``(symptom_mapping, conditions, synonyms)`` from a compiled file, or None if missing or stale"""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if len(buf) < HEADER.size:
+                    return None
+                magic, *rest = HEADER.unpack_from(buf, 0)
+                stamp, (n_symptoms, n_conditions, n_pairs, blob_size) = rest[:6], rest[6:]
+                sources = [symptom_mapping_path, condition_mapping_path, symptom_synonyms_path]
+                if magic != MAGIC or stamp != _sources_stamp(sources):
+                    return None
+                
+                offset = HEADER.size
+                indices = struct.unpack_from(f'<{n_symptoms}I', buf, offset)
+                offset += 4 * n_symptoms
+                strings = buf[offset:offset + blob_size].decode('utf-8').split('\0')
+    except (OSError, ValueError, struct.error):
+        return None
+    
+    names = strings[:n_symptoms]
+    conditions = strings[n_symptoms:n_symptoms + n_conditions]
+    flat = strings[n_symptoms + n_conditions:n_symptoms + n_conditions + 2 * n_pairs]
+    synonyms = {}
+    for alias, canonical in zip(flat[0::2], flat[1::2]):
+        synonyms.setdefault(canonical, []).append(alias)
+    return dict(zip(names, indices)), conditions, synonyms
+
+if __name__ == "__main__":
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+    output_path = os.path.join(models_dir, COMPILED_NAME)
+    compile_mappings(os.path.join(models_dir, 'symptom_mapping.json'), os.path.join(models_dir, 'condition_mapping.json'),
+                     os.path.join(models_dir, 'symptom_synonyms.json'), output_path)
+    print(f"Compiled mappings written to {output_path}")
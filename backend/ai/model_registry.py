@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from ai.backends import interpreter_factory
+from ai.interpreter_pool import InterpreterPool
+from ai.mapping_store import COMPILED_NAME, compile_mappings, load_mappings as load_compiled_mappings
+from ai.postprocess import DiagnosisPostprocessor
+from ai.result_cache import file_fingerprint
+from ai.rule_engine import DEFAULT_RESULT, RuleEngine
+from ai.symptom_encoder import SymptomEncoder
+from ai.symptom_normalizer import SymptomNormalizer
+
+# Registry defaults, overridable per deployment (a watch interval of 0 disables watching)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '0'))
+MODEL_DRAIN_TIMEOUT = float(os.getenv('MODEL_DRAIN_TIMEOUT', '30.0'))
+
+class ModelVersion:
+    """One release of the model and its mappings, swapped in and out as a unit.
+    
+    Requests take a reference to a version once and use only its encoder,
+    interpreters and condition table, so a swap can never pair the new
+    model with the old mappings. The interpreter pool loads on first use.
+    """
+    
+    def __init__(self, model_path, symptom_mapping_path, symptom_synonyms_path, condition_mapping_path,
+                 severity_labels=("low", "medium", "high"), backend=None, pool_size=None, pool_timeout=None,
+                 strict=False, rules_path=None):
+        self.model_path = model_path
+        self.symptom_mapping_path = symptom_mapping_path
+        self.symptom_synonyms_path = symptom_synonyms_path
+        self.condition_mapping_path = condition_mapping_path
+        self.rules_path = rules_path
+        self.severity_labels = severity_labels
+        self.backend = backend
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        
+        # Taken before reading, so a file replaced mid-load shows up as a change next time
+        self.fingerprint = file_fingerprint(self.paths)
+        self.version = hashlib.sha1(repr(self.fingerprint).encode()).hexdigest()[:12]
+        self.loaded_at = time.time()
+        
+        self.backend_name = None
+        self.input_details = None
+        self.output_details = None
+        self._interpreter_pool = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+        self.load_mappings(strict)
+    
+    @property
+    def paths(self):
+        paths = [self.model_path, self.symptom_mapping_path, self.symptom_synonyms_path, self.condition_mapping_path]
+        return paths + [self.rules_path] if self.rules_path else paths
+    
+    @property
+    def compiled_mapping_path(self):
+        return os.path.join(os.path.dirname(self.symptom_mapping_path), COMPILED_NAME)
+    
+    def load_mappings(self, strict=False):
+        """Load symptom and condition mappings; with ``strict`` errors propagate"""
+        # The compiled copy skips JSON parsing; it is only used while it matches the JSON files
+        compiled = load_compiled_mappings(self.compiled_mapping_path, self.symptom_mapping_path,
+                                          self.condition_mapping_path, self.symptom_synonyms_path)
+        if compiled is not None:
+            self.symptom_mapping, self.conditions, synonyms = compiled
+            self._build_lookups(synonyms)
+            self.load_rules(strict)
+            return
+        
+        self.symptom_mapping = {}
+        self.conditions = []
+        try:
+            with open(self.symptom_mapping_path, 'r') as f:
+                self.symptom_mapping = json.load(f)
+            with open(self.condition_mapping_path, 'r') as f:
+                self.conditions = json.load(f)
+            print("Mappings loaded successfully")
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error loading mappings: {e}")
+        
+        # Synonyms are optional; without them only exact and fuzzy matches resolve
+        synonyms = {}
+        try:
+            with open(self.symptom_synonyms_path, 'r', encoding='utf-8') as f:
+                synonyms = json.load(f)
+        except Exception as e:
+            print(f"Error loading symptom synonyms: {e}")
+        self._build_lookups(synonyms)
+        self.load_rules(strict)
+        
+        if self.symptom_mapping and self.conditions:
+            try:
+                compile_mappings(self.symptom_mapping_path, self.condition_mapping_path,
+                                 self.symptom_synonyms_path, self.compiled_mapping_path)
+            except (OSError, ValueError) as e:
+                # A read-only model directory just means JSON parsing on every start
+                print(f"Could not write compiled mappings: {e}")
+    
+    def load_rules(self, strict=False):
+        """Compile the fallback rules over this version's symptom vocabulary"""
+        try:
+            if self.rules_path:
+                self.rules = RuleEngine.from_file(self.rules_path, self.symptom_mapping)
+                return
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error loading diagnosis rules: {e}")
+        # Without a rule file every fallback gets the default answer
+        self.rules = RuleEngine([], DEFAULT_RESULT, self.symptom_mapping)
+    
+    def _build_lookups(self, synonyms):
+        self.encoder = SymptomEncoder(self.symptom_mapping)
+        self.postprocessor = DiagnosisPostprocessor(self.conditions, self.severity_labels)
+        self.normalizer = SymptomNormalizer(self.symptom_mapping, synonyms)
+    
+    def load_model(self, strict=False):
+        """Load the model into a pool of interpreters; with ``strict`` errors propagate"""
+        try:
+            self.backend_name, factory = interpreter_factory(self.model_path, self.backend)
+            pool = InterpreterPool(factory, size=self.pool_size, timeout=self.pool_timeout)
+            self.input_details = pool.interpreters[0].input_details
+            self.output_details = pool.interpreters[0].output_details
+            self._interpreter_pool = pool
+            print(f"Model loaded successfully ({pool.size} {self.backend_name} interpreters)")
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error loading model: {e}")
+            # Fallback to rule-based inference if model fails to load
+            self._interpreter_pool = None
+        self._model_loaded = True
+    
+    @property
+    def interpreter_pool(self):
+        """Pool of interpreters, loaded on first use; None if the model failed to load"""
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    self.load_model()
+        return self._interpreter_pool
+    
+    @property
+    def loaded_pool(self):
+        """The interpreter pool if the model has been loaded, without loading it; for monitoring"""
+        return self._interpreter_pool
+    
+    def smoke_test(self):
+        """Run a probe batch and check the output fits the condition table"""
+        pool = self.interpreter_pool
+        if pool is None:
+            raise ValueError("model did not load")
+        if not self.symptom_mapping or not self.conditions:
+            raise ValueError("symptom or condition mapping is empty")
+        
+        names = list(self.symptom_mapping)
+        probe = [[], names[:1], names[:5], names]
+        output = pool.run(self.encoder.encode_batch(probe))
+        if output.shape != (len(probe), len(self.conditions)):
+            raise ValueError(f"model output shape {output.shape} does not match "
+                             f"{len(self.conditions)} conditions")
+        if not np.isfinite(output).all():
+            raise ValueError("model produced non-finite outputs")
+    
+    def drain(self, timeout=MODEL_DRAIN_TIMEOUT):
+        """Wait until no request is using this version's interpreters; True if drained"""
+        deadline = time.monotonic() + timeout
+        while self._interpreter_pool is not None and self._interpreter_pool.stats()["in_use"]:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def release(self):
+        """Drop this version's interpreters so they can be freed; it then serves from the rules"""
+        with self._model_lock:
+            self._interpreter_pool = None
+            # Stays marked as loaded, so a late request does not load the model again
+            self._model_loaded = True
+    
+    def info(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "backend": self.backend_name,
+            "symptoms": len(self.symptom_mapping),
+            "conditions": len(self.conditions)
+        }
+
+class ModelRegistry:
+    """Holds the active ModelVersion and replaces it without dropping requests.
+    
+    ``reload`` builds a candidate from the files on disk, loads its
+    interpreters and runs a smoke inference; only if all of that succeeds
+    is it swapped in, with a single reference assignment. The previous
+    version keeps serving the requests that already hold it and is drained
+    in the background. A failed candidate is discarded and the active
+    version stays. ``start_watching`` polls the files and reloads once a
+    change has settled; an admin endpoint can call ``reload`` directly.
+    """
+    
+    def __init__(self, build_version, initial, on_swap=None, drain_timeout=MODEL_DRAIN_TIMEOUT):
+        self.build_version = build_version
+        self.active = initial
+        self.on_swap = on_swap
+        self.drain_timeout = drain_timeout
+        
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._draining = []
+        self._failed_fingerprint = None
+        
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+    
+    def reload(self, force=False):
+        """Load, validate and swap in the model files on disk; returns a status dict"""
+        with self._reload_lock:
+            current = self.active
+            if not force and file_fingerprint(current.paths) == current.fingerprint:
+                return {"status": "unchanged", "version": current.version}
+            
+            try:
+                candidate = self.build_version(strict=True)
+                candidate.load_model(strict=True)
+                candidate.smoke_test()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._failed_fingerprint = file_fingerprint(current.paths)
+                print(f"Model reload failed, keeping version {current.version}: {self.last_error}")
+                return {"status": "failed", "version": current.version, "error": self.last_error}
+            
+            # New requests see the candidate from here on; in-flight ones keep the old version
+            self.active = candidate
+            self.reloads += 1
+            self.last_error = None
+            self._failed_fingerprint = None
+            if self.on_swap is not None:
+                self.on_swap(candidate, current)
+            print(f"Model version {candidate.version} active (was {current.version})")
+        
+        self._draining.append(current)
+        threading.Thread(target=self._drain, args=(current,), name='model-drain', daemon=True).start()
+        return {"status": "swapped", "version": candidate.version, "previous": current.version}
+    
+    def _drain(self, version):
+        if not version.drain(self.drain_timeout):
+            print(f"Model version {version.version} still busy after {self.drain_timeout:.0f}s; releasing anyway")
+        # Requests that already checked out an interpreter keep it until they finish
+        version.release()
+        self._draining.remove(version)
+    
+    def start_watching(self, interval=None):
+        """Poll the model files and reload when they change"""
+        interval = interval or MODEL_WATCH_INTERVAL or 2.0
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name='model-watcher', daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+    
+    def _watch(self, interval):
+        pending = None
+        while not self._stop_watching.wait(interval):
+            fingerprint = file_fingerprint(self.active.paths)
+            if fingerprint == self.active.fingerprint or fingerprint == self._failed_fingerprint:
+                pending = None
+                continue
+            
+            # Only reload once the files have stopped changing for a full interval
+            if fingerprint != pending:
+                pending = fingerprint
+                continue
+            pending = None
+            self.reload()
+    
+    def stats(self):
+        return {
+            "active": self.active.info(),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "draining": [version.version for version in self._draining],
+            "watching": self._watcher is not None
+        }
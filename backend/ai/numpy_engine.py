@@ -0,0 +1,357 @@
+"""Pure-NumPy inference for the diagnostic model.
+
+The diagnostic network is a short chain of fully connected layers, small
+enough that the TFLite interpreter's per-invoke overhead dominates its run
+time. This module reads the weights straight out of the ``.tflite``
+flatbuffer (or an ``.npz`` export) and runs the forward pass as batched
+matrix multiplies. ``NumpyInterpreter`` mimics the parts of the TFLite
+``Interpreter`` API the interpreter pool uses, so it plugs in as the
+``numpy`` backend.
+
+Usage: python ai/numpy_engine.py model.tflite model.npz   (export weights)
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+
+# TFLite schema constants (tensorflow/lite/schema/schema.fbs)
+TFLITE_IDENTIFIER = b'TFL3'
+OP_DEQUANTIZE = 6
+OP_FULLY_CONNECTED = 9
+OP_LOGISTIC = 14
+OP_RELU = 19
+OP_RELU6 = 21
+OP_SOFTMAX = 25
+OP_TANH = 28
+TENSOR_TYPES = {0: np.float32, 1: np.float16, 2: np.int32, 3: np.uint8, 4: np.int64, 9: np.int8}
+
+# Fused activation codes -> activation names
+FUSED_ACTIVATIONS = {0: 'linear', 1: 'relu', 3: 'relu6', 4: 'tanh'}
+STANDALONE_ACTIVATIONS = {OP_RELU: 'relu', OP_RELU6: 'relu6', OP_LOGISTIC: 'sigmoid', OP_TANH: 'tanh', OP_SOFTMAX: 'softmax'}
+
+class _Table:
+    """Minimal read-only view of a flatbuffer table"""
+    
+    def __init__(self, buf, pos):
+        self.buf = buf
+        self.pos = pos
+        self.vtable = pos - struct.unpack_from('<i', buf, pos)[0]
+        self.vtable_size = struct.unpack_from('<H', buf, self.vtable)[0]
+    
+    def _field(self, slot):
+        """Absolute position of field ``slot``, or None when it is absent"""
+        entry = 4 + 2 * slot
+        if entry >= self.vtable_size:
+            return None
+        offset = struct.unpack_from('<H', self.buf, self.vtable + entry)[0]
+        return self.pos + offset if offset else None
+    
+    def _deref(self, pos):
+        return pos + struct.unpack_from('<I', self.buf, pos)[0]
+    
+    def scalar(self, slot, fmt, default=0):
+        pos = self._field(slot)
+        return default if pos is None else struct.unpack_from('<' + fmt, self.buf, pos)[0]
+    
+    def table(self, slot):
+        pos = self._field(slot)
+        return None if pos is None else _Table(self.buf, self._deref(pos))
+    
+    def _vector(self, slot):
+        pos = self._field(slot)
+        if pos is None:
+            return 0, 0
+        start = self._deref(pos)
+        return start + 4, struct.unpack_from('<I', self.buf, start)[0]
+    
+    def tables(self, slot):
+        start, length = self._vector(slot)
+        return [_Table(self.buf, self._deref(start + 4 * i)) for i in range(length)]
+    
+    def ints(self, slot):
+        start, length = self._vector(slot)
+        return list(struct.unpack_from(f'<{length}i', self.buf, start)) if length else []
+    
+    def floats(self, slot):
+        start, length = self._vector(slot)
+        return list(struct.unpack_from(f'<{length}f', self.buf, start)) if length else []
+    
+    def longs(self, slot):
+        start, length = self._vector(slot)
+        return list(struct.unpack_from(f'<{length}q', self.buf, start)) if length else []
+    
+    def raw(self, slot):
+        start, length = self._vector(slot)
+        return self.buf[start:start + length]
+    
+    def string(self, slot):
+        return bytes(self.raw(slot)).decode('utf-8')
+
+class NumpyModel:
+    """A chain of dense layers: each step is ``(kernel, bias, activation)``.
+    
+    ``kernel`` is stored as (inputs, outputs) so a batch is ``x @ kernel``;
+    ``kernel`` is None for a standalone activation step.
+    """
+    
+    def __init__(self, layers):
+        if not layers or layers[0][0] is None:
+            raise ValueError("Model must start with a dense layer")
+        # Kernels may be transposed views of the flatbuffer; matmul handles either order
+        self.layers = [(None if k is None else np.asarray(k, dtype=np.float32),
+                        None if b is None else np.asarray(b, dtype=np.float32),
+                        activation) for k, b, activation in layers]
+        self.num_features = self.layers[0][0].shape[0]
+        self.num_outputs = [k for k, _, _ in self.layers if k is not None][-1].shape[1]
+    
+    def forward(self, x):
+        """Run an (N, features) float32 batch through the network"""
+        for kernel, bias, activation in self.layers:
+            if kernel is not None:
+                x = x @ kernel
+                if bias is not None:
+                    x += bias
+            x = _activate(x, activation)
+        return x
+    
+    def save_npz(self, path):
+        """Export the weights so the model can be loaded without the flatbuffer"""
+        arrays = {'activations': np.array([a for _, _, a in self.layers])}
+        for i, (kernel, bias, _) in enumerate(self.layers):
+            if kernel is not None:
+                arrays[f'kernel_{i}'] = kernel
+            if bias is not None:
+                arrays[f'bias_{i}'] = bias
+        np.savez(path, **arrays)
+
+def _activate(x, activation):
+    """Apply an activation in place where possible"""
+    if activation == 'linear':
+        return x
+    if activation == 'relu':
+        return np.maximum(x, 0, out=x)
+    if activation == 'relu6':
+        return np.clip(x, 0, 6, out=x)
+    if activation == 'tanh':
+        return np.tanh(x, out=x)
+    if activation == 'sigmoid':
+        np.negative(x, out=x)
+        np.exp(x, out=x)
+        x += 1
+        return np.reciprocal(x, out=x)
+    if activation == 'softmax':
+        np.subtract(x, x.max(axis=-1, keepdims=True), out=x)
+        np.exp(x, out=x)
+        np.divide(x, x.sum(axis=-1, keepdims=True), out=x)
+        return x
+    raise ValueError(f"Unsupported activation '{activation}'")
+
+def _dequantize(values, quantization):
+    """Float32 copy of a quantized constant, per tensor or per channel"""
+    scales = np.array(quantization.floats(2), dtype=np.float32)
+    zero_points = np.array(quantization.longs(3) or [0], dtype=np.float32)
+    if scales.size > 1:
+        # Per-channel: one scale per slice along quantized_dimension
+        shape = [1] * values.ndim
+        shape[quantization.scalar(6, 'i')] = scales.size
+        scales = scales.reshape(shape)
+        zero_points = np.broadcast_to(zero_points, scales.size).reshape(shape)
+    return (values.astype(np.float32) - zero_points) * scales
+
+def parse_tflite(content):
+    """Extract a ``NumpyModel`` from the bytes of a float ``.tflite`` model.
+    
+    Weight-only quantization (float16 or dynamic-range int8) is expanded
+    back to float32 at load; full-integer models, whose activations are
+    quantized too, need a TFLite backend.
+    """
+    buf = memoryview(content)
+    if bytes(buf[4:8]) != TFLITE_IDENTIFIER:
+        raise ValueError("Not a TFLite flatbuffer")
+    
+    model = _Table(buf, struct.unpack_from('<I', buf, 0)[0])
+    opcodes = []
+    for code in model.tables(1):
+        # builtin_code (int32) supersedes deprecated_builtin_code (int8) when set
+        opcodes.append(max(code.scalar(0, 'b'), code.scalar(3, 'i')))
+    buffers = model.tables(4)
+    subgraphs = model.tables(2)
+    if len(subgraphs) != 1:
+        raise ValueError(f"Expected a single subgraph, found {len(subgraphs)}")
+    graph = subgraphs[0]
+    tensors = graph.tables(0)
+    
+    def constant(index):
+        tensor = tensors[index]
+        quantization = tensor.table(4)
+        dtype = TENSOR_TYPES.get(tensor.scalar(1, 'b'))
+        if dtype is None:
+            raise ValueError(f"Unsupported tensor type {tensor.scalar(1, 'b')}")
+        buffer = buffers[tensor.scalar(2, 'I')]
+        data = buffer.raw(0)
+        if not data.nbytes and buffer.scalar(1, 'Q') > 1:
+            # Large models keep buffers outside the flatbuffer, addressed by file offset
+            offset, size = buffer.scalar(1, 'Q'), buffer.scalar(2, 'Q')
+            data = buf[offset:offset + size]
+        if not data.nbytes:
+            return None
+        values = np.frombuffer(data, dtype=dtype).reshape(tensor.ints(0))
+        if quantization is not None and quantization.floats(2):
+            return _dequantize(values, quantization)
+        # A view into ``content`` when already float32, so a memory-mapped model stays shared
+        return values.astype(np.float32, copy=False)
+    
+    inputs, outputs = graph.ints(1), graph.ints(2)
+    if len(inputs) != 1 or len(outputs) != 1:
+        raise ValueError("Expected a single input and output tensor")
+    for index in inputs + outputs:
+        if tensors[index].scalar(1, 'b') != 0:
+            raise ValueError(f"Tensor {tensors[index].string(3)} is not float32; "
+                             f"full-integer models need a TFLite backend")
+    
+    # Walk the operator chain from the input tensor, folding activations into the preceding layer
+    values = {}
+    current = inputs[0]
+    layers = []
+    for op in graph.tables(3):
+        opcode = opcodes[op.scalar(0, 'I')]
+        op_inputs, op_outputs = op.ints(1), op.ints(2)
+        if opcode == OP_DEQUANTIZE:
+            values[op_outputs[0]] = constant(op_inputs[0])
+            continue
+        if op_inputs[0] != current:
+            raise ValueError("Only single-chain models are supported")
+        
+        if opcode == OP_FULLY_CONNECTED:
+            kernel = values[op_inputs[1]] if op_inputs[1] in values else constant(op_inputs[1])
+            bias = None
+            if len(op_inputs) > 2 and op_inputs[2] >= 0:
+                bias = values[op_inputs[2]] if op_inputs[2] in values else constant(op_inputs[2])
+            options = op.table(4)
+            fused = options.scalar(0, 'b') if options is not None else 0
+            if fused not in FUSED_ACTIVATIONS:
+                raise ValueError(f"Unsupported fused activation {fused}")
+            # TFLite stores kernels as (outputs, inputs)
+            layers.append([kernel.T, bias, FUSED_ACTIVATIONS[fused]])
+        elif opcode in STANDALONE_ACTIVATIONS:
+            activation = STANDALONE_ACTIVATIONS[opcode]
+            if opcode == OP_SOFTMAX and op.table(4) is not None and op.table(4).scalar(0, 'f', 1.0) != 1.0:
+                raise ValueError("Softmax with beta != 1 is not supported")
+            if layers and layers[-1][2] == 'linear':
+                layers[-1][2] = activation
+            else:
+                layers.append([None, None, activation])
+        else:
+            raise ValueError(f"Unsupported operator code {opcode}")
+        current = op_outputs[0]
+    
+    if current != outputs[0]:
+        raise ValueError("Operator chain does not reach the model output")
+    return NumpyModel([tuple(layer) for layer in layers])
+
+def load_npz(path):
+    """Load a ``NumpyModel`` written by ``NumpyModel.save_npz``"""
+    with np.load(path) as data:
+        activations = [str(a) for a in data['activations']]
+        return NumpyModel([(data.get(f'kernel_{i}'), data.get(f'bias_{i}'), activation)
+                           for i, activation in enumerate(activations)])
+
+# Parsed models shared by every interpreter in a pool: path -> (file identity, model).
+# Only the newest version of each file is kept; interpreters still serving an older one hold it themselves
+_models = {}
+_models_lock = threading.Lock()
+
+def load_model(path):
+    """Load a model from a ``.tflite`` or ``.npz`` file, reusing an already parsed copy"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    identity = (stat.st_mtime_ns, stat.st_size)
+    with _models_lock:
+        cached = _models.get(path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        if path.endswith('.npz'):
+            model = load_npz(path)
+        else:
+            # Weights stay views into the mapping: page cache shared by every process
+            with open(path, 'rb') as f:
+                model = parse_tflite(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        # Replaces the copy parsed from the file's previous contents
+        _models[path] = (identity, model)
+        return model
+
+class NumpyInterpreter:
+    """Drop-in for the subset of ``tf.lite.Interpreter`` the interpreter pool uses"""
+    
+    INPUT_INDEX = 0
+    OUTPUT_INDEX = 1
+    
+    def __init__(self, model_path=None, model_content=None):
+        if model_content is not None:
+            self.model = parse_tflite(model_content)
+        elif model_path is not None:
+            self.model = load_model(model_path)
+        else:
+            raise ValueError("Provide model_path or model_content")
+        self.batch_size = 1
+        self._input = None
+        self._output = None
+    
+    def _details(self, name, index, width):
+        return [{
+            'name': name,
+            'index': index,
+            'shape': np.array([self.batch_size, width], dtype=np.int32),
+            'shape_signature': np.array([-1, width], dtype=np.int32),
+            'dtype': np.float32,
+            'quantization': (0.0, 0),
+        }]
+    
+    def get_input_details(self):
+        return self._details('symptoms', self.INPUT_INDEX, self.model.num_features)
+    
+    def get_output_details(self):
+        return self._details('diagnosis', self.OUTPUT_INDEX, self.model.num_outputs)
+    
+    def resize_tensor_input(self, input_index, tensor_size):
+        if input_index != self.INPUT_INDEX:
+            raise ValueError(f"Unknown input tensor {input_index}")
+        if len(tensor_size) != 2 or tensor_size[1] != self.model.num_features:
+            raise ValueError(f"Cannot resize input to {list(tensor_size)}")
+        self.batch_size = int(tensor_size[0])
+    
+    def allocate_tensors(self):
+        self._input = np.zeros((self.batch_size, self.model.num_features), dtype=np.float32)
+        self._output = None
+    
+    def set_tensor(self, tensor_index, value):
+        if tensor_index != self.INPUT_INDEX:
+            raise ValueError(f"Unknown input tensor {tensor_index}")
+        if value.shape != (self.batch_size, self.model.num_features):
+            raise ValueError(f"Input shape {value.shape} does not match "
+                             f"{(self.batch_size, self.model.num_features)}")
+        if self._input is None:
+            raise RuntimeError("allocate_tensors must be called before set_tensor")
+        np.copyto(self._input, value)
+    
+    def invoke(self):
+        if self._input is None:
+            raise RuntimeError("allocate_tensors must be called before invoke")
+        self._output = self.model.forward(self._input)
+    
+    def get_tensor(self, tensor_index):
+        if tensor_index == self.INPUT_INDEX:
+            return self._input.copy()
+        if tensor_index != self.OUTPUT_INDEX or self._output is None:
+            raise ValueError(f"Tensor {tensor_index} has no value")
+        return self._output.copy()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    load_model(sys.argv[1]).save_npz(sys.argv[2])
+    print(f"Weights exported to {sys.argv[2]}")
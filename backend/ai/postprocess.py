@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+
+# Symptoms that make any diagnosis high severity
+HIGH_RISK_SYMPTOMS = ["shortness of breath", "chest pain", "confusion", "severe pain"]
+
+# Conditions whose name contains one of these are high / medium severity
+HIGH_SEVERITY_CONDITIONS = ["Pneumonia", "Asthma"]
+MEDIUM_SEVERITY_CONDITIONS = ["Influenza", "Hypertension", "Type 2 Diabetes"]
+
+# Severity codes index into a caller-supplied label tuple
+SEVERITY_LOW, SEVERITY_MEDIUM, SEVERITY_HIGH = 0, 1, 2
+
+RECOMMENDATIONS = {
+    "Common Cold": ["Rest", "Stay hydrated", "Over-the-counter cold medication if needed"],
+    "Influenza": ["Rest", "Fluids", "Fever reducers", "Consult doctor if symptoms worsen"],
+    "Hypertension": ["Reduce salt intake", "Regular exercise", "Medication as prescribed"],
+    "Type 2 Diabetes": ["Monitor blood sugar", "Follow prescribed diet", "Regular exercise"],
+    "Migraine": ["Rest in dark room", "Stay hydrated", "Pain relievers"],
+    "Gastroenteritis": ["Stay hydrated", "BRAT diet", "Rest"],
+    "Urinary Tract Infection": ["Increase fluid intake", "Consult doctor for antibiotics"],
+    "Asthma": ["Use prescribed inhaler", "Avoid triggers", "Seek medical help if breathing worsens"],
+    "Allergic Rhinitis": ["Avoid allergens", "Antihistamines", "Nasal sprays"],
+    "Anxiety Disorder": ["Deep breathing exercises", "Regular physical activity", "Consider counseling"]
+}
+DEFAULT_RECOMMENDATIONS = ["Monitor symptoms", "Consult with healthcare provider if symptoms persist"]
+
+def condition_severity(condition):
+    """Severity code implied by the condition name alone"""
+    if any(cond in condition for cond in HIGH_SEVERITY_CONDITIONS):
+        return SEVERITY_HIGH
+    if any(cond in condition for cond in MEDIUM_SEVERITY_CONDITIONS):
+        return SEVERITY_MEDIUM
+    return SEVERITY_LOW
+
+class DiagnosisPostprocessor:
+    """Turns model output rows into ranked diagnoses.
+    
+    Severity and recommendations depend only on the condition (plus one
+    high-risk flag per row), so they are looked up in tables built once
+    from the condition list instead of being recomputed per request.
+    """
+    
+    def __init__(self, conditions, severity_labels=("low", "medium", "high"),
+                 high_risk_symptoms=HIGH_RISK_SYMPTOMS):
+        self.conditions = list(conditions)
+        self.severity_labels = tuple(severity_labels)
+        self.high_risk_symptoms = frozenset(s.lower() for s in high_risk_symptoms)
+        self.severity_table = np.array([condition_severity(c) for c in self.conditions], dtype=np.int8)
+        self.recommendation_table = [tuple(RECOMMENDATIONS.get(c, DEFAULT_RECOMMENDATIONS)) for c in self.conditions]
+    
+    def is_high_risk(self, symptoms):
+        """Whether any symptom forces high severity"""
+        return any(s.lower() in self.high_risk_symptoms for s in symptoms)
+    
+    def top_k(self, output, k):
+        """Return ``(indices, probabilities)``, each (N, k), best first"""
+        output = np.atleast_2d(output)
+        k = max(1, min(k, output.shape[1]))
+        if k == 1:
+            indices = output.argmax(axis=1)[:, None]
+        else:
+            # Partition out the k best in O(C), then sort only those k
+            candidates = np.argpartition(output, -k, axis=1)[:, -k:]
+            order = np.argsort(-np.take_along_axis(output, candidates, axis=1), axis=1, kind='stable')
+            indices = np.take_along_axis(candidates, order, axis=1)
+        return indices, np.take_along_axis(output, indices, axis=1)
+    
+    def severities(self, indices, high_risk):
+        """Severity codes for an (N, k) index matrix and an (N,) high-risk mask"""
+        codes = self.severity_table[indices]
+        return np.where(np.asarray(high_risk, dtype=bool)[:, None], SEVERITY_HIGH, codes)
+    
+    def rank(self, output, symptoms_batch, k=1, recommendations=True, observe=None):
+        """Ranked diagnoses for every row: a list of ``k`` result dicts per row.
+        
+        With ``recommendations`` the top diagnosis of each row carries its
+        recommendation list. ``observe(stage, seconds)`` is called with the
+        top-k ("postprocess") and severity/recommendation ("severity") times.
+        """
+        started = time.perf_counter() if observe is not None else None
+        indices, probs = self.top_k(output, k)
+        if observe is not None:
+            ranked_at = time.perf_counter()
+            observe('postprocess', ranked_at - started)
+        high_risk = [self.is_high_risk(symptoms) for symptoms in symptoms_batch]
+        codes = self.severities(indices, high_risk)
+        
+        # One conversion to Python scalars for the whole batch
+        indices, probs, codes = indices.tolist(), probs.tolist(), codes.tolist()
+        labels, conditions = self.severity_labels, self.conditions
+        results = []
+        for row_indices, row_probs, row_codes in zip(indices, probs, codes):
+            row = []
+            for idx, prob, code in zip(row_indices, row_probs, row_codes):
+                result = {"diagnosis": conditions[idx], "confidence": prob, "severity": labels[code]}
+                if recommendations and not row:
+                    result["recommendations"] = list(self.recommendation_table[idx])
+                row.append(result)
+            results.append(row)
+        if observe is not None:
+            observe('severity', time.perf_counter() - ranked_at)
+        return results
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cache defaults, overridable per deployment (size 0 disables caching)
+DEFAULT_CACHE_SIZE = int(os.getenv('DIAGNOSIS_CACHE_SIZE', '1024'))
+DEFAULT_CACHE_TTL = float(os.getenv('DIAGNOSIS_CACHE_TTL', '0'))
+
+def canonical_symptom_key(symptoms, vocabulary, flagged_symptoms=()):
+    """Build an order- and case-insensitive cache key for a symptom list.
+    
+    Only symptoms in ``vocabulary`` take part, so permutations and unknown
+    tokens map to the same entry. It must hold every symptom that can change
+    a result: the model's and the fallback rules' (``RuleEngine.bits`` has
+    both). Symptoms in ``flagged_symptoms`` still change the result even when
+    neither looks at them, so their presence is kept.
+    """
+    known = set()
+    flagged = False
+    for symptom in symptoms:
+        symptom = symptom.lower()
+        if symptom in vocabulary:
+            known.add(symptom)
+        if symptom in flagged_symptoms:
+            flagged = True
+    return (tuple(sorted(known)), flagged)
+
+def copy_result(value):
+    """Copy a result down to its nested lists and dicts.
+    
+    Cached results are handed to callers that may change them (append a
+    recommendation, translate alternatives), so the cache neither keeps nor
+    returns an object anyone else holds.
+    """
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    return value
+
+def file_fingerprint(paths):
+    """Modification time and size of each file (None for missing files)"""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+class ResultCache:
+    """Bounded LRU cache with optional TTL, cleared when its source files change"""
+    
+    def __init__(self, maxsize=None, ttl=None, watched_paths=(), check_interval=1.0):
+        self.maxsize = DEFAULT_CACHE_SIZE if maxsize is None else maxsize
+        self.ttl = (DEFAULT_CACHE_TTL if ttl is None else ttl) or None
+        self.watched_paths = list(watched_paths)
+        self.check_interval = check_interval
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = self._source_fingerprint()
+        self._next_check = time.monotonic() + check_interval
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def _source_fingerprint(self):
+        """Modification time and size of every watched file"""
+        return file_fingerprint(self.watched_paths)
+    
+    def check_sources(self, force=False):
+        """Clear the cache if the model or mapping files changed on disk"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        
+        fingerprint = self._source_fingerprint()
+        if fingerprint == self._fingerprint:
+            return False
+        
+        with self._lock:
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self.invalidations += 1
+        return True
+    
+    def get(self, key):
+        """Return the cached value for ``key``, or None on a miss"""
+        self.check_sources()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        """Store ``value``, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Hit, miss and eviction counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
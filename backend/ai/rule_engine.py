@@ -0,0 +1,202 @@
+"""Declarative fallback rules compiled to bitmask predicates.
+
+A rule file lists rules such as::
+
+    {"name": "migraine", "priority": 10, "all": ["headache", "nausea"],
+     "diagnosis": "Possible Migraine", "confidence": 0.7, "severity": "medium",
+     "recommendations": ["Rest in dark room"]}
+
+plus a ``default`` result for when nothing matches. ``all`` symptoms must
+all be present, at least one of ``any`` (when given) and none of ``none``.
+The highest priority matching rule wins; equal priorities keep file order.
+
+At load time every symptom gets a bit and each rule becomes three masks
+of uint64 words, sorted by priority. Matching a batch is then a handful of
+AND/OR operations per word over an (N, rules) array, and the first
+matching column of each row is its rule, whatever the number of rules.
+"""
+import json
+
+import numpy as np
+
+SEVERITY_CODES = {"low": 0, "medium": 1, "high": 2}
+
+RULE_KEYS = {"name", "priority", "all", "any", "none", "diagnosis", "confidence", "severity", "recommendations"}
+
+# Answer when no rule matches and the rule file gives no default
+DEFAULT_RESULT = {
+    "diagnosis": "Unspecified Condition",
+    "confidence": 0.50,
+    "severity": "low",
+    "recommendations": ["Monitor symptoms", "Consult with healthcare provider if symptoms persist"]
+}
+
+# Upper bound on the (rows, rules) temporaries built per matching step
+MAX_MATCH_CELLS = 1 << 20
+
+# With this few rules a single row is faster to check with Python ints than with numpy
+SMALL_RULE_SET = 16
+
+def _normalize(symptom):
+    return symptom.strip().lower()
+
+def _validate_result(result, where):
+    missing = {"diagnosis", "confidence", "severity"} - set(result)
+    if missing:
+        raise ValueError(f"{where} is missing {', '.join(sorted(missing))}")
+    if result["severity"] not in SEVERITY_CODES:
+        raise ValueError(f"{where} has unknown severity {result['severity']!r}")
+    if not 0.0 <= float(result["confidence"]) <= 1.0:
+        raise ValueError(f"{where} has confidence outside [0, 1]")
+
+class RuleEngine:
+    """Priority-ordered symptom rules evaluated as bitmask predicates"""
+    
+    def __init__(self, rules, default, vocabulary=()):
+        _validate_result(default, "default rule")
+        for i, rule in enumerate(rules):
+            where = f"rule {rule.get('name', i)!r}"
+            unknown = set(rule) - RULE_KEYS
+            if unknown:
+                raise ValueError(f"{where} has unknown keys {', '.join(sorted(unknown))}")
+            if not rule.get("all") and not rule.get("any"):
+                raise ValueError(f"{where} needs at least one 'all' or 'any' symptom")
+            _validate_result(rule, where)
+        
+        # Highest priority first; sorted() is stable, so ties keep file order
+        self.rules = sorted(rules, key=lambda rule: -rule.get("priority", 0))
+        
+        # One bit per symptom: the model vocabulary first, then any symptom only rules mention
+        self.bits = {}
+        for symptom in vocabulary:
+            self.bits.setdefault(_normalize(symptom), len(self.bits))
+        for rule in self.rules:
+            for key in ("all", "any", "none"):
+                for symptom in rule.get(key, ()):
+                    self.bits.setdefault(_normalize(symptom), len(self.bits))
+        self.words = max(1, (len(self.bits) + 63) // 64)
+        
+        self.all_masks = self._masks("all")
+        self.any_masks = self._masks("any")
+        self.none_masks = self._masks("none")
+        self.has_any = self.any_masks.any(axis=1)
+        
+        # Per-word rows of the masks, contiguous for the matching loop
+        self._all_words = np.ascontiguousarray(self.all_masks.T)
+        self._any_words = np.ascontiguousarray(self.any_masks.T)
+        self._none_words = np.ascontiguousarray(self.none_masks.T)
+        self._uses_any = bool(self.has_any.any())
+        self._uses_none = bool(self.none_masks.any())
+        
+        # Python-int copies of the masks for the single-row path
+        self._int_rules = [(self._int_mask(rule.get("all", ())), self._int_mask(rule.get("any", ())),
+                            self._int_mask(rule.get("none", ()))) for rule in self.rules]
+        
+        # Results are built once; callers get copies
+        self.results = [self._result(rule) for rule in self.rules]
+        self.default = self._result(default)
+    
+    @classmethod
+    def from_file(cls, path, vocabulary=()):
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        return cls(spec.get("rules", []), spec.get("default", DEFAULT_RESULT), vocabulary)
+    
+    def _int_mask(self, symptoms):
+        mask = 0
+        for symptom in symptoms:
+            mask |= 1 << self.bits[_normalize(symptom)]
+        return mask
+    
+    def _masks(self, key):
+        masks = np.zeros((len(self.rules), self.words), dtype=np.uint64)
+        for r, rule in enumerate(self.rules):
+            for symptom in rule.get(key, ()):
+                bit = self.bits[_normalize(symptom)]
+                masks[r, bit // 64] |= np.uint64(1 << (bit % 64))
+        return masks
+    
+    @staticmethod
+    def _result(rule):
+        return {
+            "diagnosis": rule["diagnosis"],
+            "confidence": float(rule["confidence"]),
+            "severity": SEVERITY_CODES[rule["severity"]],
+            "recommendations": list(rule.get("recommendations", []))
+        }
+    
+    def _row_mask(self, symptoms):
+        """Python-int bitmask of one symptom list; unknown symptoms are ignored"""
+        bits = self.bits
+        mask = 0
+        for symptom in symptoms:
+            # Inputs are already canonicalized by the normalizer; only case can differ
+            bit = bits.get(symptom.lower())
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+    
+    def encode(self, symptoms_batch):
+        """(N, words) uint64 symptom bitmasks"""
+        row_masks = [self._row_mask(symptoms) for symptoms in symptoms_batch]
+        if self.words == 1:
+            return np.array(row_masks, dtype=np.uint64).reshape(-1, 1)
+        word = (1 << 64) - 1
+        return np.array([[(mask >> (64 * w)) & word for w in range(self.words)] for mask in row_masks],
+                        dtype=np.uint64).reshape(-1, self.words)
+    
+    def match(self, masks):
+        """Index into ``self.rules`` of the winning rule per row, or -1 for the default"""
+        n, rules = masks.shape[0], len(self.rules)
+        matched = np.full(n, -1, dtype=np.intp)
+        if not rules or not n:
+            return matched
+        
+        step = max(1, MAX_MATCH_CELLS // rules)
+        for start in range(0, n, step):
+            chunk = masks[start:start + step]
+            # Bits that break a rule: a required symptom missing or an excluded one present
+            broken = np.zeros((len(chunk), rules), dtype=np.uint64)
+            any_hit = np.zeros((len(chunk), rules), dtype=bool) if self._uses_any else None
+            for w in range(self.words):
+                x = chunk[:, w, None]
+                broken |= self._all_words[w] & ~x
+                if self._uses_none:
+                    broken |= self._none_words[w] & x
+                if any_hit is not None:
+                    any_hit |= (self._any_words[w] & x) != 0
+            ok = broken == 0
+            if any_hit is not None:
+                ok &= any_hit | ~self.has_any
+            # Rules are in priority order, so the first match wins
+            first = ok.argmax(axis=1)
+            hit = ok[np.arange(len(first)), first]
+            matched[start:start + step] = np.where(hit, first, -1)
+        return matched
+    
+    def _match_one(self, symptoms):
+        mask = self._row_mask(symptoms)
+        for index, (all_mask, any_mask, none_mask) in enumerate(self._int_rules):
+            if mask & all_mask == all_mask and (not any_mask or mask & any_mask) and not mask & none_mask:
+                return index
+        return -1
+    
+    def _render(self, index, severity_labels):
+        result = self.results[index] if index >= 0 else self.default
+        return {
+            "diagnosis": result["diagnosis"],
+            "confidence": result["confidence"],
+            "severity": severity_labels[result["severity"]],
+            "recommendations": list(result["recommendations"])
+        }
+    
+    def diagnose_batch(self, symptoms_batch, severity_labels=("low", "medium", "high")):
+        """Rule-based result for every symptom list, in order"""
+        if len(symptoms_batch) == 1 and len(self.rules) <= SMALL_RULE_SET:
+            return [self._render(self._match_one(symptoms_batch[0]), severity_labels)]
+        matched = self.match(self.encode(symptoms_batch)).tolist()
+        return [self._render(index, severity_labels) for index in matched]
+    
+    def diagnose(self, symptoms, severity_labels=("low", "medium", "high")):
+        """Rule-based result for one symptom list"""
+        return self.diagnose_batch([symptoms], severity_labels)[0]
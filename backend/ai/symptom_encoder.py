@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+
+# Width of the model's one-hot symptom input
+NUM_SYMPTOMS = 50
+
+class SymptomEncoder:
+    """Encode symptom lists as model input without per-call allocations.
+    
+    Symptoms are resolved to feature indices once per call (CSR-style
+    ``indptr``/``indices`` arrays), then scattered into a float32 buffer that
+    is kept per thread and reused across calls.
+    """
+    
+    def __init__(self, symptom_mapping, num_features=NUM_SYMPTOMS):
+        self.num_features = num_features
+        self.lookup = {name.lower(): index for name, index in symptom_mapping.items()}
+        self._local = threading.local()
+    
+    def indices(self, symptoms):
+        """Feature indices of the known symptoms in ``symptoms``, in input order"""
+        lookup = self.lookup
+        found = []
+        for symptom in symptoms:
+            index = lookup.get(symptom)
+            if index is None:
+                index = lookup.get(symptom.lower())
+            if index is not None:
+                found.append(index)
+        return found
+    
+    def to_csr(self, symptoms_batch):
+        """Sparse (indptr, indices) representation of a batch of symptom lists"""
+        indptr = np.empty(len(symptoms_batch) + 1, dtype=np.intp)
+        indptr[0] = 0
+        columns = []
+        for row, symptoms in enumerate(symptoms_batch):
+            columns.extend(self.indices(symptoms))
+            indptr[row + 1] = len(columns)
+        return indptr, np.asarray(columns, dtype=np.intp)
+    
+    def _buffer(self, rows):
+        """This thread's reusable input buffer, grown to at least ``rows`` rows"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < rows:
+            capacity = 1
+            while capacity < rows:
+                capacity *= 2
+            buffer = np.zeros((capacity, self.num_features), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+    
+    def encode_batch(self, symptoms_batch, out=None):
+        """Encode a batch into an (N, num_features) float32 matrix.
+        
+        Without ``out`` the result is a view of a per-thread buffer that the
+        next call from the same thread overwrites, so copy it if it must
+        outlive that call. ``out`` must be C-contiguous.
+        """
+        rows = len(symptoms_batch)
+        matrix = out if out is not None else self._buffer(rows)[:rows]
+        matrix.fill(0.0)
+        
+        # Flat positions row * width + column, scattered in one assignment
+        flat_positions = []
+        width = self.num_features
+        for row, symptoms in enumerate(symptoms_batch):
+            offset = row * width
+            flat_positions.extend(offset + index for index in self.indices(symptoms))
+        
+        if flat_positions:
+            matrix.reshape(-1)[flat_positions] = 1.0
+        return matrix
+    
+    def encode_csr(self, indptr, indices, out=None):
+        """Encode an existing CSR representation into a dense float32 matrix"""
+        rows = len(indptr) - 1
+        matrix = out if out is not None else self._buffer(rows)[:rows]
+        matrix.fill(0.0)
+        row_ids = np.repeat(np.arange(rows), np.diff(indptr))
+        matrix[row_ids, indices] = 1.0
+        return matrix
+    
+    def encode(self, symptoms):
+        """Encode one symptom list as a new (num_features,) vector"""
+        vector = np.zeros(self.num_features, dtype=np.float32)
+        vector[self.indices(symptoms)] = 1.0
+        return vector
@@ -0,0 +1,176 @@
+import os
+import re
+from functools import lru_cache
+
+# Size of the LRU of resolved phrases, overridable per deployment
+DEFAULT_PHRASE_CACHE_SIZE = int(os.getenv('SYMPTOM_PHRASE_CACHE_SIZE', '4096'))
+
+# Minimum 1 - edit_distance / length for a fuzzy match to be accepted
+DEFAULT_MIN_SIMILARITY = 0.8
+
+# Candidates per phrase that get a full edit-distance check
+MAX_FUZZY_CANDIDATES = 12
+
+_NON_WORD = re.compile(r"[^a-z0-9']+")
+_SEPARATORS = re.compile(r"\s*(?:,|;|/|\band\b|\bwith\b|&|\+)\s*")
+
+def normalize_text(text):
+    """Lower-case, turn punctuation and hyphens into spaces, collapse whitespace"""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _edit_distance(a, b, limit):
+    """Edit distance (adjacent transpositions count once) between ``a`` and ``b``.
+    
+    Returns ``limit + 1`` as soon as the distance is known to exceed ``limit``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        row_best = i
+        for j in range(1, len(b) + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+            row_best = min(row_best, cost)
+        if row_best > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+class SymptomNormalizer:
+    """Map free-text symptom phrases to canonical symptoms.
+    
+    Everything is indexed once at load time: an exact table of canonical
+    names and synonyms (also under sorted word order), and a character
+    trigram index used to shortlist candidates for a bounded edit-distance
+    check. Resolved phrases are kept in an LRU.
+    """
+    
+    def __init__(self, symptom_mapping, synonyms=None, min_similarity=DEFAULT_MIN_SIMILARITY,
+                 cache_size=None):
+        self.symptom_mapping = {name.lower(): index for name, index in symptom_mapping.items()}
+        self.names = {index: name for name, index in self.symptom_mapping.items()}
+        self.min_similarity = min_similarity
+        
+        # Exact table: normalized phrase -> canonical index
+        self.exact = {}
+        for name, index in self.symptom_mapping.items():
+            self._add_phrase(name, index)
+        for name, phrases in (synonyms or {}).items():
+            index = self.symptom_mapping.get(name.lower())
+            if index is None:
+                continue
+            for phrase in phrases:
+                self._add_phrase(phrase, index)
+        
+        # Trigram index over every known phrase for fuzzy lookups
+        self.phrases = list(self.exact)
+        self.trigram_counts = []
+        self.trigram_index = {}
+        for position, phrase in enumerate(self.phrases):
+            trigrams = _trigrams(phrase)
+            self.trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self.trigram_index.setdefault(trigram, []).append(position)
+        
+        self.resolve = lru_cache(maxsize=DEFAULT_PHRASE_CACHE_SIZE if cache_size is None else cache_size)(self._resolve)
+    
+    def _add_phrase(self, phrase, index):
+        normalized = normalize_text(phrase)
+        if not normalized:
+            return
+        self.exact.setdefault(normalized, index)
+        self.exact.setdefault(" ".join(sorted(normalized.split())), index)
+    
+    def _resolve_single(self, phrase):
+        """Index of the canonical symptom for one normalized phrase, or None"""
+        index = self.exact.get(phrase)
+        if index is not None:
+            return index
+        
+        index = self.exact.get(" ".join(sorted(phrase.split())))
+        if index is not None:
+            return index
+        
+        return self._fuzzy_match(phrase)
+    
+    def _fuzzy_match(self, phrase):
+        # Shortlist by trigram overlap (Dice coefficient), then check edit distance
+        trigrams = _trigrams(phrase)
+        shared = {}
+        for trigram in trigrams:
+            for position in self.trigram_index.get(trigram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        if not shared:
+            return None
+        
+        def overlap(position):
+            return shared[position] / (self.trigram_counts[position] + len(trigrams))
+        
+        candidates = sorted(shared, key=overlap, reverse=True)[:MAX_FUZZY_CANDIDATES]
+        best_index = None
+        best_similarity = self.min_similarity
+        for position in candidates:
+            candidate = self.phrases[position]
+            longest = max(len(phrase), len(candidate))
+            limit = int(longest * (1.0 - self.min_similarity) + 1e-9)
+            distance = _edit_distance(phrase, candidate, limit)
+            if distance > limit:
+                continue
+            similarity = 1.0 - distance / longest
+            if similarity >= best_similarity:
+                best_similarity = similarity
+                best_index = self.exact[candidate]
+        return best_index
+    
+    def _resolve(self, text):
+        """Canonical indices for a free-text phrase (several if it lists symptoms)"""
+        phrase = normalize_text(text)
+        if not phrase:
+            return ()
+        
+        index = self._resolve_single(phrase)
+        if index is not None:
+            return (index,)
+        
+        # "fever and cough", "headache, nausea" ...
+        parts = [normalize_text(part) for part in _SEPARATORS.split(text.lower())]
+        parts = [part for part in parts if part]
+        if len(parts) < 2:
+            return ()
+        indices = []
+        for part in parts:
+            index = self._resolve_single(part)
+            if index is not None and index not in indices:
+                indices.append(index)
+        return tuple(indices)
+    
+    def canonicalize(self, symptoms):
+        """Replace each recognised phrase with its canonical symptom name(s).
+        
+        Unrecognised entries are kept, lower-cased, so rules that look for
+        symptoms outside the model's vocabulary still see them.
+        """
+        canonical = []
+        for symptom in symptoms:
+            lowered = symptom.lower()
+            if lowered in self.symptom_mapping:
+                names = (lowered,)
+            else:
+                names = tuple(self.names[index] for index in self.resolve(symptom)) or (lowered,)
+            for name in names:
+                if name not in canonical:
+                    canonical.append(name)
+        return canonical
+    
+    def cache_info(self):
+        """Hit/miss counters of the resolved-phrase LRU"""
+        return self.resolve.cache_info()._asdict()
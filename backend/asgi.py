@@ -0,0 +1,247 @@
+"""ASGI entry point: the diagnosis API served from an asyncio event loop.
+
+Exposes the same /api/diagnose (also at /api/diagnose/test, as in main.py)
+and /api/health contract as the Flask apps, but a request waiting on
+inference is a suspended coroutine rather than a blocked thread, so one
+process can hold thousands of requests in flight.
+Inference runs on a bounded thread pool (ASGI_INFERENCE_THREADS); with
+DIAGNOSE_MICROBATCH=True waiting requests are coalesced into batched
+invokes instead. Beyond ASGI_MAX_IN_FLIGHT concurrent diagnoses new
+requests are turned away with 503.
+
+Usage: uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import fast_json
+from utils.compression import COMPRESS_MIN_SIZE, compress, negotiate
+from utils.metrics import CONTENT_TYPE, REGISTRY
+
+# Threads running inference; more than the interpreter pool would only queue behind it
+INFERENCE_THREADS = int(os.getenv('ASGI_INFERENCE_THREADS', str(min(4, os.cpu_count() or 1))))
+
+# Diagnoses allowed in flight before new requests are rejected with 503
+MAX_IN_FLIGHT = int(os.getenv('ASGI_MAX_IN_FLIGHT', '10000'))
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = int(os.getenv('ASGI_MAX_BODY_SIZE', str(1024 * 1024)))
+
+# Response used when the diagnostic model could not be loaded
+FALLBACK_RESULT = {
+    "diagnosis": "Test Diagnosis (Model Unavailable)",
+    "confidence": 0.85,
+    "severity": "MEDIUM",
+    "recommendations": ["This is a test response", "The actual model is not available"]
+}
+
+# Try to import the diagnostic service
+try:
+    from services.diagnostic_service import DiagnosticService
+    diagnostic_service = DiagnosticService()
+    model_available = True
+    
+    # Coalesce concurrent requests into batched invokes
+    if os.getenv('DIAGNOSE_MICROBATCH', 'False') == 'True':
+        diagnostic_service.enable_micro_batching()
+except Exception as e:
+    print(f"Warning: Could not load diagnostic service: {e}")
+    diagnostic_service = None
+    model_available = False
+
+# Keep a Diagnosis record of every triage, written behind the request (DIAGNOSIS_RECORDING=False disables it)
+diagnosis_recorder = None
+if os.getenv('DIAGNOSIS_RECORDING', 'True') == 'True':
+    try:
+        from config.database import setup_database
+        from services.diagnosis_recorder import DiagnosisRecorder
+        setup_database()
+        diagnosis_recorder = DiagnosisRecorder()
+    except Exception as e:
+        print(f"Warning: Could not start diagnosis recorder: {e}")
+
+class HTTPError(Exception):
+    """An error response with a status code"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class DiagnosisApp:
+    """Minimal ASGI application for the diagnosis endpoints"""
+    
+    def __init__(self, service, inference_threads=INFERENCE_THREADS, max_in_flight=MAX_IN_FLIGHT, recorder=None):
+        self.service = service
+        self.recorder = recorder
+        self.inference_threads = inference_threads
+        self.max_in_flight = max_in_flight
+        self.executor = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rejected = 0
+        self.routes = {
+            ('GET', '/api/health'): self.health,
+            ('GET', '/api/metrics'): self.metrics,
+            ('POST', '/api/diagnose'): self.diagnose,
+            # Same handler under the path main.py serves it on
+            ('POST', '/api/diagnose/test'): self.diagnose,
+        }
+    
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.inference_threads, thread_name_prefix='inference')
+        return self.executor
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.service is not None:
+                    # Load the model before the first request instead of during it
+                    await asyncio.get_running_loop().run_in_executor(self._executor(), lambda: self.service.interpreter_pool)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.service is not None:
+                    self.service.disable_micro_batching()
+                if self.recorder is not None:
+                    # Writes what is still queued, or spills it; joining the writer blocks, so not on the loop
+                    await asyncio.get_running_loop().run_in_executor(self._executor(), self.recorder.close)
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                    self.executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def _http(self, scope, receive, send):
+        method = scope['method']
+        if method == 'OPTIONS':
+            # CORS preflight, matching flask_cors defaults on the Flask app
+            await self._respond(send, 200, None, extra_headers=[
+                (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+                (b'access-control-allow-headers', b'Content-Type, Authorization'),
+            ])
+            return
+        
+        handler = self.routes.get((method, scope['path']))
+        try:
+            if handler is None:
+                raise HTTPError(404, "Not found")
+            status, payload = await handler(receive)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        accept_encoding = next((value for name, value in scope['headers'] if name == b'accept-encoding'), b'')
+        await self._respond(send, status, payload, accept_encoding=accept_encoding.decode('latin-1'))
+    
+    async def _read_json(self, receive):
+        body = bytearray()
+        more = True
+        while more:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise HTTPError(400, "Client disconnected")
+            body += message.get('body', b'')
+            more = message.get('more_body', False)
+            if len(body) > MAX_BODY_SIZE:
+                raise HTTPError(413, f"Request body too large (maximum {MAX_BODY_SIZE} bytes)")
+        try:
+            return fast_json.loads(bytes(body)) if body else {}
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON")
+    
+    async def _respond(self, send, status, payload, extra_headers=(), accept_encoding=None):
+        # A string payload is sent as-is (metrics text); anything else as JSON
+        content_type = CONTENT_TYPE if isinstance(payload, str) else 'application/json'
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+        else:
+            body = b'' if payload is None else fast_json.dumps(payload)
+        headers = [
+            (b'content-type', content_type.encode()),
+            (b'access-control-allow-origin', b'*'),
+            (b'vary', b'Accept-Encoding'),
+        ]
+        # Small bodies are not worth the CPU; the same threshold as the Flask app
+        encoding = negotiate(accept_encoding) if len(body) >= COMPRESS_MIN_SIZE else None
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers.append((b'content-encoding', encoding.encode()))
+        headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers + list(extra_headers)})
+        await send({'type': 'http.response.body', 'body': body})
+    
+    async def health(self, receive):
+        service = self.service
+        pool = service.model_version.loaded_pool if service is not None else None
+        return 200, {
+            "status": "ok",
+            "model_available": model_available and service is not None,
+            "interpreter_pool": pool.stats() if pool else None,
+            "inference_workers": service.workers.stats() if service is not None and service.workers else None,
+            "micro_batching": service.batcher.stats() if service is not None and service.batcher else None,
+            "result_cache": service.result_cache.stats() if service is not None and service.result_cache else None,
+            "diagnosis_recorder": self.recorder.stats() if self.recorder is not None else None,
+            "requests": {
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "max_in_flight": self.max_in_flight,
+                "rejected": self.rejected,
+                "inference_threads": self.inference_threads
+            }
+        }
+    
+    async def metrics(self, receive):
+        workers = self.service.workers if self.service is not None else None
+        snapshots = []
+        if workers:
+            # Collecting waits on the worker pipes; keep that off the event loop
+            snapshots = await asyncio.get_running_loop().run_in_executor(self._executor(), workers.collect_metrics)
+        return 200, REGISTRY.render(snapshots)
+    
+    async def diagnose(self, receive):
+        data = await self._read_json(receive)
+        symptoms = data.get('symptoms', []) if isinstance(data, dict) else []
+        language = data.get('language', 'en') if isinstance(data, dict) else 'en'
+        
+        if not symptoms:
+            raise HTTPError(400, "No symptoms provided")
+        if self.service is None:
+            return 200, FALLBACK_RESULT
+        
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise HTTPError(503, "Server busy, try again shortly")
+        
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            result = await self.service.process_symptoms_async(symptoms, language, executor=self._executor())
+        except Exception as e:
+            print(f"Error in diagnosis: {e}")
+            raise HTTPError(500, "Failed to process diagnosis")
+        finally:
+            self.in_flight -= 1
+        
+        if self.recorder is not None and not self.recorder.offer(symptoms, result, language):
+            # Queue full: waiting for room (or spilling to disk) must not stall the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor(), self.recorder.record, symptoms, result, language)
+        return 200, result
+
+app = DiagnosisApp(diagnostic_service, recorder=diagnosis_recorder)
+
+if __name__ == '__main__':
+    import uvicorn
+    print("Starting ASGI server on http://localhost:8000")
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', '8000')))
@@ -0,0 +1,118 @@
+"""Concurrency benchmark: the asyncio (ASGI) server against the Flask server.
+
+Starts each server in its own process, then fires ``--requests`` POSTs at
+/api/diagnose with a fixed number of concurrent connections and reports
+throughput, latency percentiles and errors per concurrency level.
+
+Usage: python benchmarks/bench_asgi.py --concurrency 10 100 1000 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+# Add the backend directory to the path so we can import the services
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.workloads import synthetic_symptom_lists
+
+# Server command and the path it serves diagnoses on
+SERVERS = {
+    'flask': ('/api/diagnose/test', [sys.executable, '-c',
+              "import main; main.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False, use_reloader=False)"]),
+    'asgi': ('/api/diagnose', [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', '{port}',
+             '--log-level', 'warning', '--no-access-log']),
+}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(name, env):
+    """Launch a server process; return it with its diagnose URL once it accepts connections"""
+    port = free_port()
+    path, command = SERVERS[name]
+    command = [part.replace('{port}', str(port)) for part in command]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}{path}"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+async def load(url, payloads, concurrency):
+    """Send every payload with at most ``concurrency`` requests in flight"""
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=120)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def client():
+            nonlocal errors
+            while not queue.empty():
+                payload = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    async with session.post(url, json=payload) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            continue
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return sorted(latencies), errors, elapsed
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 1000], help='concurrent connections')
+    parser.add_argument('--requests', type=int, default=5000, help='requests per concurrency level')
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--microbatch', action='store_true', help='enable micro-batching on both servers')
+    parser.add_argument('--cache', action='store_true', help='keep the diagnosis result cache enabled')
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    env['DIAGNOSE_MICROBATCH'] = 'True' if args.microbatch else 'False'
+    if not args.cache:
+        env['DIAGNOSIS_CACHE_SIZE'] = '0'
+    payloads = [{"symptoms": symptoms, "language": "en"} for symptoms in synthetic_symptom_lists(args.requests)]
+    
+    print(f"requests/level: {args.requests}, micro-batching: {args.microbatch}, cache: {args.cache}")
+    print(f"{'server':<8}{'conns':>7}{'req/sec':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name in args.servers:
+        process, url = start_server(name, env)
+        try:
+            asyncio.run(load(url, payloads[:100], 10))  # warm up
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(load(url, payloads, concurrency))
+                print(f"{name:<8}{concurrency:>7}{len(latencies) / elapsed:>10.0f}"
+                      f"{percentile(latencies, 0.5) * 1e3:>10.1f}{percentile(latencies, 0.99) * 1e3:>10.1f}{errors:>8}")
+        finally:
+            process.terminate()
+            process.wait(10)
+
+if __name__ == "__main__":
+    main()
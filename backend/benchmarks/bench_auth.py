@@ -0,0 +1,123 @@
+"""Load test: authenticated diagnose calls while other clients log in.
+
+Creates patients in a throwaway database, starts the Flask server in its own
+process and, for --seconds per case, keeps --diagnose-clients posting to
+/api/patient/diagnose with a bearer token while --login-clients post to
+/api/auth/login. Reports diagnose and login throughput and latency for:
+the claims cache on and off, and logins with bcrypt on the request thread
+(BCRYPT_WORKERS=0) or on the bcrypt pool.
+
+Usage: python benchmarks/bench_auth.py --seconds 10 --diagnose-clients 16 --login-clients 8
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+# Add the backend directory to the path so we can import the services
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.bench_asgi import percentile, start_server
+from benchmarks.workloads import synthetic_symptom_lists
+
+PASSWORD = "kiosk-password"
+
+# (label, extra environment, login clients on)
+CASES = [
+    ("diagnose only, no claims cache", {"JWT_CLAIMS_CACHE_SIZE": "0"}, False),
+    ("diagnose only", {}, False),
+    ("with logins, bcrypt inline", {"BCRYPT_WORKERS": "0"}, True),
+    ("with logins, bcrypt pool", {}, True),
+]
+
+def create_patients(count):
+    from config.database import setup_database
+    setup_database()
+    from services.user_service import create_user
+    return [create_user(f"patient{i}", PASSWORD, f"{i:010d}")["username"] for i in range(count)]
+
+async def drive(base_url, usernames, diagnose_clients, login_clients, seconds):
+    """Run both client kinds until the deadline; returns latencies and error counts per kind"""
+    results = {"diagnose": ([], 0), "login": ([], 0)}
+    payloads = synthetic_symptom_lists(1000)
+    connector = aiohttp.TCPConnector(limit=diagnose_clients + login_clients)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        async with session.post(f"{base_url}/api/auth/login",
+                                json={"username": usernames[0], "password": PASSWORD}) as response:
+            token = (await response.json())["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        deadline = time.perf_counter() + seconds
+        
+        async def client(kind, index):
+            latencies, errors = [], 0
+            i = index
+            while time.perf_counter() < deadline:
+                i += 1
+                if kind == "diagnose":
+                    request = session.post(f"{base_url}/api/patient/diagnose", headers=headers,
+                                           json={"symptoms": payloads[i % len(payloads)]})
+                else:
+                    request = session.post(f"{base_url}/api/auth/login",
+                                           json={"username": usernames[i % len(usernames)], "password": PASSWORD})
+                start = time.perf_counter()
+                try:
+                    async with request as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            continue
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+            return kind, latencies, errors
+        
+        clients = [client("diagnose", i) for i in range(diagnose_clients)]
+        clients += [client("login", i) for i in range(login_clients)]
+        for kind, latencies, errors in await asyncio.gather(*clients):
+            kept, failed = results[kind]
+            results[kind] = (kept + latencies, failed + errors)
+    return {kind: (sorted(latencies), errors) for kind, (latencies, errors) in results.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0, help='duration of each case')
+    parser.add_argument('--diagnose-clients', type=int, default=16, help='concurrent diagnose clients')
+    parser.add_argument('--login-clients', type=int, default=8, help='concurrent login clients')
+    parser.add_argument('--patients', type=int, default=8, help='accounts to log in as')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Read by config.settings, so it must be set before Django is
+        os.environ['DATABASE_PATH'] = os.path.join(tmp, 'auth.sqlite3')
+        usernames = create_patients(args.patients)
+        
+        print(f"seconds/case: {args.seconds}, diagnose clients: {args.diagnose_clients}, "
+              f"login clients: {args.login_clients}, cpus: {os.cpu_count()}")
+        print(f"{'case':<32}{'diag/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'logins/s':>10}{'p50 ms':>9}{'errors':>8}")
+        for label, extra_env, with_logins in CASES:
+            env = dict(os.environ, DIAGNOSIS_RECORDING='False', DIAGNOSIS_CACHE_SIZE='0',
+                       JWT_SECRET_KEY=secrets.token_hex(32), **extra_env)
+            process, url = start_server('flask', env)
+            base_url = url.split('/api/')[0]
+            try:
+                results = asyncio.run(drive(base_url, usernames, args.diagnose_clients,
+                                            args.login_clients if with_logins else 0, args.seconds))
+            finally:
+                process.terminate()
+                process.wait(10)
+            diagnose, diagnose_errors = results["diagnose"]
+            logins, login_errors = results["login"]
+            login_columns = (f"{len(logins) / args.seconds:>10.1f}{percentile(logins, 0.5) * 1e3:>9.0f}"
+                             if with_logins else f"{'-':>10}{'-':>9}")
+            print(f"{label:<32}{len(diagnose) / args.seconds:>8.0f}{percentile(diagnose, 0.5) * 1e3:>9.1f}"
+                  f"{percentile(diagnose, 0.99) * 1e3:>9.1f}{login_columns}{diagnose_errors + login_errors:>8}")
+
+if __name__ == "__main__":
+    main()
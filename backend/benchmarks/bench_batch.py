@@ -0,0 +1,46 @@
+"""Compare per-call diagnosis against the batched inference path.
+
+Usage: python benchmarks/bench_batch.py --rows 1000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.diagnostic_service import DiagnosticService
+from benchmarks.workloads import synthetic_symptom_lists
+
+def time_best(func, repeat):
+    """Return the best wall-clock time of ``repeat`` runs of ``func``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000, help='symptom lists per run')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement')
+    args = parser.parse_args()
+    
+    service = DiagnosticService(cache_size=0)
+    batch = synthetic_symptom_lists(args.rows)
+    
+    # Sanity check: both paths must agree before we compare their speed
+    assert service.process_symptoms_batch(batch[:50]) == [service.process_symptoms(s) for s in batch[:50]]
+    
+    loop_time = time_best(lambda: [service.process_symptoms(s) for s in batch], args.repeat)
+    batch_time = time_best(lambda: service.process_symptoms_batch(batch), args.repeat)
+    
+    print(f"rows: {args.rows}, repeat: {args.repeat}")
+    print(f"per-call loop:  {args.rows / loop_time:12.0f} rows/sec")
+    print(f"batched invoke: {args.rows / batch_time:12.0f} rows/sec")
+    print(f"speedup:        {loop_time / batch_time:12.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Microbenchmark the symptom encoder against the original per-call encoding.
+
+Usage: python benchmarks/bench_encoder.py --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.symptom_encoder import SymptomEncoder
+from benchmarks.workloads import MODEL_DIR, synthetic_symptom_lists
+
+def legacy_preprocess(symptom_mapping, symptoms):
+    """The original encoding: fresh vector, then expand_dims(...).astype copy"""
+    input_vector = np.zeros(50, dtype=np.float32)
+    for symptom in symptoms:
+        symptom = symptom.lower()
+        if symptom in symptom_mapping:
+            input_vector[symptom_mapping[symptom]] = 1.0
+    return np.expand_dims(input_vector, axis=0).astype(np.float32)
+
+def time_best(func, repeat):
+    """Return the best wall-clock time of ``repeat`` runs of ``func``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='symptom lists per run')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement')
+    args = parser.parse_args()
+    
+    with open(os.path.join(MODEL_DIR, 'symptom_mapping.json'), 'r') as f:
+        symptom_mapping = json.load(f)
+    encoder = SymptomEncoder(symptom_mapping)
+    batch = synthetic_symptom_lists(args.rows)
+    
+    assert (encoder.encode_batch(batch) == np.concatenate([legacy_preprocess(symptom_mapping, s) for s in batch])).all()
+    
+    cases = [
+        ("legacy, per call", lambda: [legacy_preprocess(symptom_mapping, s) for s in batch]),
+        ("encoder, per call", lambda: [encoder.encode_batch([s]) for s in batch]),
+        ("legacy, stacked batch", lambda: np.concatenate([legacy_preprocess(symptom_mapping, s) for s in batch])),
+        ("encoder, batch", lambda: encoder.encode_batch(batch)),
+        ("encoder, CSR only", lambda: encoder.to_csr(batch)),
+    ]
+    
+    print(f"rows: {args.rows}, repeat: {args.repeat}")
+    for label, func in cases:
+        elapsed = time_best(func, args.repeat)
+        print(f"{label:<24} {elapsed / args.rows * 1e6:8.3f} us/row   {args.rows / elapsed:12.0f} rows/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Time diagnosis history pages, keyset against OFFSET, on a million synthetic rows.
+
+Builds a throwaway SQLite database (WAL, same migrations as the app) with
+--rows Diagnosis rows: one heavy patient owns a tenth of them, the rest are
+spread over --patients others, severities are uniform and timestamps repeat
+so the id tie-break is exercised. Page N of a patient's history and of the
+HIGH severity dashboard is then fetched through the keyset cursor and with
+OFFSET, first with the history indexes and then without them.
+
+Usage: python benchmarks/bench_history.py --rows 1000000 --pages 1,10,100,1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INSERT_CHUNK = 50000
+SEVERITIES = ('LOW', 'MEDIUM', 'HIGH')
+HISTORY_INDEXES = ('diagnosis_user_created_idx', 'diagnosis_severity_created_idx')
+
+def populate(rows, patients, seed=0):
+    """Insert the users and ``rows`` diagnoses with raw executemany; returns the heavy patient's id"""
+    from django.db import connection, transaction
+    from models.user import User
+    
+    users = User.objects.bulk_create([
+        User(username=f"patient{i}", phone_number=f"{i:010d}") for i in range(patients + 1)
+    ])
+    heavy, others = users[0].id, [user.id for user in users[1:]]
+    
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    sql = ('INSERT INTO models_diagnosis (user_id, symptoms, diagnosis_result, confidence_score, language, '
+           'is_reviewed, severity_level, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+    for start in range(0, rows, INSERT_CHUNK):
+        batch = []
+        for i in range(start, min(rows, start + INSERT_CHUNK)):
+            # Three rows per millisecond: ties on created_at are common
+            created_at = (base + timedelta(milliseconds=i // 3)).strftime('%Y-%m-%d %H:%M:%S.%f')
+            user_id = heavy if i % 10 == 0 else rng.choice(others)
+            batch.append((user_id, '["fever", "cough"]', '{"diagnosis": "Common Cold"}', 0.8, 'en', False,
+                          rng.choice(SEVERITIES), created_at, created_at))
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return heavy
+
+def time_best(func, repeat):
+    """Return the best wall-clock time of ``repeat`` runs of ``func``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def measure(label, queryset, filters, pages, page_size, repeat):
+    from services.history_service import DIAGNOSIS_FIELDS, diagnosis_history, encode_cursor
+    
+    ordered = queryset.order_by('-created_at', '-id')
+    for page in pages:
+        offset = (page - 1) * page_size
+        cursor = None
+        if offset:
+            # The cursor the client would hold after reading page - 1 pages (not timed)
+            last = ordered.values('created_at', 'id')[offset - 1:offset].first()
+            if last is None:
+                print(f"{label:<34} page {page:>5}   past the last page")
+                continue
+            cursor = encode_cursor(last['created_at'], last['id'])
+        
+        keyset = diagnosis_history(cursor=cursor, limit=page_size, **filters)["results"]
+        paged = list(ordered.values(*DIAGNOSIS_FIELDS)[offset:offset + page_size])
+        assert [r['id'] for r in keyset] == [r['id'] for r in paged], "Keyset and OFFSET pages should match"
+        
+        keyset_s = time_best(lambda: diagnosis_history(cursor=cursor, limit=page_size, **filters), repeat)
+        offset_s = time_best(lambda: list(ordered.values(*DIAGNOSIS_FIELDS)[offset:offset + page_size]), repeat)
+        print(f"{label:<34} page {page:>5}   keyset {keyset_s * 1e3:9.2f} ms   OFFSET {offset_s * 1e3:9.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000, help='synthetic diagnoses')
+    parser.add_argument('--patients', type=int, default=1000, help='patients sharing nine tenths of the rows')
+    parser.add_argument('--pages', default='1,10,100,1000', help='comma-separated page numbers to fetch')
+    parser.add_argument('--page-size', type=int, default=50, help='rows per page')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement')
+    args = parser.parse_args()
+    pages = [int(p) for p in args.pages.split(',')]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Read by config.settings, so it must be set before Django is
+        os.environ['DATABASE_PATH'] = os.path.join(tmp, 'history.sqlite3')
+        from config.database import setup_database
+        setup_database()
+        from django.db import connection
+        from models.diagnosis import Diagnosis
+        
+        start = time.perf_counter()
+        heavy = populate(args.rows, args.patients)
+        print(f"rows: {args.rows}, heavy patient: {Diagnosis.objects.filter(user_id=heavy).count()} rows, "
+              f"built in {time.perf_counter() - start:.1f}s, page size: {args.page_size}, repeat: {args.repeat}")
+        
+        cases = [
+            ("patient history", Diagnosis.objects.filter(user_id=heavy), {"user_id": heavy}),
+            ("HIGH severity dashboard", Diagnosis.objects.filter(severity_level='HIGH'), {"severity": 'HIGH'}),
+        ]
+        for label, queryset, filters in cases:
+            measure(label, queryset, filters, pages, args.page_size, args.repeat)
+        
+        with connection.cursor() as cursor:
+            for index in HISTORY_INDEXES:
+                cursor.execute(f'DROP INDEX {index}')
+            # What the foreign key alone used to provide
+            cursor.execute('CREATE INDEX diagnosis_user_idx ON models_diagnosis (user_id)')
+        for label, queryset, filters in cases:
+            measure(f"{label}, no index", queryset, filters, pages[:1] + pages[-1:], args.page_size, 1)
+        connection.close()
+
+if __name__ == "__main__":
+    main()
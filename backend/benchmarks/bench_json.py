@@ -0,0 +1,63 @@
+"""Microbenchmark response encoding: Flask's default JSON against the fast_json backends.
+
+Encodes a batch response shaped like /api/diagnose/batch output with each
+backend, then compresses it at the configured gzip level, and reports time
+per response and size on the wire.
+
+Usage: python benchmarks/bench_json.py --rows 1024 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add the backend directory to the path so we can import the utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_encoder import time_best
+from utils import fast_json
+from utils.compression import GZIP_LEVEL, compress
+
+def batch_response(rows, seed=42):
+    """A batch response with confidences and probabilities still as NumPy values"""
+    rng = np.random.default_rng(seed)
+    probabilities = rng.random((rows, 41), dtype=np.float32)
+    return {"results": [{
+        "diagnosis": "Common Cold",
+        "confidence": probabilities[i].max(),
+        "severity": "LOW",
+        "recommendations": ["Rest and stay hydrated", "Consult a doctor if symptoms persist"],
+        "probabilities": probabilities[i],
+    } for i in range(rows)], "count": rows}
+
+def flask_default(payload):
+    """What Flask's default provider has to do: convert NumPy values first, then json.dumps"""
+    converted = {"results": [dict(result, confidence=float(result["confidence"]),
+                                  probabilities=result["probabilities"].tolist())
+                             for result in payload["results"]], "count": payload["count"]}
+    return json.dumps(converted).encode('utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1024, help='results per response')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per measurement')
+    args = parser.parse_args()
+    
+    payload = batch_response(args.rows)
+    encoders = [("flask default (tolist + json)", flask_default)]
+    encoders += [(f"fast_json {name}", backend[0]) for name, backend in fast_json.BACKENDS.items()]
+    
+    print(f"rows: {args.rows}, gzip level: {GZIP_LEVEL}")
+    print(f"{'encoder':<32}{'encode ms':>11}{'bytes':>10}{'gzip ms':>9}{'gzip bytes':>12}")
+    for label, dumps in encoders:
+        body = dumps(payload)
+        encode = time_best(lambda: dumps(payload), args.repeat)
+        packing = time_best(lambda: compress(body, 'gzip'), args.repeat)
+        packed = len(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+        print(f"{label:<32}{encode * 1e3:>11.2f}{len(body):>10}{packing * 1e3:>9.2f}{packed:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure throughput and tail latency of micro-batching under concurrent load.
+
+Usage: python benchmarks/bench_microbatch.py --clients 32 --requests 200
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.diagnostic_service import DiagnosticService
+from benchmarks.workloads import synthetic_symptom_lists
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def run_load(service, workload, clients):
+    """Fire ``workload`` from ``clients`` threads; return (seconds, latencies)"""
+    latencies = []
+    lock = threading.Lock()
+    per_client = [workload[i::clients] for i in range(clients)]
+    
+    def client(symptom_lists):
+        local = []
+        for symptoms in symptom_lists:
+            start = time.perf_counter()
+            service.process_symptoms(symptoms)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=client, args=(chunk,)) for chunk in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+def report(label, elapsed, latencies):
+    print(f"{label:<22} {len(latencies) / elapsed:10.0f} req/s   "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.3f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='concurrent client threads')
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--max-batch', type=int, default=32, help='micro-batch size limit')
+    parser.add_argument('--max-delay-ms', type=float, default=2.0, help='micro-batch collection window')
+    args = parser.parse_args()
+    
+    service = DiagnosticService(cache_size=0)
+    workload = synthetic_symptom_lists(args.clients * args.requests)
+    
+    elapsed, latencies = run_load(service, workload, args.clients)
+    report("direct (pool only)", elapsed, latencies)
+    
+    batcher = service.enable_micro_batching(args.max_batch, args.max_delay_ms)
+    elapsed, latencies = run_load(service, workload, args.clients)
+    report("micro-batched", elapsed, latencies)
+    
+    stats = batcher.stats()
+    service.disable_micro_batching()
+    
+    print(f"\nbatches: {stats['batches']}, mean batch size: {stats['batch_size']['mean']:.1f}")
+    previous = 0
+    for bound, count in stats["batch_size"]["buckets"].items():
+        print(f"  batch size <= {bound:>5}: {count - previous}")
+        previous = count
+
+if __name__ == "__main__":
+    main()
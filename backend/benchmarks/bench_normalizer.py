@@ -0,0 +1,99 @@
+"""Benchmark free-text symptom resolution over a synthetic phrase corpus.
+
+Usage: python benchmarks/bench_normalizer.py --phrases 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.symptom_normalizer import SymptomNormalizer
+from benchmarks.workloads import MODEL_DIR
+
+def typo(rng, word):
+    """Apply one random delete, substitute, insert or transpose to ``word``"""
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + rng.choice("aeiounrst") + word[i + 1:]
+    if kind == 2:
+        return word[:i] + rng.choice("aeiounrst") + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+def build_corpus(symptom_mapping, synonyms, count, seed=7):
+    """Return (phrase, expected index or None) pairs"""
+    rng = random.Random(seed)
+    phrases = [(name, index) for name, index in symptom_mapping.items()]
+    phrases += [(phrase, symptom_mapping[name]) for name, variants in synonyms.items() for phrase in variants]
+    
+    corpus = []
+    for _ in range(count):
+        phrase, index = rng.choice(phrases)
+        kind = rng.random()
+        if kind < 0.25:
+            phrase = phrase.upper() if rng.random() < 0.5 else phrase.title()
+        elif kind < 0.4:
+            phrase = phrase.replace(" ", rng.choice(["-", "_", "  "]))
+        elif kind < 0.7:
+            phrase = " ".join(typo(rng, word) for word in phrase.split())
+        elif kind < 0.8:
+            phrase, index = f"unlisted complaint {rng.randint(0, 10 ** 6)}", None
+        corpus.append((phrase, index))
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--phrases', type=int, default=100000, help='phrases in the synthetic corpus')
+    args = parser.parse_args()
+    
+    with open(os.path.join(MODEL_DIR, 'symptom_mapping.json'), 'r') as f:
+        symptom_mapping = json.load(f)
+    with open(os.path.join(MODEL_DIR, 'symptom_synonyms.json'), 'r', encoding='utf-8') as f:
+        synonyms = json.load(f)
+    corpus = build_corpus(symptom_mapping, synonyms, args.phrases)
+    
+    start = time.perf_counter()
+    normalizer = SymptomNormalizer(symptom_mapping, synonyms)
+    build_time = time.perf_counter() - start
+    
+    # Exact-only baseline: what preprocess_symptoms recognised before
+    exact_hits = sum(1 for phrase, index in corpus if index is not None and symptom_mapping.get(phrase.lower()) == index)
+    
+    uncached = SymptomNormalizer(symptom_mapping, synonyms, cache_size=0)
+    start = time.perf_counter()
+    resolved = [uncached.resolve(phrase) for phrase, _ in corpus]
+    cold_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for phrase, _ in corpus:
+        normalizer.resolve(phrase)
+    first_pass = time.perf_counter() - start
+    start = time.perf_counter()
+    for phrase, _ in corpus:
+        normalizer.resolve(phrase)
+    warm_time = time.perf_counter() - start
+    
+    expected = [index for _, index in corpus]
+    known = sum(1 for index in expected if index is not None)
+    correct = sum(1 for got, index in zip(resolved, expected) if index is not None and got == (index,))
+    false_matches = sum(1 for got, index in zip(resolved, expected) if index is None and got)
+    
+    print(f"phrases: {len(corpus)} ({known} with a known symptom), index build: {build_time * 1000:.1f} ms")
+    print(f"exact-match recall:      {exact_hits / known:6.1%}")
+    print(f"normalizer recall:       {correct / known:6.1%}   false matches on unknown phrases: {false_matches}")
+    print(f"uncached:                {cold_time / len(corpus) * 1e6:8.2f} us/phrase")
+    print(f"LRU, first pass:         {first_pass / len(corpus) * 1e6:8.2f} us/phrase")
+    print(f"LRU, warm:               {warm_time / len(corpus) * 1e6:8.2f} us/phrase")
+    print(f"LRU: {normalizer.cache_info()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare the NumPy engine against the TFLite interpreter backends.
+
+Usage: python benchmarks/bench_numpy_engine.py --batch-sizes 1 64 4096 --seconds 1
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.backends import BACKEND_LOADERS, resolve_backend
+from ai.interpreter_pool import PooledInterpreter
+from benchmarks.workloads import MODEL_DIR
+
+MODEL_PATH = os.path.join(MODEL_DIR, 'diagnostic_model.tflite')
+
+def available_backends():
+    """Backends whose runtime package is installed here"""
+    return [name for name in BACKEND_LOADERS if importlib.util.find_spec(name) is not None]
+
+def measure(pooled, inputs, seconds):
+    """Return per-invoke latencies (seconds) collected for roughly ``seconds``"""
+    pooled.run(inputs)  # warm up and resize outside the measurement
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline or len(latencies) < 5:
+        start = time.perf_counter()
+        pooled.run(inputs)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 4096], help='rows per invoke')
+    parser.add_argument('--seconds', type=float, default=1.0, help='measurement time per case')
+    args = parser.parse_args()
+    
+    backends = available_backends()
+    rng = np.random.default_rng(42)
+    print(f"{'backend':<16}{'batch':>7}{'p50 us':>12}{'p99 us':>12}{'rows/sec':>14}")
+    for batch_size in args.batch_sizes:
+        inputs = (rng.random((batch_size, 50)) < 0.1).astype(np.float32)
+        reference = None
+        for backend in backends:
+            _, interpreter_class = resolve_backend(backend)
+            pooled = PooledInterpreter(interpreter_class(model_path=MODEL_PATH))
+            
+            # Every backend must agree before its speed means anything
+            output = pooled.run(inputs)
+            if reference is None:
+                reference = output
+            assert np.allclose(output, reference, atol=1e-5), f"{backend} output differs"
+            
+            latencies = sorted(measure(pooled, inputs, args.seconds))
+            p50 = statistics.median(latencies)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{backend:<16}{batch_size:>7}{p50 * 1e6:>12.1f}{p99 * 1e6:>12.1f}{batch_size / p50:>14.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure cold-start time and peak RSS of the Flask app per interpreter backend.
+
+Each case runs in a fresh interpreter process: import main.py, then serve
+the first diagnosis (which is when the model is loaded).
+
+Usage: python benchmarks/bench_startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, resource, sys, time
+start = time.perf_counter()
+if {eager_tensorflow}:
+    import tensorflow
+sys.path.insert(0, {backend_dir!r})
+import main
+imported = time.perf_counter()
+main.diagnostic_service.process_symptoms(["fever", "cough"])
+first_request = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "first_request_s": first_request - imported,
+    "backend": main.diagnostic_service.backend_name,
+    "tensorflow_imported": "tensorflow" in sys.modules,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+'''
+
+CASES = [
+    ("tensorflow, eager import (previous)", "tensorflow", True),
+    ("tensorflow, lazy", "tensorflow", False),
+    ("tflite_runtime, lazy", "tflite_runtime", False),
+    ("auto, lazy", "auto", False),
+]
+
+def run_case(backend, eager_tensorflow):
+    env = dict(os.environ, DIAGNOSTIC_BACKEND=backend, TF_CPP_MIN_LOG_LEVEL="3")
+    code = CHILD.format(backend_dir=BACKEND_DIR, eager_tensorflow=eager_tensorflow)
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=BACKEND_DIR)
+    if completed.returncode != 0:
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3, help='fresh processes per case (best run is reported)')
+    args = parser.parse_args()
+    
+    print(f"{'case':<38} {'backend':<16} {'import':>9} {'1st req':>9} {'total':>9} {'RSS':>9}  TF imported")
+    for label, backend, eager_tensorflow in CASES:
+        runs = [run_case(backend, eager_tensorflow) for _ in range(args.runs)]
+        runs = [run for run in runs if run is not None]
+        if not runs:
+            print(f"{label:<38} unavailable")
+            continue
+        best = min(runs, key=lambda run: run["import_s"] + run["first_request_s"])
+        print(f"{label:<38} {best['backend'] or 'none':<16} {best['import_s']:8.2f}s {best['first_request_s']:8.2f}s "
+              f"{best['import_s'] + best['first_request_s']:8.2f}s {best['maxrss_mb']:7.0f}MB  {best['tensorflow_imported']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Memory per inference worker: RSS and proportional set size (PSS).
+
+Starts the worker pool, sends each worker a request so everything it needs
+is loaded and touched, then reads /proc/<pid>/smaps_rollup for every
+worker. RSS counts shared pages in full for each process; PSS divides them
+among the processes sharing them, so the sum of PSS is what the workers
+really cost together. Linux only.
+
+Usage: python benchmarks/bench_worker_memory.py --workers 16 --backend tflite_runtime
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.worker_pool import InferenceWorkerPool
+from benchmarks.workloads import synthetic_symptom_lists
+
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+def memory_of(pid):
+    """Fields of /proc/<pid>/smaps_rollup in MiB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=16, help='worker processes to start')
+    parser.add_argument('--backend', default=None, help='inference backend (default: DIAGNOSTIC_BACKEND or auto)')
+    parser.add_argument('--start-method', default=None, help='multiprocessing start method (default: the pool default)')
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    pool = InferenceWorkerPool(args.workers, backend=args.backend, start_method=args.start_method).start()
+    startup = time.perf_counter() - started
+    try:
+        # One request per worker so lazily touched pages count too
+        batch = synthetic_symptom_lists(64)
+        futures = [pool.submit(batch) for _ in range(args.workers * 2)]
+        for future in futures:
+            future.result(timeout=30)
+        
+        pids = [process["pid"] for process in pool.stats()["processes"]]
+        samples = [memory_of(pid) for pid in pids]
+    finally:
+        pool.shutdown()
+    
+    print(f"workers: {args.workers}, start method: {pool.start_method}, backend: {args.backend or 'auto'}, "
+          f"startup: {startup:.2f}s")
+    print(f"{'pid':>8}" + ''.join(f"{name:>15}" for name in FIELDS))
+    for pid, sample in zip(pids, samples):
+        print(f"{pid:>8}" + ''.join(f"{sample.get(name, 0):>15.1f}" for name in FIELDS))
+    
+    mean = {name: sum(sample.get(name, 0) for sample in samples) / len(samples) for name in FIELDS}
+    print(f"{'mean':>8}" + ''.join(f"{mean[name]:>15.1f}" for name in FIELDS))
+    print(f"total RSS {mean['Rss'] * len(samples):.0f} MiB, total PSS {mean['Pss'] * len(samples):.0f} MiB")
+
+if __name__ == "__main__":
+    main()
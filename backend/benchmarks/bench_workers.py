@@ -0,0 +1,87 @@
+"""Load test: throughput of the inference worker pool as workers are added.
+
+Each run starts the pool, keeps ``--clients-per-worker`` client threads per
+worker busy sending batches for ``--seconds``, and reports throughput and
+scaling efficiency against a single worker. Scaling can only be near-linear
+up to the number of physical cores available to the benchmark.
+
+Usage: python benchmarks/bench_workers.py --workers 1 2 4 --rows 64 --seconds 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.diagnostic_service import DiagnosticService
+from benchmarks.workloads import synthetic_symptom_lists
+
+def default_worker_counts():
+    """1, 2, 4, ... up to the core count"""
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+def drive(service, batches, clients, seconds):
+    """Run ``clients`` threads against the service; return completed requests"""
+    completed = [0] * clients
+    deadline = time.perf_counter() + seconds
+    
+    def client(slot):
+        i = slot
+        while time.perf_counter() < deadline:
+            service.process_symptoms_batch(batches[i % len(batches)])
+            completed[slot] += 1
+            i += clients
+    
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(completed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts(), help='worker counts to test')
+    parser.add_argument('--rows', type=int, default=64, help='symptom lists per request')
+    parser.add_argument('--clients-per-worker', type=int, default=4, help='concurrent client threads per worker')
+    parser.add_argument('--seconds', type=float, default=5.0, help='measurement time per run')
+    args = parser.parse_args()
+    
+    symptom_lists = synthetic_symptom_lists(args.rows * 64)
+    batches = [symptom_lists[i:i + args.rows] for i in range(0, len(symptom_lists), args.rows)]
+    
+    print(f"cores: {os.cpu_count()}, rows/request: {args.rows}, seconds/run: {args.seconds}")
+    print(f"{'mode':<14}{'clients':>8}{'req/sec':>12}{'rows/sec':>12}{'speedup':>10}{'efficiency':>12}")
+    
+    # Baseline: everything in the web process
+    service = DiagnosticService(cache_size=0, lazy=False)
+    drive(service, batches, 1, 0.5)
+    clients = args.clients_per_worker
+    completed = drive(service, batches, clients, args.seconds)
+    print(f"{'in-process':<14}{clients:>8}{completed / args.seconds:>12.0f}{completed * args.rows / args.seconds:>12.0f}")
+    
+    single = None
+    for workers in args.workers:
+        service = DiagnosticService(cache_size=0)
+        service.start_workers(workers)
+        try:
+            clients = workers * args.clients_per_worker
+            drive(service, batches, clients, 0.5)
+            rate = drive(service, batches, clients, args.seconds) / args.seconds
+        finally:
+            service.stop_workers()
+        
+        single = single or rate
+        speedup = rate / single
+        print(f"{f'{workers} workers':<14}{clients:>8}{rate:>12.0f}{rate * args.rows:>12.0f}"
+              f"{speedup:>9.2f}x{speedup / workers:>11.0%}")
+
+if __name__ == "__main__":
+    main()
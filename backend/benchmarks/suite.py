@@ -0,0 +1,276 @@
+"""Reproducible benchmark suite for the diagnostic hot path.
+
+Every case runs on the same seeded synthetic workload. The number of calls
+per sample is calibrated so a sample takes at least ``--min-time``, and
+per-call times from ``--repeat`` samples are summarized. ``run`` prints a
+table and can write the results as JSON; ``compare`` lines up two result
+files and exits with status 1 if any case's median got slower by more than
+``--threshold``, so it can gate a change against its parent commit.
+
+Usage:
+    python benchmarks/suite.py run --output before.json
+    python benchmarks/suite.py run --rows 256 --cases invoke_batch process_symptoms_batch --output after.json
+    python benchmarks/suite.py compare before.json after.json --threshold 0.10
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.workloads import synthetic_symptom_lists
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bumped whenever the result layout changes
+RESULT_FORMAT = 1
+
+def _service():
+    from services.diagnostic_service import DiagnosticService
+    # No result cache: every call must do the work being measured
+    return DiagnosticService(cache_size=0, lazy=False)
+
+def _cycle(items):
+    """Endless iterator over ``items``; calling next() is cheaper than indexing with a counter"""
+    return itertools.cycle(items).__next__
+
+def case_preprocess_symptoms(workload, rows):
+    service = _service()
+    next_symptoms = _cycle(workload)
+    return lambda: service.preprocess_symptoms(next_symptoms()), 1
+
+def case_preprocess_batch(workload, rows):
+    service = _service()
+    batches = _cycle([workload[i:i + rows] for i in range(0, len(workload) - rows + 1, rows)])
+    return lambda: service.preprocess_symptoms_batch(batches()), rows
+
+def case_invoke_single(workload, rows):
+    service = _service()
+    pool = service.interpreter_pool
+    if pool is None:
+        return None
+    input_data = service.preprocess_symptoms_batch(workload[:1]).copy()
+    return lambda: pool.run(input_data), 1
+
+def case_invoke_batch(workload, rows):
+    service = _service()
+    pool = service.interpreter_pool
+    if pool is None:
+        return None
+    input_data = service.preprocess_symptoms_batch(workload[:rows]).copy()
+    return lambda: pool.run(input_data), rows
+
+def case_process_symptoms(workload, rows):
+    service = _service()
+    next_symptoms = _cycle(workload)
+    return lambda: service.process_symptoms(next_symptoms()), 1
+
+def case_process_symptoms_batch(workload, rows):
+    service = _service()
+    batches = _cycle([workload[i:i + rows] for i in range(0, len(workload) - rows + 1, rows)])
+    return lambda: service.process_symptoms_batch(batches()), rows
+
+def case_rule_based_diagnosis(workload, rows):
+    service = _service()
+    next_symptoms = _cycle(workload)
+    return lambda: service.rule_based_diagnosis(next_symptoms()), 1
+
+def _flask_client():
+    import main
+    if main.model_available:
+        main.diagnostic_service.result_cache = None
+    return main.app.test_client()
+
+def case_flask_diagnose(workload, rows):
+    client = _flask_client()
+    bodies = _cycle([json.dumps({"symptoms": symptoms}) for symptoms in workload])
+    
+    def call():
+        response = client.post('/api/diagnose/test', data=bodies(), content_type='application/json')
+        assert response.status_code == 200, response.status_code
+    return call, 1
+
+def case_flask_diagnose_batch(workload, rows):
+    client = _flask_client()
+    bodies = _cycle([json.dumps({"batch": workload[i:i + rows]})
+                     for i in range(0, len(workload) - rows + 1, rows)])
+    
+    def call():
+        response = client.post('/api/diagnose/batch', data=bodies(), content_type='application/json')
+        assert response.status_code == 200, response.status_code
+    return call, rows
+
+# Case name -> setup(workload, rows) returning (call, items per call), or None to skip
+CASES = {
+    'preprocess_symptoms': case_preprocess_symptoms,
+    'preprocess_batch': case_preprocess_batch,
+    'invoke_single': case_invoke_single,
+    'invoke_batch': case_invoke_batch,
+    'process_symptoms': case_process_symptoms,
+    'process_symptoms_batch': case_process_symptoms_batch,
+    'rule_based_diagnosis': case_rule_based_diagnosis,
+    'flask_diagnose': case_flask_diagnose,
+    'flask_diagnose_batch': case_flask_diagnose_batch,
+}
+
+def calibrate(call, min_time):
+    """Calls per sample so that one sample takes at least ``min_time`` seconds"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+def measure(call, repeat, min_time):
+    """Per-call seconds of each of ``repeat`` samples"""
+    number = calibrate(call, min_time)
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return number, samples
+
+def summarize(samples, items):
+    median = statistics.median(samples)
+    return {
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "items_per_sec": items / median if median else None,
+    }
+
+def environment():
+    """What the numbers were measured on, so comparisons can be sanity-checked"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    from ai.backends import resolve_backend
+    try:
+        backend = resolve_backend()[0]
+    except ImportError:
+        backend = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "backend": backend,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def run(args):
+    names = args.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+    
+    workload = synthetic_symptom_lists(args.workload, seed=args.seed)
+    results = {}
+    print(f"{'case':<26}{'calls':>8}{'median':>12}{'min':>12}{'stdev':>10}{'items/sec':>14}")
+    for name in names:
+        setup = CASES[name](workload, args.rows)
+        if setup is None:
+            print(f"{name:<26}  skipped (model unavailable)")
+            continue
+        call, items = setup
+        # Warm caches, lazy loads and buffers before measuring
+        for _ in range(10):
+            call()
+        number, samples = measure(call, args.repeat, args.min_time)
+        stats = summarize(samples, items)
+        results[name] = dict(stats, items=items, number=number, samples=samples)
+        print(f"{name:<26}{number:>8}{stats['median'] * 1e6:>10.1f}us{stats['min'] * 1e6:>10.1f}us"
+              f"{stats['stdev'] / stats['median']:>9.1%}{stats['items_per_sec']:>14.0f}")
+    
+    report = {
+        "format": RESULT_FORMAT,
+        "environment": environment(),
+        "parameters": {"rows": args.rows, "workload": args.workload, "seed": args.seed,
+                       "repeat": args.repeat, "min_time": args.min_time},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+def compare(args):
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r') as f:
+        candidate = json.load(f)
+    if baseline.get("parameters") != candidate.get("parameters"):
+        print(f"Warning: parameters differ ({baseline.get('parameters')} vs {candidate.get('parameters')})")
+    
+    print(f"baseline {baseline['environment'].get('commit')}, candidate {candidate['environment'].get('commit')}, "
+          f"threshold {args.threshold:.0%}")
+    print(f"{'case':<26}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    regressions = []
+    for name in sorted(set(baseline["results"]) | set(candidate["results"])):
+        before, after = baseline["results"].get(name), candidate["results"].get(name)
+        if before is None or after is None:
+            print(f"{name:<26}  only in {'candidate' if before is None else 'baseline'}")
+            continue
+        change = after["median"] / before["median"] - 1
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f"{name:<26}{before['median'] * 1e6:>10.1f}us{after['median'] * 1e6:>10.1f}us{change:>+10.1%}{flag}")
+    
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the {args.threshold:.0%} threshold: {', '.join(regressions)}")
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--cases', nargs='+', help=f"cases to run (default all: {', '.join(CASES)})")
+    run_parser.add_argument('--rows', type=int, default=64, help='rows per call for the batched cases')
+    run_parser.add_argument('--workload', type=int, default=1024, help='distinct synthetic symptom lists')
+    run_parser.add_argument('--seed', type=int, default=42, help='workload random seed')
+    run_parser.add_argument('--repeat', type=int, default=7, help='samples per case')
+    run_parser.add_argument('--min-time', type=float, default=0.1, help='minimum seconds per sample')
+    run_parser.add_argument('--output', help='write results to this JSON file')
+    
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline', help='results of the reference commit')
+    compare_parser.add_argument('candidate', help='results to check against it')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='allowed median slowdown (0.10 = 10%%)')
+    
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == 'run' else compare(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import json
+import os
+import random
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', 'models')
+
+def load_symptom_names():
+    """Load the symptom vocabulary the model was trained on"""
+    with open(os.path.join(MODEL_DIR, 'symptom_mapping.json'), 'r') as f:
+        return list(json.load(f).keys())
+
+def synthetic_symptom_lists(count, min_symptoms=1, max_symptoms=6, noise=0.1, seed=42):
+    """Generate reproducible symptom lists that look like intake data.
+    
+    A fraction ``noise`` of the entries are unknown tokens so the
+    preprocessing path also sees symptoms it has to drop.
+    """
+    rng = random.Random(seed)
+    names = load_symptom_names()
+    
+    batch = []
+    for _ in range(count):
+        symptoms = rng.sample(names, rng.randint(min_symptoms, max_symptoms))
+        symptoms = [s.upper() if rng.random() < 0.2 else s for s in symptoms]
+        if rng.random() < noise:
+            symptoms.append(f"unknown symptom {rng.randint(0, 999)}")
+        batch.append(symptoms)
+    return batch
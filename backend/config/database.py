@@ -0,0 +1,45 @@
+"""Django ORM setup for the Flask and ASGI processes.
+
+The web tier is not a Django project, but the records in ``models`` are
+Django models. ``setup_database()`` configures Django from
+``config.settings`` once per process, switches SQLite connections to WAL
+(readers no longer block the writer, and a commit appends to the log
+instead of rewriting pages) and applies pending migrations.
+"""
+import os
+import threading
+
+# SQLite settings applied to every new connection. With WAL, synchronous=NORMAL
+# only syncs at checkpoints: a commit survives a process crash, and a power
+# loss can drop at most the last few commits rather than corrupt the file
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA foreign_keys=ON',
+)
+
+_setup_lock = threading.Lock()
+_ready = False
+
+def _configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+
+def setup_database(migrate: bool = True):
+    """Make the ORM usable in this process; safe to call more than once"""
+    global _ready
+    with _setup_lock:
+        if _ready:
+            return
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        import django
+        from django.db.backends.signals import connection_created
+
+        django.setup()
+        connection_created.connect(_configure_sqlite)
+        if migrate:
+            from django.core.management import call_command
+            call_command('migrate', interactive=False, verbosity=0)
+        _ready = True
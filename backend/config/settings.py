@@ -18,9 +18,13 @@ ABDM_API_URL = os.getenv('ABDM_API_URL')
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db.sqlite3'),
+        'NAME': os.getenv('DATABASE_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'db.sqlite3')),
+        # Seconds a writer waits on a locked database before failing
+        'OPTIONS': {'timeout': 20},
     }
 }
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+AUTH_USER_MODEL = 'models.User'
 
 # Offline storage configuration
 OFFLINE_STORAGE = {
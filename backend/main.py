@@ -1,27 +1,79 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+import atexit
 import os
+import secrets
 import sys
 
 # Add the current directory to the path so we can import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from utils.metrics import CONTENT_TYPE, REGISTRY
+from utils.responses import init_responses, ndjson_response, wants_ndjson
+from services.history_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, diagnosis_history, health_record_history
+
 # Try to import the diagnostic service
 try:
     from services.diagnostic_service import DiagnosticService
     diagnostic_service = DiagnosticService()
     model_available = True
+    
+    # Coalesce concurrent single-patient requests into batched invokes
+    if os.getenv('DIAGNOSE_MICROBATCH', 'False') == 'True':
+        diagnostic_service.enable_micro_batching()
 except Exception as e:
     print(f"Warning: Could not load diagnostic service: {e}")
     model_available = False
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'  # Add a secret key for JWT
+app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
+# Signs the patients' JWTs; unset disables the /api/auth and /api/patient endpoints
+JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY') or os.getenv('SECRET_KEY')
+app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY
 CORS(app)  # Enable CORS for all routes
+init_responses(app)  # Fast JSON encoding and negotiated compression
+
+# Upper bound on the number of symptom lists accepted by /api/diagnose/batch
+MAX_BATCH_SIZE = int(os.getenv('DIAGNOSE_BATCH_MAX_SIZE', '1024'))
+
+# Streamed (NDJSON) batches hold one chunk of results at a time, so they may be much larger
+MAX_STREAM_BATCH_SIZE = int(os.getenv('DIAGNOSE_STREAM_MAX_SIZE', '100000'))
+STREAM_CHUNK_SIZE = int(os.getenv('DIAGNOSE_STREAM_CHUNK_SIZE', '256'))
+
+# Shared secret for the /api/admin endpoints; unset disables them
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Response used when the diagnostic model could not be loaded
+FALLBACK_RESULT = {
+    "diagnosis": "Test Diagnosis (Model Unavailable)",
+    "confidence": 0.85,
+    "severity": "MEDIUM",
+    "recommendations": ["This is a test response", "The actual model is not available"]
+}
+
+# Django ORM for the Diagnosis and HealthRecord tables
+try:
+    from config.database import setup_database
+    setup_database()
+    database_available = True
+except Exception as e:
+    print(f"Warning: Could not set up the database: {e}")
+    database_available = False
+
+# Keep a Diagnosis record of every triage, written behind the request (DIAGNOSIS_RECORDING=False disables it)
+diagnosis_recorder = None
+if database_available and os.getenv('DIAGNOSIS_RECORDING', 'True') == 'True':
+    try:
+        from services.diagnosis_recorder import DiagnosisRecorder
+        diagnosis_recorder = DiagnosisRecorder()
+        # Writes what is still queued, or spills it, when the server exits
+        atexit.register(diagnosis_recorder.close)
+    except Exception as e:
+        print(f"Warning: Could not start diagnosis recorder: {e}")
 
 # Try to initialize user service
 try:
-    from services.user_service import init_user_service
+    from services.user_service import auth_stats, init_user_service
     init_user_service(app)
     user_service_available = True
     print("User service initialized successfully")
@@ -34,12 +86,56 @@ except Exception as e:
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    workers = diagnostic_service.workers if model_available else None
+    # Reports the pool only once loaded: a health probe never loads the model (with workers it lives there)
+    pool = diagnostic_service.model_version.loaded_pool if model_available else None
+    batcher = diagnostic_service.batcher if model_available else None
+    cache = diagnostic_service.result_cache if model_available else None
+    registry = diagnostic_service.registry if model_available else None
     return jsonify({
         "status": "ok", 
         "model_available": model_available,
-        "user_service_available": user_service_available
+        "user_service_available": user_service_available,
+        "interpreter_pool": pool.stats() if pool else None,
+        "inference_workers": workers.stats() if workers else None,
+        "micro_batching": batcher.stats() if batcher else None,
+        "result_cache": cache.stats() if cache else None,
+        "model": registry.stats() if registry else None,
+        "diagnosis_recorder": diagnosis_recorder.stats() if diagnosis_recorder else None,
+        "auth": auth_stats() if user_service_available else None
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    # Worker processes keep their own counters; add theirs to this process's
+    workers = diagnostic_service.workers if model_available else None
+    snapshots = workers.collect_metrics() if workers else []
+    return Response(REGISTRY.render(snapshots), content_type=CONTENT_TYPE)
+
+def admin_error():
+    """Error response unless the request carries the admin token"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled"}), 403
+    if not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({"error": "Invalid admin token"}), 403
+    return None
+
+@app.route('/api/admin/model/reload', methods=['POST'])
+def reload_model():
+    error = admin_error()
+    if error:
+        return error
+    if not model_available:
+        return jsonify({"error": "Diagnostic service is not available"}), 503
+    
+    force = bool((request.get_json(silent=True) or {}).get('force', False))
+    result = diagnostic_service.reload_model(force)
+    workers = diagnostic_service.workers
+    if workers is not None:
+        # Each worker process holds its own copy of the model
+        result["workers_notified"] = workers.reload_model(force)
+    return jsonify(result), 200 if result["status"] != "failed" else 422
+
 @app.route('/api/diagnose/test', methods=['POST'])
 def diagnose_test():
     try:
@@ -53,20 +149,174 @@ def diagnose_test():
         if model_available:
             # Use the diagnostic service if available
             result = diagnostic_service.process_symptoms(symptoms, language)
+            if diagnosis_recorder is not None:
+                diagnosis_recorder.record(symptoms, result, language)
             return jsonify(result)
         else:
             # Fallback response if model is not available
-            return jsonify({
-                "diagnosis": "Test Diagnosis (Model Unavailable)",
-                "confidence": 0.85,
-                "severity": "MEDIUM",
-                "recommendations": ["This is a test response", "The actual model is not available"]
-            })
+            return jsonify(FALLBACK_RESULT)
     
     except Exception as e:
         print(f"Error in diagnosis: {e}")
         return jsonify({"error": "Failed to process diagnosis"}), 500
 
+@app.route('/api/diagnose/batch', methods=['POST'])
+def diagnose_batch():
+    try:
+        data = request.get_json()
+        batch = data.get('batch', [])
+        language = data.get('language', 'en')
+        
+        if not batch:
+            return jsonify({"error": "No symptoms provided"}), 400
+        
+        # NDJSON streams results chunk by chunk, so far larger batches fit in memory
+        streaming = wants_ndjson()
+        max_size = MAX_STREAM_BATCH_SIZE if streaming else MAX_BATCH_SIZE
+        if len(batch) > max_size:
+            return jsonify({"error": f"Batch too large (maximum {max_size} items)"}), 413
+        
+        for i, symptoms in enumerate(batch):
+            if not isinstance(symptoms, list) or not symptoms:
+                return jsonify({"error": f"No symptoms provided for batch item {i}"}), 400
+        
+        if streaming:
+            return ndjson_response(diagnose_chunks(batch, language))
+        
+        if model_available:
+            # Diagnose the whole batch with a single model invoke
+            results = diagnostic_service.process_symptoms_batch(batch, language)
+            if diagnosis_recorder is not None:
+                for symptoms, result in zip(batch, results):
+                    diagnosis_recorder.record(symptoms, result, language)
+        else:
+            results = [FALLBACK_RESULT for _ in batch]
+        
+        return jsonify({"results": results, "count": len(results)})
+    
+    except Exception as e:
+        print(f"Error in batch diagnosis: {e}")
+        return jsonify({"error": "Failed to process diagnosis"}), 500
+
+def diagnose_chunks(batch, language):
+    """Diagnose a batch STREAM_CHUNK_SIZE items at a time, yielding each chunk's results"""
+    for start in range(0, len(batch), STREAM_CHUNK_SIZE):
+        chunk = batch[start:start + STREAM_CHUNK_SIZE]
+        if not model_available:
+            yield [FALLBACK_RESULT for _ in chunk]
+            continue
+        try:
+            results = diagnostic_service.process_symptoms_batch(chunk, language)
+        except Exception as e:
+            # Headers are already sent, so the failure goes into the stream itself
+            print(f"Error in streamed batch diagnosis: {e}")
+            yield [{"error": "Failed to process diagnosis"}]
+            return
+        if diagnosis_recorder is not None:
+            for symptoms, result in zip(chunk, results):
+                diagnosis_recorder.record(symptoms, result, language)
+        yield results
+
+def history_pages(fetch, first_page, **filters):
+    """Yield the rows of first_page and of every page after it"""
+    page = first_page
+    yield page["results"]
+    while page["next_cursor"]:
+        page = fetch(cursor=page["next_cursor"], limit=MAX_PAGE_SIZE, **filters)
+        yield page["results"]
+
+def history_page(fetch, **filters):
+    """Run a keyset-paginated history query with the paging parameters of the request"""
+    # Patient history is only for clinicians, who sign in with the admin token for now
+    error = admin_error()
+    if error:
+        return error
+    if not database_available:
+        return jsonify({"error": "Database is not available"}), 503
+    try:
+        streaming = wants_ndjson()
+        # A stream walks every page from the cursor on, at the largest page size
+        default_limit = MAX_PAGE_SIZE if streaming else DEFAULT_PAGE_SIZE
+        limit = int(request.args.get('limit', default_limit))
+        page = fetch(cursor=request.args.get('cursor'), limit=limit, **filters)
+    except ValueError as e:
+        # Bad limit or a cursor this service did not issue
+        return jsonify({"error": str(e)}), 400
+    if streaming:
+        return ndjson_response(history_pages(fetch, page, **filters))
+    return jsonify(page)
+
+@app.route('/api/history/diagnoses', methods=['GET'])
+def diagnosis_history_page():
+    user_id = request.args.get('user_id', type=int)
+    severity = request.args.get('severity')
+    if user_id is None and severity is None:
+        return jsonify({"error": "user_id or severity is required"}), 400
+    return history_page(diagnosis_history, user_id=user_id, severity=severity)
+
+@app.route('/api/history/health-records', methods=['GET'])
+def health_record_history_page():
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None:
+        return jsonify({"error": "user_id is required"}), 400
+    return history_page(health_record_history, user_id=user_id)
+
+if user_service_available and not JWT_SECRET_KEY:
+    print("Warning: JWT_SECRET_KEY is not set, patient login is disabled")
+
+# Signed-in patients: login, logout and diagnoses recorded against their account
+if user_service_available and JWT_SECRET_KEY:
+    from services.user_service import (
+        LoginBusy, authenticate_user, create_token, current_claims, current_user, revoke_token, token_required
+    )
+    
+    @app.route('/api/auth/login', methods=['POST'])
+    def login():
+        if not database_available:
+            return jsonify({"error": "Database is not available"}), 503
+        data = request.get_json(silent=True)
+        credentials = (data.get('username'), data.get('password')) if isinstance(data, dict) else (None, None)
+        # Refused before bcrypt, which raises on anything but a string
+        if not all(isinstance(value, str) and value for value in credentials):
+            return jsonify({"error": "username and password are required"}), 400
+        try:
+            user = authenticate_user(*credentials)
+        except LoginBusy:
+            # Shed logins rather than queue them behind bcrypt for seconds
+            return jsonify({"error": "Too many logins in progress, try again shortly"}), 503, {"Retry-After": "1"}
+        if user is None:
+            return jsonify({"error": "Invalid username or password"}), 401
+        return jsonify({"access_token": create_token(user["id"]), "user": user})
+    
+    @app.route('/api/auth/logout', methods=['POST'])
+    @token_required
+    def logout():
+        revoke_token(current_claims())
+        return jsonify({"status": "logged out"})
+    
+    @app.route('/api/patient/diagnose', methods=['POST'])
+    @token_required
+    def patient_diagnose():
+        try:
+            user = current_user()
+            data = request.get_json(silent=True) or {}
+            symptoms = data.get('symptoms', [])
+            language = data.get('language', user['preferred_language'])
+            
+            if not symptoms:
+                return jsonify({"error": "No symptoms provided"}), 400
+            if not model_available:
+                return jsonify({"error": "Diagnostic service is not available"}), 503
+            
+            result = diagnostic_service.process_symptoms(symptoms, language)
+            if diagnosis_recorder is not None:
+                diagnosis_recorder.record(symptoms, result, language, user['id'])
+            return jsonify(result)
+        
+        except Exception as e:
+            print(f"Error in patient diagnosis: {e}")
+            return jsonify({"error": "Failed to process diagnosis"}), 500
+
 if __name__ == '__main__':
     print("Starting Flask server on http://localhost:5000")
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
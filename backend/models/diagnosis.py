@@ -2,7 +2,8 @@ from .base import TimeStampedModel
 from django.db import models
 
 class Diagnosis(TimeStampedModel):
-    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='diagnoses')
+    # Walk-in kiosk triage has no account, and is recorded all the same
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='diagnoses', null=True, blank=True, db_index=False)
     symptoms = models.JSONField()
     diagnosis_result = models.JSONField()
     confidence_score = models.FloatField()
@@ -15,4 +16,13 @@ class Diagnosis(TimeStampedModel):
             ('MEDIUM', 'Medium Risk'),
             ('HIGH', 'High Risk')
         ]
-    )
\ No newline at end of file
+    )
+    
+    class Meta:
+        # History pages walk (created_at, id) backwards within one patient or one severity;
+        # SQLite appends the rowid to every index, so these also cover the id tie-break.
+        # The user index leads with user, so the foreign key needs no index of its own
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='diagnosis_user_created_idx'),
+            models.Index(fields=['severity_level', 'created_at'], name='diagnosis_severity_created_idx'),
+        ]
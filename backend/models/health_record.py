@@ -2,8 +2,16 @@ from .base import TimeStampedModel
 from django.db import models
 
 class HealthRecord(TimeStampedModel):
-    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='health_records')
+    # Looked up through the (user, created_at) index below
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='health_records', db_index=False)
     record_type = models.CharField(max_length=50)
     data = models.JSONField()
     source = models.CharField(max_length=100)
-    is_synced_with_abha = models.BooleanField(default=False)
\ No newline at end of file
+    is_synced_with_abha = models.BooleanField(default=False)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='healthrecord_user_created_idx'),
+            # Only the records still waiting for ABHA sync, so it stays small as the table grows
+            models.Index(fields=['id'], condition=models.Q(is_synced_with_abha=False), name='healthrecord_unsynced_idx'),
+        ]
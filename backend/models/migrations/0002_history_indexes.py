@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diagnosis',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='diagnoses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='healthrecord',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='health_records', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='diagnosis',
+            index=models.Index(fields=['user', 'created_at'], name='diagnosis_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diagnosis',
+            index=models.Index(fields=['severity_level', 'created_at'], name='diagnosis_severity_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(fields=['user', 'created_at'], name='healthrecord_user_created_idx'),
+        ),
+    ]
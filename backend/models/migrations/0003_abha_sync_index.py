@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0002_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='healthrecord',
+            index=models.Index(condition=models.Q(('is_synced_with_abha', False)), fields=['id'], name='healthrecord_unsynced_idx'),
+        ),
+    ]
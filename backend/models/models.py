@@ -0,0 +1,5 @@
+# Django loads an app's models from its ``models`` module; this app keeps one file per model
+from .user import User
+from .diagnosis import Diagnosis
+from .health_record import HealthRecord
+from .revoked_token import RevokedToken
@@ -0,0 +1,7 @@
+from django.db import models
+
+class RevokedToken(models.Model):
+    # Logged-out tokens, shared by every worker until they would have expired anyway
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""Diagnose a large file of symptom records offline, streaming in fixed-size chunks.
+
+Input is JSONL (one ``{"id": ..., "symptoms": [...]}`` object or bare list per
+line) or CSV (a symptoms column separated by ``--separator``), read lazily.
+Rows are diagnosed ``--chunk-size`` at a time with one batched invoke each;
+``--workers N`` fans the chunks out over N inference processes. Results are
+written as JSONL in input order, one line per record tagged with its input
+``offset``, and flushed after every chunk, so memory stays flat whatever the
+input size. After an interruption ``--resume`` drops any half-written line and
+carries on from the record after the last one in the output.
+
+Usage:
+    python scripts/bulk_diagnose.py records.jsonl --output results.jsonl --workers 4
+    python scripts/bulk_diagnose.py records.csv --output results.jsonl --resume
+"""
+import argparse
+import collections
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_CHUNK_SIZE = 1024
+
+# Bytes read per step when scanning the output backwards for its last record
+TAIL_BLOCK = 64 * 1024
+
+def _split(value, separator):
+    return [s.strip() for s in value.split(separator) if s.strip()] if value else []
+
+def _parse_json_record(line, symptoms_field, id_field, separator):
+    record = json.loads(line)
+    if isinstance(record, list):
+        return None, record
+    if not isinstance(record, dict):
+        raise ValueError("record is neither an object nor a list")
+    symptoms = record.get(symptoms_field)
+    if isinstance(symptoms, str):
+        symptoms = _split(symptoms, separator)
+    if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+        raise ValueError(f"'{symptoms_field}' must be a list of strings")
+    return record.get(id_field), symptoms
+
+def read_records(stream, fmt, symptoms_field='symptoms', id_field='id', separator=';', skip=0):
+    """Yield ``(offset, id, symptoms, error)`` for each record, lazily.
+    
+    The first ``skip`` records are passed over; JSONL lines are not even
+    parsed. A malformed record yields an error message instead of symptoms.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        if symptoms_field not in (reader.fieldnames or []):
+            raise ValueError(f"CSV input has no '{symptoms_field}' column")
+        for offset, row in enumerate(reader):
+            if offset >= skip:
+                yield offset, row.get(id_field), _split(row[symptoms_field], separator), None
+        return
+    
+    offset = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        if offset >= skip:
+            try:
+                record_id, symptoms = _parse_json_record(line, symptoms_field, id_field, separator)
+                yield offset, record_id, symptoms, None
+            except ValueError as e:
+                yield offset, None, None, f"{type(e).__name__}: {e}"
+        offset += 1
+
+def chunked(records, size):
+    """Lists of up to ``size`` records, without reading ahead further than that"""
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def diagnose_chunk(service, chunk, language):
+    """Output records for one chunk; malformed rows keep their place with an error"""
+    valid = [symptoms for _, _, symptoms, error in chunk if error is None]
+    results = iter(service.process_symptoms_batch(valid, language) if valid else [])
+    output = []
+    for offset, record_id, _, error in chunk:
+        record = {"offset": offset}
+        if record_id is not None:
+            record["id"] = record_id
+        if error is None:
+            record.update(next(results))
+        else:
+            record["error"] = error
+        output.append(record)
+    return output
+
+def diagnose_stream(service, chunks, language, workers=0):
+    """Yield the output records of each chunk in input order.
+    
+    With workers, up to two chunks per worker are in flight at once; the
+    window is what keeps memory bounded when inference is the bottleneck.
+    """
+    if not workers:
+        for chunk in chunks:
+            yield diagnose_chunk(service, chunk, language)
+        return
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(diagnose_chunk, service, chunk, language))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def resume_offset(path):
+    """Input offset to restart from, after dropping a half-written last line from ``path``"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        tail = b''
+        position = end
+        # Read backwards until the buffer holds the last complete line and whatever follows it
+        while position > 0 and tail.count(b'\n') < 2:
+            step = min(TAIL_BLOCK, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+        
+        complete = tail.rfind(b'\n') + 1
+        if position + complete < end:
+            # Interrupted mid-write: the partial record is redone
+            f.truncate(position + complete)
+        lines = tail[:complete].splitlines()
+        if not lines:
+            return 0
+        return json.loads(lines[-1])["offset"] + 1
+
+def _open_input(path, fmt):
+    if path == '-':
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8', newline='' if fmt == 'csv' else None)
+
+def run(args):
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    skip = args.start_offset
+    if args.resume:
+        if args.output == '-':
+            raise SystemExit("--resume needs an --output file")
+        skip = max(skip, resume_offset(args.output))
+        if skip:
+            print(f"Resuming at record {skip}", file=sys.stderr)
+    
+    from services.diagnostic_service import DiagnosticService
+    # No result cache: records rarely repeat, so lookups would only cost time.
+    # With workers the model is only loaded in the worker processes
+    service = DiagnosticService(cache_size=0, lazy=bool(args.workers))
+    if args.workers:
+        service.start_workers(args.workers)
+    
+    rows = errors = 0
+    started = time.perf_counter()
+    source = _open_input(args.input, fmt)
+    sink = sys.stdout if args.output == '-' else open(args.output, 'a' if args.resume else 'w', encoding='utf-8')
+    try:
+        records = read_records(source, fmt, args.symptoms_field, args.id_field, args.separator, skip)
+        for output in diagnose_stream(service, chunked(records, args.chunk_size), args.language, args.workers):
+            sink.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in output))
+            sink.flush()
+            rows += len(output)
+            errors += sum(1 for record in output if "error" in record)
+            if args.progress:
+                elapsed = time.perf_counter() - started
+                print(f"{skip + rows} records ({rows / elapsed:.0f}/s)", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+        if args.workers:
+            service.stop_workers()
+    
+    elapsed = time.perf_counter() - started
+    print(f"Diagnosed {rows} records ({errors} malformed) in {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed else 0:.0f}/s)", file=sys.stderr)
+    return {"rows": rows, "errors": errors, "skipped": skip, "seconds": elapsed}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help="JSONL or CSV file, or - for stdin")
+    parser.add_argument('--output', default='-', help='JSONL results file (default stdout)')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help='input format (default from the file extension)')
+    parser.add_argument('--symptoms-field', default='symptoms', help='JSON field or CSV column holding the symptoms')
+    parser.add_argument('--id-field', default='id', help='JSON field or CSV column copied to the output as "id"')
+    parser.add_argument('--separator', default=';', help='separator of symptoms given as one string')
+    parser.add_argument('--language', default='en', help='language of the results')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='records per batched invoke')
+    parser.add_argument('--workers', type=int, default=0, help='inference processes (0 runs inference in-process)')
+    parser.add_argument('--start-offset', type=int, default=0, help='skip this many input records')
+    parser.add_argument('--resume', action='store_true', help='append to --output, continuing after its last record')
+    parser.add_argument('--progress', action='store_true', help='report progress after every chunk')
+    return parser.parse_args(argv)
+
+def main():
+    run(parse_args())
+
+if __name__ == "__main__":
+    main()
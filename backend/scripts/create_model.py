@@ -1,15 +1,34 @@
+"""Build the placeholder diagnostic model, its TFLite export and the mappings.
+
+``--quantize`` picks the TFLite export:
+    none      float32 weights and activations (default)
+    dynamic   int8 weights, float activations quantized on the fly
+    int8      full integer: int8 weights, activations, input and output,
+              calibrated on symptom vectors drawn from the symptom mapping
+    float16   float16 weights, expanded to float32 at load
+
+Usage: python scripts/create_model.py --quantize int8 --output ai/models/diagnostic_model.tflite
+"""
+import argparse
 import numpy as np
-import tensorflow as tf
 import json
 import os
+import random
 import sys
 
 # Define paths directly instead of using Django settings
 MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', 'models')
 MODEL_PATH = os.path.join(MODEL_DIR, 'diagnostic_model.tflite')
 
+QUANTIZE_MODES = ('none', 'dynamic', 'int8', 'float16')
+
+# Calibration samples for full-integer quantization
+REPRESENTATIVE_SAMPLES = 500
+
 def create_placeholder_model():
     """Create a simple model for symptom-based diagnostics"""
+    import tensorflow as tf
+    
     # Input: Symptom features (50 possible symptoms as one-hot encoded)
     inputs = tf.keras.Input(shape=(50,), name="symptoms")
     
@@ -62,7 +81,44 @@ def create_mappings():
     
     return symptom_mapping, conditions
 
+def representative_dataset(symptom_mapping, samples=REPRESENTATIVE_SAMPLES, seed=42):
+    """Multi-hot symptom vectors like the kiosk sends, for int8 calibration"""
+    rng = random.Random(seed)
+    names = list(symptom_mapping)
+    
+    def generate():
+        for _ in range(samples):
+            vector = np.zeros((1, len(names)), dtype=np.float32)
+            for symptom in rng.sample(names, rng.randint(1, 6)):
+                vector[0, symptom_mapping[symptom]] = 1.0
+            yield [vector]
+    return generate
+
+def convert_model(model, quantize='none', symptom_mapping=None):
+    """Convert a Keras model to TFLite bytes with the given quantization mode"""
+    import tensorflow as tf
+    
+    if quantize not in QUANTIZE_MODES:
+        raise ValueError(f"Unknown quantization '{quantize}' (choose from {', '.join(QUANTIZE_MODES)})")
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'int8':
+        # Without calibration data the converter would fall back to dynamic range
+        converter.representative_dataset = representative_dataset(symptom_mapping or create_mappings()[0])
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif quantize == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quantize', choices=QUANTIZE_MODES, default='none', help='TFLite quantization mode')
+    parser.add_argument('--output', default=MODEL_PATH, help='where to write the TFLite model')
+    args = parser.parse_args()
+    
     # Create model directory if it doesn't exist
     os.makedirs(MODEL_DIR, exist_ok=True)
     
@@ -70,20 +126,19 @@ def main():
     print("Creating model...")
     model = create_placeholder_model()
     model.summary()
+    symptom_mapping, conditions = create_mappings()
     
     # Convert to TFLite
-    print("Converting to TFLite...")
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    tflite_model = converter.convert()
+    print(f"Converting to TFLite (quantization: {args.quantize})...")
+    tflite_model = convert_model(model, args.quantize, symptom_mapping)
     
     # Save the TFLite model
-    with open(MODEL_PATH, 'wb') as f:
+    with open(args.output, 'wb') as f:
         f.write(tflite_model)
-    print(f"TFLite model saved to {MODEL_PATH}")
+    print(f"TFLite model saved to {args.output}")
     
     # Create and save mappings
     print("Creating mappings...")
-    symptom_mapping, conditions = create_mappings()
     
     symptom_path = os.path.join(MODEL_DIR, 'symptom_mapping.json')
     condition_path = os.path.join(MODEL_DIR, 'condition_mapping.json')
@@ -96,6 +151,13 @@ def main():
         json.dump(conditions, f, indent=2)
     print(f"Condition mapping saved to {condition_path}")
     
+    # Binary copy of the mappings that workers load without parsing JSON
+    sys.path.append(os.path.dirname(MODEL_DIR))
+    from ai.mapping_store import COMPILED_NAME, compile_mappings
+    compile_mappings(symptom_path, condition_path, os.path.join(MODEL_DIR, 'symptom_synonyms.json'),
+                     os.path.join(MODEL_DIR, COMPILED_NAME))
+    print(f"Compiled mappings saved to {os.path.join(MODEL_DIR, COMPILED_NAME)}")
+    
     print("Model setup complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+"""Fill the translation cache with the kiosk vocabulary for the given languages.
+
+Translates every symptom, condition and recommendation string once per
+target language, so later requests are answered from the cache.
+
+Usage: python scripts/prewarm_translations.py --targets hi ta te --source en
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the backend directory to the path so we can import the utilities
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bhashini import get_client
+
+async def prewarm(targets, source):
+    client = get_client()
+    try:
+        fetched = await client.prewarm(targets, source)
+    finally:
+        await client.close()
+    print(f"Fetched {fetched} translations from upstream")
+    print(f"Stats: {client.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', required=True, help='target language codes')
+    parser.add_argument('--source', default='en', help='source language code')
+    args = parser.parse_args()
+    asyncio.run(prewarm(args.targets, args.source))
+
+if __name__ == "__main__":
+    main()
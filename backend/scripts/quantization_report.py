@@ -0,0 +1,115 @@
+"""Compare quantized TFLite exports of the diagnostic model against float32.
+
+Builds the placeholder model once, exports it with every ``--quantize``
+mode of create_model.py and reports, per export: file size, interpreter
+load time, per-invoke latency at each batch size, and how often its top-1
+condition agrees with the float model on a synthetic intake workload.
+
+Usage: python scripts/quantization_report.py --batch-sizes 1 64 --rows 2000 --output report.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the backend directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.backends import resolve_backend
+from ai.interpreter_pool import PooledInterpreter
+from ai.symptom_encoder import SymptomEncoder
+from benchmarks.workloads import synthetic_symptom_lists
+from scripts.create_model import QUANTIZE_MODES, convert_model, create_mappings, create_placeholder_model
+
+def export_models(directory, seed):
+    """Write one export per quantization mode from the same weights; returns mode -> path"""
+    import tensorflow as tf
+    
+    tf.keras.utils.set_random_seed(seed)
+    model = create_placeholder_model()
+    symptom_mapping, _ = create_mappings()
+    paths = {}
+    for mode in QUANTIZE_MODES:
+        paths[mode] = os.path.join(directory, f'diagnostic_model_{mode}.tflite')
+        with open(paths[mode], 'wb') as f:
+            f.write(convert_model(model, mode, symptom_mapping))
+    return paths
+
+def median_seconds(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def measure(path, interpreter_class, inputs, batch_sizes, repeat):
+    load = median_seconds(lambda: PooledInterpreter(interpreter_class(model_path=path)), repeat)
+    pooled = PooledInterpreter(interpreter_class(model_path=path))
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = inputs[:batch_size]
+        pooled.run(batch)  # resize outside the measurement
+        latency[batch_size] = median_seconds(lambda: pooled.run(batch), repeat * 10)
+    return {
+        "size_bytes": os.path.getsize(path),
+        "load_seconds": load,
+        "invoke_seconds": latency,
+        "probabilities": pooled.run(inputs),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', default='auto', help='interpreter backend to measure on')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64], help='rows per invoke')
+    parser.add_argument('--rows', type=int, default=2000, help='synthetic symptom lists for the agreement check')
+    parser.add_argument('--repeat', type=int, default=50, help='samples per timing')
+    parser.add_argument('--seed', type=int, default=42, help='weight and workload random seed')
+    parser.add_argument('--keep', help='write the exports to this directory instead of a temporary one')
+    parser.add_argument('--output', help='write the report to this JSON file')
+    args = parser.parse_args()
+    
+    backend, interpreter_class = resolve_backend(args.backend)
+    symptom_mapping, _ = create_mappings()
+    inputs = SymptomEncoder(symptom_mapping).encode_batch(synthetic_symptom_lists(args.rows, seed=args.seed)).copy()
+    batch_sizes = [size for size in args.batch_sizes if size <= len(inputs)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep or tmp
+        os.makedirs(directory, exist_ok=True)
+        paths = export_models(directory, args.seed)
+        results = {}
+        for mode in QUANTIZE_MODES:
+            try:
+                results[mode] = measure(paths[mode], interpreter_class, inputs, batch_sizes, args.repeat)
+            except ValueError as e:
+                # The NumPy engine cannot run full-integer models
+                print(f"Skipping {mode}: {e}")
+    
+    reference = results['none']['probabilities']
+    top1 = reference.argmax(axis=1)
+    header = f"{'mode':<10}{'size KiB':>10}{'load ms':>10}" + ''.join(f"{f'b={size} us':>12}" for size in batch_sizes)
+    print(f"Backend {backend}, {len(inputs)} rows")
+    print(header + f"{'top-1 agree':>13}{'max |dp|':>10}")
+    report = {"backend": backend, "rows": len(inputs), "seed": args.seed, "models": {}}
+    for mode, result in results.items():
+        probabilities = result.pop('probabilities')
+        result["top1_agreement"] = float((probabilities.argmax(axis=1) == top1).mean())
+        result["max_probability_error"] = float(np.abs(probabilities - reference).max())
+        report["models"][mode] = result
+        print(f"{mode:<10}{result['size_bytes'] / 1024:>10.1f}{result['load_seconds'] * 1e3:>10.2f}"
+              + ''.join(f"{result['invoke_seconds'][size] * 1e6:>12.1f}" for size in batch_sizes)
+              + f"{result['top1_agreement']:>13.2%}{result['max_probability_error']:>10.4f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Push unsynced health records to ABDM, resuming from the last checkpoint.
+
+Meant to run from cron: each run syncs up to --max-records records (all of
+them by default) and exits. ABDM_API_URL and ABDM_API_KEY come from the
+environment.
+
+Usage: python scripts/sync_abha.py --max-records 10000 --batch-size 100 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the backend directory to the path so we can import the utilities
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.abdm import MAX_CONCURRENCY, SYNC_BATCH, AbhaSyncEngine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-records', type=int, help='stop after this many records')
+    parser.add_argument('--batch-size', type=int, default=SYNC_BATCH, help='records per ABDM call')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY, help='batches in flight at once')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and start a new pass')
+    args = parser.parse_args()
+
+    engine = AbhaSyncEngine(batch_size=args.batch_size, max_concurrency=args.concurrency)
+    if not engine.api_url:
+        raise SystemExit("ABDM_API_URL is not set")
+    if args.restart:
+        engine.save_checkpoint(0)
+    stats = asyncio.run(engine.run(args.max_records))
+    print(f"Stats: {stats}")
+
+if __name__ == "__main__":
+    main()
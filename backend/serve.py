@@ -0,0 +1,54 @@
+"""Production entry point: Flask web tier plus a pool of inference worker processes.
+
+``python main.py`` runs the development server with inference in-process.
+This script instead starts INFERENCE_WORKERS processes (default: one per
+core), each with its own interpreter, and serves the same app on a
+threaded server. SIGTERM or Ctrl-C drains in-flight requests and stops the
+workers before exiting.
+
+Usage: python serve.py --workers 4 --port 5000
+"""
+import argparse
+import os
+import signal
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=int(os.getenv('INFERENCE_WORKERS', str(os.cpu_count() or 1))),
+                        help='inference worker processes')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '5000')))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '16')),
+                        help='web request threads (waitress only)')
+    args = parser.parse_args()
+    
+    from main import app, diagnostic_service, model_available
+    
+    if model_available and args.workers > 0:
+        # With DIAGNOSE_MICROBATCH=True, coalesced batches make one IPC hop instead of many
+        diagnostic_service.start_workers(args.workers)
+    
+    def shutdown(signum, frame):
+        print("Shutting down: draining inference workers...")
+        if model_available:
+            diagnostic_service.disable_micro_batching()
+            diagnostic_service.stop_workers()
+        sys.exit(0)
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    
+    try:
+        from waitress import serve
+        print(f"Serving on http://{args.host}:{args.port} with waitress ({args.threads} threads)")
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    except ImportError:
+        print(f"waitress not installed; serving on http://{args.host}:{args.port} with the threaded Werkzeug server")
+        app.run(host=args.host, port=args.port, debug=False, threaded=True, use_reloader=False)
+
+if __name__ == '__main__':
+    main()
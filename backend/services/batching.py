@@ -0,0 +1,148 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.metrics import Histogram
+
+# Coalescing defaults, overridable per deployment
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv('DIAGNOSE_MAX_BATCH', '32'))
+DEFAULT_MAX_DELAY_MS = float(os.getenv('DIAGNOSE_MAX_DELAY_MS', '2.0'))
+
+# Queue-delay buckets in seconds
+QUEUE_DELAY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+# Sentinel telling a worker thread to exit
+_STOP = object()
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into batched calls.
+    
+    Each worker thread takes the first waiting request, then keeps collecting
+    until it has ``max_batch_size`` items or ``max_delay_ms`` has passed since
+    that first request arrived. ``process_batch`` receives the items in arrival
+    order and must return one result per item.
+    """
+    
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch_size: Optional[int] = None, max_delay_ms: Optional[float] = None,
+                 workers: int = 1):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size or DEFAULT_MAX_BATCH_SIZE)
+        self.max_delay = (DEFAULT_MAX_DELAY_MS if max_delay_ms is None else max_delay_ms) / 1000.0
+        
+        self.batch_sizes = Histogram(self._batch_size_buckets())
+        self.queue_delay = Histogram(QUEUE_DELAY_BUCKETS)
+        self.batches = 0
+        self.items = 0
+        self._stats_lock = threading.Lock()
+        
+        self._queue = queue.Queue()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def _batch_size_buckets(self):
+        """Powers of two up to and including the maximum batch size"""
+        buckets = []
+        size = 1
+        while size < self.max_batch_size:
+            buckets.append(size)
+            size *= 2
+        buckets.append(self.max_batch_size)
+        return buckets
+    
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the returned future resolves to its own result"""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+    
+    def process(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Submit one item and block until its result is ready"""
+        return self.submit(item).result(timeout)
+    
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            
+            batch = [first]
+            deadline = first[2] + self.max_delay
+            stop = False
+            
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    # Past the deadline, only take what is already waiting
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            
+            self._dispatch(batch)
+            if stop:
+                return
+    
+    def _dispatch(self, batch):
+        # Drop items whose caller already gave up (e.g. a cancelled asyncio request)
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_delay.observe(started - enqueued)
+        self.batch_sizes.observe(len(batch))
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+        
+        try:
+            results = self.process_batch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"process_batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+    
+    def close(self, timeout: Optional[float] = 5.0):
+        """Stop accepting work and let the workers finish what is queued"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Batch-size and queue-delay histograms for monitoring"""
+        with self._stats_lock:
+            batches = self.batches
+            items = self.items
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_delay_ms": self.max_delay * 1000.0,
+            "batches": batches,
+            "items": items,
+            "pending": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_delay_seconds": self.queue_delay.snapshot()
+        }
@@ -0,0 +1,351 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: replays are still claimed atomically, but a replay cut short is resumed only on POSIX
+    fcntl = None
+
+from utils.metrics import Histogram, REGISTRY
+
+# Write-behind defaults, overridable per deployment
+DEFAULT_QUEUE_SIZE = int(os.getenv('DIAGNOSIS_RECORDER_QUEUE', '10000'))
+DEFAULT_BATCH_SIZE = int(os.getenv('DIAGNOSIS_RECORDER_BATCH', '500'))
+DEFAULT_FLUSH_INTERVAL_MS = float(os.getenv('DIAGNOSIS_RECORDER_FLUSH_MS', '200'))
+DEFAULT_ENQUEUE_TIMEOUT_MS = float(os.getenv('DIAGNOSIS_RECORDER_BLOCK_MS', '50'))
+DEFAULT_SPILL_PATH = os.getenv('DIAGNOSIS_SPILL_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'diagnosis_spill.jsonl'))
+
+# Flush-time buckets in seconds
+FLUSH_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+RECORDS = REGISTRY.counter(
+    'diagnosis_records_total', 'Diagnosis records handled by the write-behind recorder, by outcome', ('outcome',))
+FLUSH_SECONDS = REGISTRY.histogram(
+    'diagnosis_record_flush_seconds', 'Time to write one batch of diagnosis records', FLUSH_BUCKETS)
+
+# Row keys that are Diagnosis fields; the rest is bookkeeping
+ROW_FIELDS = ('user_id', 'symptoms', 'diagnosis_result', 'confidence_score', 'language', 'severity_level')
+
+# Sentinel telling the writer thread to exit
+_STOP = object()
+
+def _bulk_create(rows: List[Dict[str, Any]]):
+    """Insert rows as Diagnosis records in one transaction"""
+    from django.db import transaction
+    from models.diagnosis import Diagnosis
+    
+    objects = [Diagnosis(**{field: row[field] for field in ROW_FIELDS}) for row in rows]
+    with transaction.atomic():
+        Diagnosis.objects.bulk_create(objects)
+        # auto_now_add stamps the insert time; rows replayed from the spill file keep their triage time
+        late = [(obj, row['recorded_at']) for obj, row in zip(objects, rows) if row.get('replayed')]
+        for obj, recorded_at in late:
+            obj.created_at = datetime.fromtimestamp(recorded_at, timezone.utc)
+        if late:
+            Diagnosis.objects.bulk_update([obj for obj, _ in late], ['created_at'])
+
+class DiagnosisRecorder:
+    """Persist Diagnosis records off the request path.
+    
+    Handlers call ``record`` and return; a writer thread collects rows until
+    it has ``batch_size`` of them or ``flush_interval_ms`` has passed since
+    the first, then writes them with one ``bulk_create`` transaction. When
+    the queue is full, ``record`` blocks for up to ``enqueue_timeout_ms``
+    and then appends the row to the spill file instead of dropping it;
+    batches that fail to write, and rows still queued at shutdown, go there
+    too. Spilled rows are replayed when the next recorder starts.
+    
+    Every process (gunicorn workers, main.py, asgi.py) may share one spill
+    file. A replay first renames it to a name of its own, which only one
+    process can do, and on POSIX holds a lock file while replaying, so each
+    spilled row is written once.
+    """
+    
+    def __init__(self, max_queue: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None, enqueue_timeout_ms: Optional[float] = None,
+                 spill_path: Optional[str] = None,
+                 write_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+        self.flush_interval = (DEFAULT_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms) / 1000.0
+        self.enqueue_timeout = (DEFAULT_ENQUEUE_TIMEOUT_MS if enqueue_timeout_ms is None else enqueue_timeout_ms) / 1000.0
+        self.spill_path = spill_path or DEFAULT_SPILL_PATH
+        self.write_batch = write_batch or _bulk_create
+        
+        self.flush_time = Histogram(FLUSH_BUCKETS)
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failures = 0
+        self._stats_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        # Queued rows that have since been written or spilled; ``flush`` waits on it
+        self._handled = 0
+        self._handled_changed = threading.Condition(self._stats_lock)
+        
+        self._queue = queue.Queue(max(1, max_queue or DEFAULT_QUEUE_SIZE))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="diagnosis-recorder", daemon=True)
+        self._thread.start()
+    
+    @staticmethod
+    def _row(symptoms, result, language, user_id):
+        return {
+            "user_id": user_id,
+            "symptoms": list(symptoms),
+            "diagnosis_result": result,
+            "confidence_score": float(result.get("confidence", 0.0)),
+            "language": language,
+            "severity_level": result.get("severity", "LOW"),
+            "recorded_at": time.time(),
+        }
+    
+    def _put(self, row, timeout):
+        if self._closed:
+            return False
+        try:
+            if timeout:
+                self._queue.put(row, timeout=timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            return False
+        with self._stats_lock:
+            self.queued += 1
+        return True
+    
+    def record(self, symptoms: List[str], result: Dict[str, Any], language: str = "en",
+               user_id: Optional[int] = None) -> bool:
+        """Queue one triage for writing; False if it went to the spill file instead"""
+        row = self._row(symptoms, result, language, user_id)
+        # Blocking briefly slows callers down to the writer's pace before anything spills
+        if self._put(row, self.enqueue_timeout):
+            return True
+        self._spill([row])
+        return False
+    
+    def offer(self, symptoms: List[str], result: Dict[str, Any], language: str = "en",
+              user_id: Optional[int] = None) -> bool:
+        """Queue one triage only if that needs no waiting; on False, call ``record`` off the event loop"""
+        return self._put(self._row(symptoms, result, language, user_id), 0)
+    
+    def _run(self):
+        try:
+            try:
+                self._replay()
+            except Exception as e:
+                # What is left on disk is replayed by a later start; the writer must still run
+                print(f"Error replaying spilled diagnosis records: {e}")
+            self._drain()
+        finally:
+            if self.write_batch is _bulk_create:
+                # Django opened a connection for this thread; nothing else will close it
+                from django.db import connection
+                connection.close()
+    
+    def _drain(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            
+            batch = [first]
+            deadline = time.perf_counter() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+            
+            self._write(batch)
+            if stop:
+                return
+    
+    def _write(self, rows: List[Dict[str, Any]], outcome: str = 'written'):
+        started = time.perf_counter()
+        try:
+            self.write_batch(rows)
+        except Exception as e:
+            print(f"Error writing {len(rows)} diagnosis records: {e}")
+            with self._stats_lock:
+                self.failures += 1
+            self._spill(rows)
+            if outcome != 'replayed':
+                self._mark_handled(len(rows))
+            return
+        
+        elapsed = time.perf_counter() - started
+        self.flush_time.observe(elapsed)
+        FLUSH_SECONDS.observe(elapsed)
+        RECORDS.inc(len(rows), outcome)
+        with self._stats_lock:
+            self.batches += 1
+            if outcome == 'replayed':
+                self.replayed += len(rows)
+            else:
+                self.written += len(rows)
+        if outcome != 'replayed':
+            self._mark_handled(len(rows))
+    
+    def _mark_handled(self, count: int):
+        with self._handled_changed:
+            self._handled += count
+            self._handled_changed.notify_all()
+    
+    def _spill(self, rows: List[Dict[str, Any]]):
+        """Append rows to the spill file and fsync it, so they survive a crash"""
+        lines = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+            with self._open_spill() as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        RECORDS.inc(len(rows), 'spilled')
+        with self._stats_lock:
+            self.spilled += len(rows)
+    
+    def _open_spill(self):
+        """The spill file opened for appending, locked so a replay cannot claim it mid-append"""
+        while True:
+            f = open(self.spill_path, 'a', encoding='utf-8')
+            if fcntl is None:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.spill_path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            # Claimed for replay between the open and the lock: append to a fresh file instead
+            f.close()
+    
+    @contextmanager
+    def _replay_lock(self):
+        """Held while replaying; yields False when another process is replaying this spill file"""
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+        with open(self.spill_path + '.lock', 'a') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            # Closing the file releases the lock, as does the process dying
+            yield True
+    
+    def _replay(self):
+        """Write rows spilled by an earlier run or another process; rows that fail again are spilled again"""
+        with self._replay_lock() as owner:
+            if not owner:
+                # Whatever the other process does not get to is replayed by a later start
+                return
+            # Under the lock, claims left on disk are from replays that died part way
+            paths = sorted(glob.glob(glob.escape(self.spill_path) + '.replay*')) if fcntl else []
+            claim = f"{self.spill_path}.replay-{os.getpid()}-{time.time_ns()}"
+            with self._spill_lock:
+                try:
+                    # Atomic: of the processes starting together, one gets the file
+                    os.replace(self.spill_path, claim)
+                    paths.append(claim)
+                except FileNotFoundError:
+                    pass
+            for path in paths:
+                self._replay_file(path)
+    
+    def _replay_file(self, path: str):
+        batch = []
+        with open(path, 'r', encoding='utf-8') as f:
+            if fcntl is not None:
+                # Waits out appends that opened the file before it was claimed
+                fcntl.flock(f, fcntl.LOCK_EX)
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # A line torn by a crash mid-append holds no complete record
+                    continue
+                row["replayed"] = True
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._write(batch, 'replayed')
+                    batch = []
+        if batch:
+            self._write(batch, 'replayed')
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been written or spilled"""
+        with self._handled_changed:
+            target = self.queued
+            return self._handled_changed.wait_for(lambda: self._handled >= target, timeout)
+    
+    def close(self, timeout: Optional[float] = 10.0):
+        """Stop accepting rows, write what is queued, and spill whatever is left"""
+        if self._closed:
+            return
+        self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            # A full queue means the writer is stuck; waiting on it without a bound would hang shutdown
+            self._queue.put(_STOP, timeout=timeout)
+            stopping = True
+        except queue.Full:
+            stopping = False
+        if stopping:
+            self._thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        
+        # The writer did not finish in time (e.g. the database is locked): keep the rest on disk
+        leftover = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                leftover.append(row)
+        if leftover:
+            self._spill(leftover)
+        if not stopping:
+            # The queue has room now; a writer that comes unstuck exits instead of waiting for rows
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, outcomes and flush-time histogram for monitoring"""
+        with self._stats_lock:
+            stats = {
+                "queued": self.queued,
+                "written": self.written,
+                "batches": self.batches,
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "failures": self.failures,
+            }
+        stats["pending"] = self._queue.qsize()
+        stats["capacity"] = self._queue.maxsize
+        stats["flush_seconds"] = self.flush_time.snapshot()
+        return stats
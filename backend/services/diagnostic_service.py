@@ -1,176 +1,427 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
 import os
-import json
+import time
 import numpy as np
-import tensorflow as tf
+
+from ai.interpreter_pool import PoolTimeoutError
+from ai.model_registry import MODEL_WATCH_INTERVAL, ModelRegistry, ModelVersion
+from ai.postprocess import DEFAULT_RECOMMENDATIONS, HIGH_RISK_SYMPTOMS, RECOMMENDATIONS, condition_severity
+from ai.result_cache import ResultCache, canonical_symptom_key, copy_result
+from services.batching import MicroBatcher
+from services.worker_pool import InferenceWorkerPool, WorkerPoolError
+from utils.metrics import REGISTRY
+
+# Longest a coalesced request waits for its batch to come back (seconds)
+BATCH_RESULT_TIMEOUT = 30.0
+
+# Ranked diagnoses per result; above 1 the runners-up are listed under "alternatives"
+DEFAULT_TOP_K = int(os.getenv('DIAGNOSIS_TOP_K', '1'))
+
+SEVERITY_LABELS = ("LOW", "MEDIUM", "HIGH")
+
+# Latency buckets in seconds: stages are per batch, requests end to end
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+REQUEST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Inference metrics, served by /api/metrics
+STAGE_SECONDS = REGISTRY.histogram(
+    'diagnosis_stage_seconds', 'Time spent in each inference stage, per batch', STAGE_BUCKETS, ('stage',))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'diagnosis_request_seconds', 'Diagnosis latency by entry point', REQUEST_BUCKETS, ('method',))
+DIAGNOSES = REGISTRY.counter(
+    'diagnosis_results_total', 'Diagnoses returned, by how they were produced', ('outcome',))
+FALLBACKS = REGISTRY.counter(
+    'diagnosis_fallbacks_total', 'Diagnoses answered by the rules instead of the model, by reason', ('reason',))
+
+# Children bound up front so the hot path skips the label lookup
+_STAGES = {stage: STAGE_SECONDS.labels(stage)
+           for stage in ('preprocess', 'set_tensor', 'invoke', 'postprocess', 'severity')}
+_REQUESTS = {method: REQUEST_SECONDS.labels(method) for method in ('single', 'async', 'batch')}
+_OUTCOMES = {outcome: DIAGNOSES.labels(outcome) for outcome in ('model', 'cache', 'fallback', 'error')}
+
+def _observe_stage(stage: str, seconds: float):
+    _STAGES[stage].observe(seconds)
 
 class DiagnosticService:
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None, pool_timeout: Optional[float] = None,
+                 cache_size: Optional[int] = None, cache_ttl: Optional[float] = None,
+                 backend: Optional[str] = None, lazy: bool = True, top_k: Optional[int] = None):
         # Define model paths
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.model_path = os.path.join(base_dir, 'ai/models/diagnostic_model.tflite')
         self.symptom_mapping_path = os.path.join(base_dir, 'ai/models/symptom_mapping.json')
+        self.symptom_synonyms_path = os.path.join(base_dir, 'ai/models/symptom_synonyms.json')
         self.condition_mapping_path = os.path.join(base_dir, 'ai/models/condition_mapping.json')
+        self.rules_path = os.path.join(base_dir, 'ai/models/diagnosis_rules.json')
         
-        # Initialize model and mappings
-        self.interpreter = None
-        self.symptom_mapping = {}
-        self.conditions = []
+        # Interpreter pool settings (None means use the environment defaults)
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.backend = backend
+        self.top_k = max(1, top_k or DEFAULT_TOP_K)
+        self.batcher = None
+        self.workers = None
         
-        # Load model and mappings
-        self.load_model()
-        self.load_mappings()
+        # Results for repeated symptom sets, dropped whenever the model or mappings change
+        self.result_cache = ResultCache(
+            cache_size, cache_ttl,
+            watched_paths=[self.model_path, self.symptom_mapping_path, self.symptom_synonyms_path,
+                           self.condition_mapping_path, self.rules_path]
+        )
+        if self.result_cache.maxsize <= 0:
+            self.result_cache = None
+        
+        # Mappings are cheap to load; the model and its runtime wait for first use.
+        # Both live in one version object so a reload can replace them together.
+        self.registry = ModelRegistry(self._build_version, self._build_version(), on_swap=self._on_model_swap)
+        if not lazy:
+            self.load_model()
+        if MODEL_WATCH_INTERVAL > 0:
+            self.registry.start_watching(MODEL_WATCH_INTERVAL)
+    
+    def _build_version(self, strict: bool = False) -> ModelVersion:
+        return ModelVersion(
+            self.model_path, self.symptom_mapping_path, self.symptom_synonyms_path, self.condition_mapping_path,
+            severity_labels=SEVERITY_LABELS, backend=self.backend, pool_size=self.pool_size,
+            pool_timeout=self.pool_timeout, strict=strict, rules_path=self.rules_path
+        )
+    
+    def _on_model_swap(self, new_version: ModelVersion, old_version: ModelVersion):
+        # Cached results carry the version in their key; drop the old ones now rather than by eviction
+        if self.result_cache is not None:
+            self.result_cache.clear()
+    
+    def reload_model(self, force: bool = False) -> Dict[str, Any]:
+        """Load changed model/mapping files, smoke-test them and swap them in without dropping requests"""
+        return self.registry.reload(force)
+    
+    @property
+    def model_version(self) -> ModelVersion:
+        """The version new requests are served from"""
+        return self.registry.active
     
     def load_model(self):
-        """Load the TensorFlow Lite model"""
-        try:
-            self.interpreter = tf.lite.Interpreter(model_path=self.model_path)
-            self.interpreter.allocate_tensors()
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
-            print("Model loaded successfully")
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            self.interpreter = None
+        """Load the TensorFlow Lite model into a pool of interpreters"""
+        self.model_version.load_model()
     
     def load_mappings(self):
         """Load symptom and condition mappings"""
-        try:
-            with open(self.symptom_mapping_path, 'r') as f:
-                self.symptom_mapping = json.load(f)
-            
-            with open(self.condition_mapping_path, 'r') as f:
-                self.conditions = json.load(f)
-            
-            print("Mappings loaded successfully")
-        except Exception as e:
-            print(f"Error loading mappings: {e}")
+        self.model_version.load_mappings()
+    
+    @property
+    def interpreter_pool(self):
+        """Pool of interpreters, loaded on first use; None if the model failed to load"""
+        return self.model_version.interpreter_pool
+    
+    @property
+    def backend_name(self) -> Optional[str]:
+        return self.model_version.backend_name
+    
+    @property
+    def symptom_mapping(self) -> Dict[str, int]:
+        return self.model_version.symptom_mapping
+    
+    @property
+    def conditions(self) -> List[str]:
+        return self.model_version.conditions
+    
+    @property
+    def encoder(self):
+        return self.model_version.encoder
+    
+    @property
+    def normalizer(self):
+        return self.model_version.normalizer
+    
+    @property
+    def postprocessor(self):
+        return self.model_version.postprocessor
+    
+    @property
+    def interpreter(self):
+        """First pooled interpreter, or None if the model failed to load"""
+        if self.interpreter_pool is None:
+            return None
+        return self.interpreter_pool.interpreters[0].interpreter
+    
+    def enable_micro_batching(self, max_batch_size: Optional[int] = None, max_delay_ms: Optional[float] = None,
+                              workers: int = 1) -> MicroBatcher:
+        """Coalesce concurrent process_symptoms calls into batched invokes.
+        
+        Defaults come from DIAGNOSE_MAX_BATCH and DIAGNOSE_MAX_DELAY_MS.
+        """
+        if self.batcher is not None:
+            self.batcher.close()
+        self.batcher = MicroBatcher(self._process_coalesced, max_batch_size, max_delay_ms, workers)
+        return self.batcher
+    
+    def disable_micro_batching(self):
+        """Go back to one invoke per process_symptoms call"""
+        if self.batcher is not None:
+            self.batcher.close()
+            self.batcher = None
+    
+    def start_workers(self, num_workers: Optional[int] = None, **options) -> InferenceWorkerPool:
+        """Run inference in separate worker processes instead of this one.
+        
+        Normalization and the result cache stay here; only model batches
+        cross to the workers. The default worker count comes from
+        INFERENCE_WORKERS.
+        """
+        if self.workers is not None:
+            self.workers.shutdown()
+        self.workers = InferenceWorkerPool(num_workers, backend=self.backend, top_k=self.top_k, **options).start()
+        return self.workers
+    
+    def stop_workers(self, timeout: float = 10.0):
+        """Drain the worker processes and go back to in-process inference"""
+        if self.workers is not None:
+            self.workers.shutdown(timeout)
+            self.workers = None
+    
+    def _process_coalesced(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Run coalesced (symptoms, language) requests, one batch per language"""
+        results = [None] * len(items)
+        rows_by_language = {}
+        for i, (_, language) in enumerate(items):
+            rows_by_language.setdefault(language, []).append(i)
+        
+        for language, rows in rows_by_language.items():
+            batch_results = self._diagnose_batch([items[i][0] for i in rows], language)
+            for i, result in zip(rows, batch_results):
+                results[i] = result
+        return results
+    
+    def _cache_key(self, symptoms: List[str], language: str, version: ModelVersion):
+        """Key identifying every symptom list that must produce the same result"""
+        # The rules' vocabulary covers the model's and symptoms only the rules look at, since
+        # rule fallbacks are cached under this key too
+        return canonical_symptom_key(symptoms, version.rules.bits, HIGH_RISK_SYMPTOMS) + (language, version.version)
+    
+    def _lookup(self, symptoms: List[str], language: str):
+        """Canonicalize symptoms and check the cache: ``(symptoms, cache_key, cached_result)``"""
+        version = self.model_version
+        
+        # Map free-text variants ("feverish", "short of breath") to known symptoms
+        symptoms = version.normalizer.canonicalize(symptoms)
+        
+        if self.result_cache is None:
+            return symptoms, None, None
+        cache_key = self._cache_key(symptoms, language, version)
+        cached = self.result_cache.get(cache_key)
+        return symptoms, cache_key, copy_result(cached) if cached is not None else None
     
     def process_symptoms(self, symptoms: List[str], language: str = "en") -> Dict[str, Any]:
         """Process symptoms and return diagnosis"""
+        started = time.perf_counter()
         try:
-            # Preprocess symptoms
-            input_data = self.preprocess_symptoms(symptoms)
+            return self._process_symptoms(symptoms, language)
+        finally:
+            _REQUESTS['single'].observe(time.perf_counter() - started)
+    
+    def _process_symptoms(self, symptoms: List[str], language: str) -> Dict[str, Any]:
+        try:
+            # Inside the try: symptoms that are not strings get the error result, not an exception
+            symptoms, cache_key, cached = self._lookup(symptoms, language)
+            if cached is not None:
+                _OUTCOMES['cache'].inc()
+                return cached
             
-            # If model is available, use it for inference
-            if self.interpreter:
-                # Reshape input data to match model's expected shape
-                input_data = np.expand_dims(input_data, axis=0).astype(np.float32)
-                
-                # Set input tensor
-                self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-                
-                # Run inference
-                self.interpreter.invoke()
-                
-                # Get output tensor
-                output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-                
-                # Get top prediction
-                top_index = np.argmax(output_data[0])
-                confidence = float(output_data[0][top_index])
-                
-                diagnosis = self.conditions[top_index]
-                severity = self._determine_severity(diagnosis, symptoms)
-                
-                return {
-                    "diagnosis": diagnosis,
-                    "confidence": confidence,
-                    "severity": severity,
-                    "recommendations": self._get_recommendations(diagnosis)
-                }
+            if self.batcher is not None and (self.workers is not None or self.interpreter_pool):
+                # Share one invoke with whatever other requests arrive alongside this one
+                result = self.batcher.process((symptoms, language), timeout=BATCH_RESULT_TIMEOUT)
             else:
-                # Fallback to rule-based approach
-                return self.rule_based_diagnosis(symptoms)
+                result = self._diagnose_batch([symptoms], language)[0]
+        except (PoolTimeoutError, WorkerPoolError) as e:
+            # Every interpreter is busy or unavailable; answer with the rules instead of failing
+            print(f"Model inference unavailable: {e}")
+            self._count_fallback(e)
+            return self.rule_based_diagnosis(symptoms)
         except Exception as e:
             print(f"Error in process_symptoms: {e}")
-            return {"diagnosis": "Unable to process symptoms", "confidence": 0.0, "severity": "LOW"}
+            _OUTCOMES['error'].inc()
+            return self._error_result()
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, copy_result(result))
+        return result
+    
+    async def process_symptoms_async(self, symptoms: List[str], language: str = "en",
+                                     executor=None) -> Dict[str, Any]:
+        """Asyncio variant of process_symptoms.
+        
+        Cache hits are answered on the event loop. With micro-batching on,
+        a miss awaits the batcher's Future, so waiting requests hold no
+        thread; otherwise the invoke runs on ``executor``.
+        """
+        started = time.perf_counter()
+        try:
+            return await self._process_symptoms_async(symptoms, language, executor)
+        finally:
+            _REQUESTS['async'].observe(time.perf_counter() - started)
+    
+    async def _process_symptoms_async(self, symptoms: List[str], language: str, executor) -> Dict[str, Any]:
+        try:
+            symptoms, cache_key, cached = self._lookup(symptoms, language)
+            if cached is not None:
+                _OUTCOMES['cache'].inc()
+                return cached
+            
+            if self.batcher is not None and (self.workers is not None or self.interpreter_pool):
+                future = asyncio.wrap_future(self.batcher.submit((symptoms, language)))
+                result = await asyncio.wait_for(future, BATCH_RESULT_TIMEOUT)
+            else:
+                loop = asyncio.get_running_loop()
+                result = (await loop.run_in_executor(executor, self._diagnose_batch, [symptoms], language))[0]
+        except (PoolTimeoutError, WorkerPoolError) as e:
+            print(f"Model inference unavailable: {e}")
+            self._count_fallback(e)
+            return self.rule_based_diagnosis(symptoms)
+        except Exception as e:
+            print(f"Error in process_symptoms_async: {e}")
+            _OUTCOMES['error'].inc()
+            return self._error_result()
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, copy_result(result))
+        return result
+    
+    def process_symptoms_batch(self, symptoms_batch: List[List[str]], language: str = "en") -> List[Dict[str, Any]]:
+        """Process many symptom lists with a single interpreter invoke.
+        
+        Results are returned in the same order as ``symptoms_batch``. Rows
+        already in the result cache are answered without touching the model.
+        """
+        if not symptoms_batch:
+            return []
+        
+        started = time.perf_counter()
+        try:
+            return self._process_symptoms_batch(symptoms_batch, language)
+        finally:
+            _REQUESTS['batch'].observe(time.perf_counter() - started)
+    
+    def _process_symptoms_batch(self, symptoms_batch: List[List[str]], language: str) -> List[Dict[str, Any]]:
+        version = self.model_version
+        symptoms_batch = list(symptoms_batch)
+        results = [None] * len(symptoms_batch)
+        cache_keys = [None] * len(symptoms_batch)
+        hits = errors = 0
+        for i, symptoms in enumerate(symptoms_batch):
+            try:
+                symptoms_batch[i] = version.normalizer.canonicalize(symptoms)
+                if self.result_cache is not None:
+                    cache_keys[i] = self._cache_key(symptoms_batch[i], language, version)
+            except Exception as e:
+                # Only this row gets the error result; the rest of the batch is still diagnosed
+                print(f"Error in process_symptoms_batch: {e}")
+                results[i] = self._error_result()
+                errors += 1
+                continue
+            if cache_keys[i] is not None:
+                cached = self.result_cache.get(cache_keys[i])
+                if cached is not None:
+                    results[i] = copy_result(cached)
+                    hits += 1
+        
+        if hits:
+            _OUTCOMES['cache'].inc(hits)
+        if errors:
+            _OUTCOMES['error'].inc(errors)
+        misses = [i for i, result in enumerate(results) if result is None]
+        if not misses:
+            return results
+        
+        try:
+            computed = self._diagnose_batch([symptoms_batch[i] for i in misses], language)
+        except (PoolTimeoutError, WorkerPoolError) as e:
+            print(f"Model inference unavailable: {e}")
+            self._count_fallback(e, len(misses))
+            computed = self.rule_based_diagnosis_batch([symptoms_batch[i] for i in misses])
+            cache_keys = [None] * len(symptoms_batch)
+        except Exception as e:
+            print(f"Error in process_symptoms_batch: {e}")
+            _OUTCOMES['error'].inc(len(misses))
+            computed = [self._error_result() for _ in misses]
+            cache_keys = [None] * len(symptoms_batch)
+        
+        for i, result in zip(misses, computed):
+            results[i] = result
+            if cache_keys[i] is not None:
+                self.result_cache.put(cache_keys[i], copy_result(result))
+        return results
+    
+    def _diagnose_batch(self, symptoms_batch: List[List[str]], language: str) -> List[Dict[str, Any]]:
+        """Diagnose every row with one model invoke, or the rules if the model is unavailable"""
+        if self.workers is not None:
+            # The worker runs this same method against its own interpreter
+            return self.workers.diagnose_batch(symptoms_batch, language)
+        
+        # Encoder, interpreters and condition table all come from one version, even mid-reload
+        version = self.model_version
+        pool = version.interpreter_pool
+        if not pool:
+            # Fallback to rule-based approach
+            _OUTCOMES['fallback'].inc(len(symptoms_batch))
+            FALLBACKS.inc(len(symptoms_batch), 'model_unavailable')
+            return self.rule_based_diagnosis_batch(symptoms_batch)
+        
+        # One (N, 50) matrix and one invoke for the whole batch
+        started = time.perf_counter()
+        input_data = version.encoder.encode_batch(symptoms_batch)
+        _observe_stage('preprocess', time.perf_counter() - started)
+        output_data = pool.run(input_data, observe=_observe_stage)
+        
+        # Top-k, severity and recommendations for the whole batch at once
+        ranked = version.postprocessor.rank(output_data, symptoms_batch, self.top_k, observe=_observe_stage)
+        _OUTCOMES['model'].inc(len(symptoms_batch))
+        return [self._build_result(row) for row in ranked]
+    
+    def _count_fallback(self, error: Exception, rows: int = 1):
+        _OUTCOMES['fallback'].inc(rows)
+        FALLBACKS.inc(rows, 'pool_timeout' if isinstance(error, PoolTimeoutError) else 'worker_unavailable')
+    
+    def _build_result(self, ranked: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Turn one row of ranked diagnoses into a diagnosis result"""
+        result = ranked[0]
+        if len(ranked) > 1:
+            result["alternatives"] = ranked[1:]
+        return result
+    
+    def _error_result(self) -> Dict[str, Any]:
+        """Result returned when symptoms could not be processed"""
+        return {"diagnosis": "Unable to process symptoms", "confidence": 0.0, "severity": "LOW"}
     
     def preprocess_symptoms(self, symptoms: List[str]) -> np.ndarray:
         """Convert symptoms to model input format"""
         # Create a one-hot encoded vector
-        input_vector = np.zeros(50, dtype=np.float32)
-        
-        for symptom in symptoms:
-            symptom = symptom.lower()
-            if symptom in self.symptom_mapping:
-                input_vector[self.symptom_mapping[symptom]] = 1.0
+        return self.encoder.encode(symptoms)
+    
+    def preprocess_symptoms_batch(self, symptoms_batch: List[List[str]]) -> np.ndarray:
+        """Convert a batch of symptom lists to an (N, 50) model input matrix.
         
-        return input_vector
+        The matrix is a per-thread buffer reused by the next call.
+        """
+        return self.encoder.encode_batch(symptoms_batch)
     
     def rule_based_diagnosis(self, symptoms: List[str]) -> Dict[str, Any]:
         """Fallback rule-based diagnostic approach"""
-        symptoms_lower = [s.lower() for s in symptoms]
-        
-        # Simple rule-based logic
-        if "fever" in symptoms_lower and "cough" in symptoms_lower:
-            if "shortness of breath" in symptoms_lower:
-                return {
-                    "diagnosis": "Possible Pneumonia",
-                    "confidence": 0.75,
-                    "severity": "HIGH",
-                    "recommendations": ["Seek medical attention", "Rest", "Stay hydrated"]
-                }
-            else:
-                return {
-                    "diagnosis": "Common Cold or Influenza",
-                    "confidence": 0.85,
-                    "severity": "MEDIUM",
-                    "recommendations": ["Rest", "Fluids", "Over-the-counter medication"]
-                }
-        
-        if "headache" in symptoms_lower and "nausea" in symptoms_lower:
-            return {
-                "diagnosis": "Possible Migraine",
-                "confidence": 0.70,
-                "severity": "MEDIUM",
-                "recommendations": ["Rest in dark room", "Stay hydrated", "Pain relievers"]
-            }
-        
-        # Default response
-        return {
-            "diagnosis": "Unspecified Condition",
-            "confidence": 0.50,
-            "severity": "LOW",
-            "recommendations": ["Monitor symptoms", "Consult with healthcare provider if symptoms persist"]
-        }
+        return self.model_version.rules.diagnose(symptoms, SEVERITY_LABELS)
+    
+    def rule_based_diagnosis_batch(self, symptoms_batch: List[List[str]]) -> List[Dict[str, Any]]:
+        """Rule-based results for many symptom lists, matched in one vectorized pass"""
+        return self.model_version.rules.diagnose_batch(symptoms_batch, SEVERITY_LABELS)
     
     def _determine_severity(self, condition: str, symptoms: List[str]) -> str:
         """Determine severity based on condition and symptoms"""
-        high_risk_symptoms = ["shortness of breath", "chest pain", "confusion", "severe pain"]
-        
         # Check for high-risk symptoms
-        for symptom in symptoms:
-            if symptom.lower() in high_risk_symptoms:
-                return "HIGH"
-        
-        # Condition-based severity
-        high_severity_conditions = ["Pneumonia", "Asthma"]
-        medium_severity_conditions = ["Influenza", "Hypertension", "Type 2 Diabetes"]
-        
-        if any(cond in condition for cond in high_severity_conditions):
+        if self.postprocessor.is_high_risk(symptoms):
             return "HIGH"
-        elif any(cond in condition for cond in medium_severity_conditions):
-            return "MEDIUM"
         
-        return "LOW"
+        # Condition-based severity
+        return SEVERITY_LABELS[condition_severity(condition)]
     
     def _get_recommendations(self, diagnosis: str) -> List[str]:
         """Get recommendations based on diagnosis"""
-        recommendations = {
-            "Common Cold": ["Rest", "Stay hydrated", "Over-the-counter cold medication if needed"],
-            "Influenza": ["Rest", "Fluids", "Fever reducers", "Consult doctor if symptoms worsen"],
-            "Hypertension": ["Reduce salt intake", "Regular exercise", "Medication as prescribed"],
-            "Type 2 Diabetes": ["Monitor blood sugar", "Follow prescribed diet", "Regular exercise"],
-            "Migraine": ["Rest in dark room", "Stay hydrated", "Pain relievers"],
-            "Gastroenteritis": ["Stay hydrated", "BRAT diet", "Rest"],
-            "Urinary Tract Infection": ["Increase fluid intake", "Consult doctor for antibiotics"],
-            "Asthma": ["Use prescribed inhaler", "Avoid triggers", "Seek medical help if breathing worsens"],
-            "Allergic Rhinitis": ["Avoid allergens", "Antihistamines", "Nasal sprays"],
-            "Anxiety Disorder": ["Deep breathing exercises", "Regular physical activity", "Consider counseling"]
-        }
-        
-        if diagnosis in recommendations:
-            return recommendations[diagnosis]
-        
-        return ["Monitor symptoms", "Consult with healthcare provider if symptoms persist"]
\ No newline at end of file
+        return list(RECOMMENDATIONS.get(diagnosis, DEFAULT_RECOMMENDATIONS))
\ No newline at end of file
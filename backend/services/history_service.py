@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+DIAGNOSIS_FIELDS = ('id', 'user_id', 'created_at', 'symptoms', 'diagnosis_result', 'confidence_score',
+                    'language', 'severity_level', 'is_reviewed')
+HEALTH_RECORD_FIELDS = ('id', 'user_id', 'created_at', 'record_type', 'data', 'source', 'is_synced_with_abha')
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued by this service"""
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """Opaque cursor for the row a page ended on"""
+    raw = json.dumps([created_at.isoformat(), pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+def keyset_page(queryset, fields: Sequence[str], cursor: Optional[str] = None,
+                limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """One page of ``queryset``, newest first, continuing after ``cursor``.
+    
+    Instead of OFFSET, which reads and discards every earlier row, the page
+    starts with a range seek on (created_at, id) past the last row of the
+    previous page, so page 1,000 costs the same as page 1. The id breaks
+    ties between rows created in the same microsecond. The ``next_cursor``
+    is None on the last page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # Written as a range plus an exclusion rather than an OR, so the index range scan
+        # starts at the cursor on every backend
+        queryset = queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=pk)
+    
+    # One extra row tells whether another page follows
+    rows = list(queryset.values(*fields)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    for row in rows:
+        row['created_at'] = row['created_at'].isoformat()
+    return {"results": rows, "next_cursor": next_cursor}
+
+def diagnosis_history(user_id: Optional[int] = None, severity: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """A patient's diagnoses, or all diagnoses of one severity for triage dashboards"""
+    from models.diagnosis import Diagnosis
+    
+    queryset = Diagnosis.objects.all()
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    if severity is not None:
+        queryset = queryset.filter(severity_level=severity)
+    return keyset_page(queryset, DIAGNOSIS_FIELDS, cursor, limit)
+
+def health_record_history(user_id: int, cursor: Optional[str] = None,
+                          limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """A patient's health records"""
+    from models.health_record import HealthRecord
+    
+    return keyset_page(HealthRecord.objects.filter(user_id=user_id), HEALTH_RECORD_FIELDS, cursor, limit)
@@ -1,25 +1,417 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from flask import current_app, g, request
 from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager, create_access_token
+from flask_jwt_extended import JWTManager, create_access_token, decode_token, get_unverified_jwt_headers
+from flask_jwt_extended.exceptions import (
+    InvalidHeaderError, NoAuthorizationError, RevokedTokenError, UserLookupError, WrongTokenError
+)
+
+# Auth defaults, overridable per deployment
+CLAIMS_CACHE_SIZE = int(os.getenv('JWT_CLAIMS_CACHE_SIZE', '10000'))
+# Seconds before a worker picks up tokens revoked by another one
+BLOCKLIST_SYNC_INTERVAL = float(os.getenv('JWT_BLOCKLIST_SYNC_INTERVAL', '2'))
+# Seconds a cached user stays valid in processes that did not make the change, and users kept
+USER_DIRECTORY_TTL = float(os.getenv('USER_DIRECTORY_TTL', '30'))
+USER_DIRECTORY_SIZE = int(os.getenv('USER_DIRECTORY_SIZE', '10000'))
+# Threads running bcrypt (0 checks passwords on the request thread) and how many checks may wait for them
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', '64'))
+
+# User fields kept in memory; the password hash is never cached or handed out
+USER_FIELDS = ('id', 'username', 'abha_id', 'preferred_language', 'is_verified', 'is_active')
+
+class LoginBusy(Exception):
+    """Too many password checks are already waiting for the bcrypt pool"""
+
+class ClaimsCache:
+    """Bounded LRU of verified JWT claims by encoded token, each kept until its token expires"""
+    
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = CLAIMS_CACHE_SIZE if maxsize is None else maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if time.time() >= expires_at:
+                # Dropped rather than served: the full decode then reports the expiry
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return claims
+    
+    def put(self, token: str, claims: Dict[str, Any]):
+        # Tokens without an expiry are verified every time
+        if self.maxsize <= 0 or "exp" not in claims:
+            return
+        with self._lock:
+            self._entries[token] = (claims, claims["exp"])
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+class TokenBlocklist:
+    """Revoked token ids (jti), shared by every worker through the RevokedToken table.
+    
+    Each process answers from an in-memory set of the unexpired ids and
+    reloads it from the table at most every ``sync_interval`` seconds, so a
+    logout on one worker is honoured by the others within that interval,
+    and by every worker after a restart. Rows are only kept until the token
+    would have expired anyway, which keeps the set and the reload small.
+    """
+    
+    def __init__(self, sync_interval: Optional[float] = None):
+        self.sync_interval = BLOCKLIST_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self._revoked = {}
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        
+        self.syncs = 0
+        self.sync_failures = 0
+    
+    def revoke(self, jti: str, expires_at: float):
+        from django.utils import timezone
+        from models.revoked_token import RevokedToken
+        RevokedToken.objects.get_or_create(
+            jti=jti, defaults={"expires_at": datetime.fromtimestamp(expires_at, dt_timezone.utc)}
+        )
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        with self._lock:
+            self._revoked[jti] = expires_at
+    
+    def sync(self, force: bool = False):
+        """Reload the revoked ids from the table if the last reload is older than the interval"""
+        if not force and self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        # One thread reloads; the others answer from the current set meanwhile
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            from django.utils import timezone
+            from models.revoked_token import RevokedToken
+            rows = RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', 'expires_at')
+            revoked = {jti: expires_at.timestamp() for jti, expires_at in rows}
+            with self._lock:
+                # An id revoked here while the query ran is kept
+                now = time.time()
+                revoked.update((jti, exp) for jti, exp in self._revoked.items() if exp > now and jti not in revoked)
+                self._revoked = revoked
+            self.syncs += 1
+        except Exception as e:
+            # Keep the last known set and retry after the interval
+            print(f"Error syncing token blocklist: {e}")
+            self.sync_failures += 1
+        finally:
+            self._synced_at = time.monotonic()
+            self._sync_lock.release()
+    
+    def is_revoked(self, jti: str) -> bool:
+        self.sync()
+        return jti in self._revoked
+    
+    def stats(self):
+        return {
+            "revoked": len(self._revoked),
+            "sync_interval": self.sync_interval,
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures
+        }
+
+class UserDirectory:
+    """Cache of users by id for authenticated requests, without their password hashes.
+    
+    Each user is loaded with a single-row query on first use and kept for
+    ``ttl`` seconds in a bounded LRU; concurrent misses for the same user
+    share one query. Saves and deletes through the ORM drop the user's
+    entry at once, in this process; other processes see the change when
+    their entry expires.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None, maxsize: Optional[int] = None):
+        self.ttl = USER_DIRECTORY_TTL if ttl is None else ttl
+        self.maxsize = USER_DIRECTORY_SIZE if maxsize is None else maxsize
+        # user id -> (user row or None, monotonic expiry)
+        self._entries = OrderedDict()
+        # user id -> Event set once the query in flight for it is done
+        self._loading = {}
+        # Bumped by every invalidation, so a query that raced one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _load(user_id: int) -> Optional[Dict[str, Any]]:
+        from models.user import User
+        _connect_user_signals(User)
+        return User.objects.filter(id=user_id).values(*USER_FIELDS).first()
+    
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """The user with this id, or None"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(user_id)
+                if entry is not None and time.monotonic() < entry[1]:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return dict(entry[0]) if entry[0] is not None else None
+                loading = self._loading.get(user_id)
+                if loading is None:
+                    loading = self._loading[user_id] = threading.Event()
+                    generation = self._generation
+                    self.misses += 1
+                    break
+            # Another request is loading this user; use its result
+            loading.wait()
+        
+        try:
+            user = self._load(user_id)
+            with self._lock:
+                if self.maxsize > 0 and generation == self._generation:
+                    self._entries[user_id] = (user, time.monotonic() + self.ttl)
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            return dict(user) if user is not None else None
+        finally:
+            with self._lock:
+                del self._loading[user_id]
+            loading.set()
+    
+    def credentials(self, username: str):
+        """``(user_id, password_hash)`` for a username, or None; read from the database every time"""
+        from models.user import User
+        return User.objects.filter(username=username).values_list('id', 'password').first()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def invalidate(self, user_id: Optional[int] = None):
+        """Forget one user (or everyone), e.g. after a password change or deactivation"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
 
 bcrypt = Bcrypt()
 jwt = JWTManager()
+claims_cache = ClaimsCache()
+blocklist = TokenBlocklist()
+directory = UserDirectory()
+
+# bcrypt releases the GIL, so each login on a request thread takes a whole core; a small
+# pool caps the cores logins can take and leaves the rest to diagnose traffic
+_password_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix='bcrypt') if BCRYPT_WORKERS else None
+_pending_checks = 0
+_pending_lock = threading.Lock()
+
+# Checked against when the username is unknown, so the response time does not tell
+_dummy_hash = None
+
+@jwt.token_in_blocklist_loader
+def _is_revoked(jwt_header, jwt_payload):
+    return blocklist.is_revoked(jwt_payload["jti"])
+
+@jwt.user_lookup_loader
+def _lookup_user(jwt_header, jwt_payload):
+    # None fails the request with a 401
+    user = directory.get(int(jwt_payload["sub"]))
+    return user if user and user['is_active'] else None
+
+def _on_user_changed(sender, instance, **kwargs):
+    directory.invalidate(instance.pk)
+
+_signals_connected = False
+
+def _connect_user_signals(user_model):
+    """Drop a user's cached entry whenever the ORM saves or deletes it"""
+    global _signals_connected
+    if _signals_connected:
+        return
+    from django.db.models.signals import post_delete, post_save
+    post_save.connect(_on_user_changed, sender=user_model, dispatch_uid='user_directory_save')
+    post_delete.connect(_on_user_changed, sender=user_model, dispatch_uid='user_directory_delete')
+    _signals_connected = True
 
 def init_user_service(app):
     bcrypt.init_app(app)
     jwt.init_app(app)
 
+def _token_from_headers() -> str:
+    """The encoded token in the ``Authorization: Bearer <JWT>`` header"""
+    header_name = current_app.config.get('JWT_HEADER_NAME', 'Authorization')
+    header_type = current_app.config.get('JWT_HEADER_TYPE', 'Bearer')
+    auth_header = request.headers.get(header_name, '').strip()
+    if not auth_header:
+        raise NoAuthorizationError(f"Missing {header_name} Header")
+    parts = auth_header.split()
+    if header_type:
+        if parts[0] != header_type or len(parts) != 2:
+            raise InvalidHeaderError(f"Bad {header_name} header. Expected '{header_name}: {header_type} <JWT>'")
+        return parts[1]
+    if len(parts) != 1:
+        raise InvalidHeaderError(f"Bad {header_name} header. Expected '{header_name}: <JWT>'")
+    return parts[0]
+
+def verify_request_token():
+    """Claims and user for the access token in this request's headers.
+    
+    The signature and claims are verified once, by flask_jwt_extended's
+    decode_token, and then served from the claims cache until the token
+    expires. Revocation and the user are checked on every request, cache
+    hit or not, so a logout or deactivation takes effect at once. Failures
+    raise flask_jwt_extended's own errors, which init_user_service has
+    registered handlers for.
+    """
+    token = _token_from_headers()
+    claims = claims_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        if claims.get("type") != "access":
+            raise WrongTokenError("Only non-refresh tokens are allowed")
+        claims_cache.put(token, claims)
+    if blocklist.is_revoked(claims["jti"]):
+        raise RevokedTokenError(get_unverified_jwt_headers(token), claims)
+    user = _lookup_user(None, claims)
+    if user is None:
+        raise UserLookupError(f"user_lookup returned None for {claims['sub']}", get_unverified_jwt_headers(token), claims)
+    # A copy, so a handler changing its claims cannot change the next request's
+    return dict(claims), user
+
+def token_required(fn):
+    """Stand-in for ``jwt_required()`` on header-token routes that reuses verified claims.
+    
+    Read the request's claims and user with current_claims() and
+    current_user().
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.token_claims, g.token_user = verify_request_token()
+        return fn(*args, **kwargs)
+    return wrapper
+
+def current_claims() -> Dict[str, Any]:
+    return g.token_claims
+
+def current_user() -> Dict[str, Any]:
+    return g.token_user
+
+def _on_password_pool(func, *args):
+    """Run a bcrypt call on the pool, refusing when too many are already waiting"""
+    global _pending_checks
+    if _password_pool is None:
+        return func(*args)
+    with _pending_lock:
+        if _pending_checks >= BCRYPT_MAX_PENDING:
+            raise LoginBusy(f"{_pending_checks} password checks already waiting")
+        _pending_checks += 1
+    try:
+        return _password_pool.submit(func, *args).result()
+    finally:
+        with _pending_lock:
+            _pending_checks -= 1
+
+def _check_password_hash(hashed_password, password):
+    # Accept hashes made by Django's BCryptPasswordHasher as well
+    if hashed_password.startswith('bcrypt$'):
+        hashed_password = hashed_password[len('bcrypt$'):]
+    try:
+        return bcrypt.check_password_hash(hashed_password, password)
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
 def authenticate_user(username, password):
-    # This is a placeholder. In a real application, you would check against a database
-    if username == "test" and password == "password":
-        return True
-    return False
+    """The user for these credentials, or None; raises LoginBusy when the bcrypt pool is saturated"""
+    global _dummy_hash
+    found = directory.credentials(username) if username else None
+    if found is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password(os.urandom(16).hex())
+        check_password(_dummy_hash, password)
+        return None
+    user_id, hashed_password = found
+    if not check_password(hashed_password, password):
+        return None
+    user = directory.get(user_id)
+    return user if user and user['is_active'] else None
+
+def create_user(username, password, phone_number, **fields):
+    """Add a user with a bcrypt password hash; returns it as the directory holds it"""
+    from models.user import User
+    user = User.objects.create(username=username, password=hash_password(password), phone_number=phone_number, **fields)
+    return directory.get(user.id)
 
 def hash_password(password):
-    return bcrypt.generate_password_hash(password).decode('utf-8')
+    return _on_password_pool(bcrypt.generate_password_hash, password).decode('utf-8')
 
 def check_password(hashed_password, password):
-    return bcrypt.check_password_hash(hashed_password, password)
+    return _on_password_pool(_check_password_hash, hashed_password, password)
 
 def create_token(user_id):
-    return create_access_token(identity=user_id)
+    # PyJWT requires the subject to be a string
+    return create_access_token(identity=str(user_id))
+
+def revoke_token(claims):
+    """Reject the token these claims came from for the rest of its life"""
+    blocklist.revoke(claims["jti"], claims["exp"])
 
+def auth_stats():
+    return {
+        "claims_cache": claims_cache.stats(),
+        "users": directory.stats(),
+        "blocklist": blocklist.stats(),
+        "pending_password_checks": _pending_checks
+    }
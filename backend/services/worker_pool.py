@@ -0,0 +1,421 @@
+from typing import List, Dict, Any, Optional
+import os
+import signal
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import wait
+
+from ai.backends import backend_module
+
+# Worker pool defaults, overridable per deployment
+DEFAULT_WORKERS = int(os.getenv('INFERENCE_WORKERS', str(os.cpu_count() or 1)))
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv('INFERENCE_WORKER_TIMEOUT', '30.0'))
+HEALTH_CHECK_INTERVAL = float(os.getenv('INFERENCE_HEALTH_INTERVAL', '1.0'))
+HEALTH_CHECK_TIMEOUT = float(os.getenv('INFERENCE_HEALTH_TIMEOUT', '30.0'))
+STARTUP_TIMEOUT = 60.0
+
+# How worker processes are started. A fork server imports the service and the
+# interpreter runtime once and forks every worker from it, so their code and
+# import-time data are shared pages rather than one private copy per worker
+START_METHOD = os.getenv('INFERENCE_START_METHOD',
+                         'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+class WorkerPoolError(Exception):
+    """Raised when no inference worker can take or finish a request"""
+
+class WorkerCrashedError(WorkerPoolError):
+    """Raised for requests that were running on a worker when it died"""
+
+def _worker_main(conn, worker_id: int, backend: Optional[str], top_k: Optional[int]):
+    """Entry point of an inference worker process"""
+    # The parent owns shutdown; a Ctrl-C in the terminal must not kill workers mid-request
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    from services.diagnostic_service import DiagnosticService
+    from utils.metrics import REGISTRY
+    service = DiagnosticService(pool_size=1, cache_size=0, backend=backend, lazy=False, top_k=top_k)
+    conn.send(('ready', os.getpid(), service.backend_name))
+    
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            # The parent went away; nothing left to serve
+            break
+        
+        kind = message[0]
+        if kind == 'diagnose':
+            _, request_id, symptoms_batch, language = message
+            try:
+                conn.send(('result', request_id, True, service._diagnose_batch(symptoms_batch, language)))
+            except Exception as e:
+                conn.send(('result', request_id, False, f"{type(e).__name__}: {e}"))
+        elif kind == 'ping':
+            conn.send(('pong', message[1]))
+        elif kind == 'metrics':
+            conn.send(('result', message[1], True, REGISTRY.snapshot()))
+        elif kind == 'reload':
+            # Swapped in between requests; a failed reload keeps the worker on its current model
+            service.reload_model(force=message[1])
+        elif kind == 'stop':
+            break
+    conn.close()
+
+class _WorkerSlot:
+    """One worker process and the requests currently assigned to it"""
+    
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process = None
+        self.conn = None
+        self.pid = None
+        self.state = 'stopped'
+        self.generation = 0
+        self.in_flight = {}
+        self.restarts = 0
+        self.last_pong = 0.0
+        self.send_lock = threading.Lock()
+
+class InferenceWorkerPool:
+    """Inference spread across worker processes, each with its own interpreter.
+    
+    Requests go to the ready worker with the fewest in-flight batches over a
+    private pipe. A collector thread resolves the futures as results come
+    back; a monitor thread pings workers and restarts any that die or stop
+    answering. Requests on a crashed worker fail with WorkerCrashedError
+    rather than being replayed, since the input may be what killed it.
+    """
+    
+    def __init__(self, num_workers: Optional[int] = None, backend: Optional[str] = None,
+                 top_k: Optional[int] = None, request_timeout: Optional[float] = None,
+                 health_interval: Optional[float] = None, health_timeout: Optional[float] = None,
+                 start_method: Optional[str] = None):
+        self.num_workers = max(1, num_workers or DEFAULT_WORKERS)
+        self.backend = backend
+        self.top_k = top_k
+        self.request_timeout = DEFAULT_REQUEST_TIMEOUT if request_timeout is None else request_timeout
+        self.health_interval = HEALTH_CHECK_INTERVAL if health_interval is None else health_interval
+        self.health_timeout = HEALTH_CHECK_TIMEOUT if health_timeout is None else health_timeout
+        
+        # Never plain fork: the parent runs threads and may hold runtime locks
+        self.start_method = start_method or START_METHOD
+        self._context = multiprocessing.get_context(self.start_method)
+        if self.start_method == 'forkserver':
+            # Only takes effect if the fork server is not running yet
+            runtime = backend_module(backend)
+            self._context.set_forkserver_preload(['services.diagnostic_service'] + ([runtime] if runtime else []))
+        self._slots = [_WorkerSlot(i) for i in range(self.num_workers)]
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._closing = False
+        self._stopped = threading.Event()
+        self._next_request_id = 0
+        self._ping_seq = 0
+        
+        self.requests = 0
+        self.failures = 0
+        self.crashes = 0
+        
+        self._collector = None
+        self._monitor = None
+    
+    def start(self, wait_ready: bool = True, timeout: float = STARTUP_TIMEOUT) -> 'InferenceWorkerPool':
+        """Start every worker, by default waiting until they have loaded the model"""
+        for slot in self._slots:
+            self._start_worker(slot)
+        
+        self._collector = threading.Thread(target=self._collect, name='inference-collector', daemon=True)
+        self._monitor = threading.Thread(target=self._watch, name='inference-monitor', daemon=True)
+        self._collector.start()
+        self._monitor.start()
+        
+        if wait_ready:
+            deadline = time.monotonic() + timeout
+            with self._ready:
+                while self.ready_count() < self.num_workers:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"Only {self.ready_count()} of {self.num_workers} inference workers ready after {timeout:.0f}s")
+                        break
+                    self._ready.wait(remaining)
+        return self
+    
+    def _start_worker(self, slot: _WorkerSlot):
+        # Reap the previous process of a restarted slot
+        if slot.conn is not None:
+            slot.conn.close()
+        if slot.process is not None:
+            slot.process.join(1.0)
+        
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, slot.worker_id, self.backend, self.top_k),
+            name=f'inference-worker-{slot.worker_id}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        
+        with self._lock:
+            slot.process = process
+            slot.conn = parent_conn
+            slot.pid = process.pid
+            slot.state = 'starting'
+            slot.generation += 1
+            slot.last_pong = time.monotonic()
+    
+    def ready_count(self) -> int:
+        return sum(1 for slot in self._slots if slot.state == 'ready')
+    
+    def submit(self, symptoms_batch: List[List[str]], language: str = "en") -> Future:
+        """Queue a batch on the least busy worker; the Future resolves to its results"""
+        future = Future()
+        with self._lock:
+            if self._closing:
+                raise WorkerPoolError("Inference worker pool is shut down")
+            ready = [slot for slot in self._slots if slot.state == 'ready']
+            if not ready:
+                raise WorkerPoolError("No inference worker available")
+            slot = min(ready, key=lambda s: len(s.in_flight))
+            
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            slot.in_flight[request_id] = future
+            self.requests += 1
+            generation = slot.generation
+        
+        try:
+            with slot.send_lock:
+                slot.conn.send(('diagnose', request_id, symptoms_batch, language))
+        except (OSError, ValueError) as e:
+            self._handle_crash(slot, generation, f"send failed: {e}")
+        return future
+    
+    def diagnose_batch(self, symptoms_batch: List[List[str]], language: str = "en",
+                       timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Diagnose a batch on a worker process and wait for the results"""
+        timeout = self.request_timeout if timeout is None else timeout
+        try:
+            return self.submit(symptoms_batch, language).result(timeout=timeout)
+        except FutureTimeoutError:
+            raise WorkerPoolError(f"No result from inference worker after {timeout:.1f}s")
+    
+    def collect_metrics(self, timeout: float = 1.0) -> List[Dict[str, Any]]:
+        """Metric snapshots from every ready worker; workers that do not answer in time are left out"""
+        pending = []
+        with self._lock:
+            for slot in self._slots:
+                if slot.state != 'ready':
+                    continue
+                # Answered like a diagnosis, so a crash fails it the same way
+                request_id = self._next_request_id
+                self._next_request_id += 1
+                future = Future()
+                slot.in_flight[request_id] = future
+                pending.append((slot, slot.generation, request_id, future))
+        
+        for slot, generation, request_id, _ in pending:
+            try:
+                with slot.send_lock:
+                    slot.conn.send(('metrics', request_id))
+            except (OSError, ValueError) as e:
+                self._handle_crash(slot, generation, f"send failed: {e}")
+        
+        snapshots = []
+        deadline = time.monotonic() + timeout
+        for _, _, _, future in pending:
+            try:
+                snapshots.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except Exception:
+                pass
+        return snapshots
+    
+    def reload_model(self, force: bool = False) -> int:
+        """Ask every ready worker to reload its model; returns how many were asked"""
+        with self._lock:
+            ready = [slot for slot in self._slots if slot.state == 'ready']
+        asked = 0
+        for slot in ready:
+            try:
+                with slot.send_lock:
+                    slot.conn.send(('reload', force))
+                asked += 1
+            except (OSError, ValueError):
+                # The health check will notice and restart it, loading the new files anyway
+                pass
+        return asked
+    
+    def _collect(self):
+        """Read replies from every worker pipe and resolve their futures"""
+        while not self._stopped.is_set():
+            with self._lock:
+                live = {slot.conn: (slot, slot.generation) for slot in self._slots
+                        if slot.conn is not None and slot.state in ('starting', 'ready', 'draining')}
+            if not live:
+                self._stopped.wait(0.05)
+                continue
+            
+            try:
+                readable = wait(list(live), timeout=0.2)
+            except (OSError, ValueError):
+                # A restarted worker's old pipe was closed under us; take a fresh snapshot
+                continue
+            for conn in readable:
+                slot, generation = live[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._handle_crash(slot, generation, "connection closed")
+                    continue
+                self._handle_message(slot, generation, message)
+    
+    def _handle_message(self, slot: _WorkerSlot, generation: int, message):
+        kind = message[0]
+        with self._lock:
+            if slot.generation != generation:
+                return
+            if kind == 'result':
+                _, request_id, ok, payload = message
+                future = slot.in_flight.pop(request_id, None)
+                if not ok:
+                    self.failures += 1
+            elif kind == 'ready':
+                slot.pid, backend_name = message[1], message[2]
+                slot.state = 'draining' if self._closing else 'ready'
+                slot.last_pong = time.monotonic()
+                print(f"Inference worker {slot.worker_id} ready (pid {slot.pid}, {backend_name})")
+                self._ready.notify_all()
+                return
+            elif kind == 'pong':
+                slot.last_pong = time.monotonic()
+                return
+            else:
+                return
+        
+        if future is not None:
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(WorkerPoolError(payload))
+    
+    def _handle_crash(self, slot: _WorkerSlot, generation: int, reason: str):
+        """Fail the dead worker's requests and mark it for restart"""
+        with self._lock:
+            if slot.generation != generation or slot.state in ('crashed', 'stopped'):
+                return
+            expected = self._closing and slot.state == 'draining' and not slot.in_flight
+            slot.state = 'stopped' if expected else 'crashed'
+            failed = list(slot.in_flight.values())
+            slot.in_flight.clear()
+            if not expected:
+                self.crashes += 1
+        
+        if not expected:
+            print(f"Inference worker {slot.worker_id} (pid {slot.pid}) failed: {reason}")
+        if slot.process is not None and slot.process.is_alive():
+            slot.process.kill()
+        for future in failed:
+            future.set_exception(WorkerCrashedError(f"Inference worker {slot.worker_id} died: {reason}"))
+    
+    def _watch(self):
+        """Ping workers, kill unresponsive ones and restart crashed ones"""
+        while not self._stopped.wait(self.health_interval):
+            now = time.monotonic()
+            for slot in self._slots:
+                with self._lock:
+                    state, generation = slot.state, slot.generation
+                if self._closing:
+                    return
+                
+                if state == 'crashed':
+                    slot.restarts += 1
+                    self._start_worker(slot)
+                    continue
+                if state not in ('starting', 'ready'):
+                    continue
+                if not slot.process.is_alive():
+                    self._handle_crash(slot, generation, f"exit code {slot.process.exitcode}")
+                    continue
+                if state == 'ready' and now - slot.last_pong > self.health_timeout:
+                    self._handle_crash(slot, generation, f"no health check reply for {now - slot.last_pong:.1f}s")
+                    continue
+                
+                if state == 'ready':
+                    self._ping_seq += 1
+                    try:
+                        with slot.send_lock:
+                            slot.conn.send(('ping', self._ping_seq))
+                    except (OSError, ValueError) as e:
+                        self._handle_crash(slot, generation, f"health check failed: {e}")
+    
+    def shutdown(self, timeout: float = 10.0):
+        """Stop taking requests, let in-flight batches finish, then stop the workers"""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            for slot in self._slots:
+                if slot.state in ('starting', 'ready'):
+                    slot.state = 'draining'
+        
+        # Drain: the collector keeps resolving results until nothing is in flight
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and any(slot.in_flight for slot in self._slots):
+            time.sleep(0.01)
+        
+        for slot in self._slots:
+            if slot.state == 'draining':
+                try:
+                    with slot.send_lock:
+                        slot.conn.send(('stop',))
+                except (OSError, ValueError):
+                    pass
+        for slot in self._slots:
+            if slot.process is not None:
+                slot.process.join(max(0.0, deadline - time.monotonic()))
+                if slot.process.is_alive():
+                    print(f"Inference worker {slot.worker_id} did not stop in time; terminating")
+                    slot.process.terminate()
+                    slot.process.join(1.0)
+        
+        self._stopped.set()
+        for thread in (self._collector, self._monitor):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(1.0)
+        
+        for slot in self._slots:
+            with self._lock:
+                failed = list(slot.in_flight.values())
+                slot.in_flight.clear()
+                slot.state = 'stopped'
+            for future in failed:
+                future.set_exception(WorkerPoolError("Inference worker pool shut down"))
+            if slot.conn is not None:
+                slot.conn.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Worker states and request counters for the health endpoint"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "workers": self.num_workers,
+                "ready": self.ready_count(),
+                "requests": self.requests,
+                "failures": self.failures,
+                "crashes": self.crashes,
+                "in_flight": sum(len(slot.in_flight) for slot in self._slots),
+                "processes": [
+                    {
+                        "id": slot.worker_id,
+                        "pid": slot.pid,
+                        "state": slot.state,
+                        "in_flight": len(slot.in_flight),
+                        "restarts": slot.restarts,
+                        "last_health_check_age": round(now - slot.last_pong, 3)
+                    }
+                    for slot in self._slots
+                ]
+            }
@@ -0,0 +1,45 @@
+import asyncio
+from aiohttp import web
+
+class StubServer:
+    """Local aiohttp server on a free port, standing in for an upstream API in tests.
+    
+    Subclasses set ``path`` and implement ``respond(request)``. Every call is
+    delayed by ``delay`` seconds, and the peers and peak concurrency seen are
+    recorded, so tests can check connection reuse and in-flight limits.
+    """
+    
+    path = '/'
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.peers = set()
+        self.active = 0
+        self.peak_active = 0
+    
+    async def respond(self, request):
+        raise NotImplementedError
+    
+    async def handle(self, request):
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return await self.respond(request)
+        finally:
+            self.active -= 1
+    
+    async def start(self):
+        """Start serving; returns the base URL"""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}"
+    
+    async def stop(self):
+        await self.runner.cleanup()
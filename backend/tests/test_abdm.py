@@ -0,0 +1,143 @@
+import sys
+import os
+import asyncio
+import tempfile
+from aiohttp import web
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never write to the development database
+os.environ.setdefault('DATABASE_PATH', os.path.join(tempfile.gettempdir(), 'kiosk_test.sqlite3'))
+
+from config.database import setup_database
+from tests.stub_server import StubServer
+from utils.abdm import AbhaSyncEngine
+
+class StubAbdm(StubServer):
+    """Local stand-in for the ABDM batch endpoint that records what it receives"""
+    
+    path = '/health-records/batch'
+    
+    def __init__(self, delay=0.0, failures=(), reject=()):
+        super().__init__(delay)
+        # Status codes to answer the first calls with, in order
+        self.failures = list(failures)
+        self.reject = set(reject)
+        self.calls = 0
+        self.received = []
+    
+    async def respond(self, request):
+        self.calls += 1
+        if self.failures:
+            status = self.failures.pop(0)
+            return web.json_response({"error": "unavailable"}, status=status, headers={"Retry-After": "0"})
+        records = (await request.json())["records"]
+        self.received.extend(record["id"] for record in records)
+        rejected = [{"id": r["id"], "reason": "unknown ABHA number"} for r in records if r["id"] in self.reject]
+        return web.json_response({"rejected": rejected})
+
+def run_sync(stub, checkpoint_path, max_records=None, **options):
+    """Run one sync pass against ``stub``; returns the engine"""
+    async def main():
+        url = await stub.start()
+        try:
+            engine = AbhaSyncEngine(url, checkpoint_path=checkpoint_path, backoff_base=0.01, **options)
+            await engine.run(max_records)
+            return engine
+        finally:
+            await stub.stop()
+    return asyncio.run(main())
+
+def clear_patients():
+    """Remove the patients (and records) of earlier tests, so each test sees only its own"""
+    setup_database()
+    from models.user import User
+    User.objects.filter(username__startswith="abha-").delete()
+
+def make_records(name, count, abha_id):
+    """A fresh patient with ``count`` unsynced health records; returns their ids"""
+    setup_database()
+    from models.health_record import HealthRecord
+    from models.user import User
+    
+    User.objects.filter(username=name).delete()
+    patient = User.objects.create(username=name, phone_number=f"+91{abs(hash(name)) % 10**10:010d}", abha_id=abha_id)
+    HealthRecord.objects.bulk_create([
+        HealthRecord(user=patient, record_type="vitals", data={"pulse": 60 + i % 40}, source="kiosk")
+        for i in range(count)
+    ])
+    return list(HealthRecord.objects.filter(user=patient).order_by('id').values_list('id', flat=True))
+
+def synced_ids(ids):
+    from models.health_record import HealthRecord
+    return set(HealthRecord.objects.filter(id__in=ids, is_synced_with_abha=True).values_list('id', flat=True))
+
+def test_syncs_in_batches():
+    """Test that every linked record is pushed once, in bounded concurrent batches over pooled connections"""
+    clear_patients()
+    linked = make_records("abha-linked", 250, "91-1111-2222-3333")
+    unlinked = make_records("abha-unlinked", 10, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'checkpoint.json')
+        stub = StubAbdm(delay=0.02)
+        engine = run_sync(stub, checkpoint, batch_size=40, max_concurrency=3, max_connections=3)
+        
+        assert sorted(stub.received) == linked, "Each linked record should be sent exactly once"
+        assert stub.calls == 7, f"Expected 7 batches of up to 40, got {stub.calls}"
+        assert stub.peak_active <= 3 and len(stub.peers) <= 3
+        assert synced_ids(linked) == set(linked) and not synced_ids(unlinked)
+        assert engine.stats() == dict(engine.stats(), synced=250, batches=7, failures=0)
+        assert engine.load_checkpoint() == 0, "A finished pass should reset the checkpoint"
+    print("✓ Batched sync test passed")
+
+def test_retries_and_failures():
+    """Test that transient errors are retried, and refused or rejected records stay unsynced"""
+    clear_patients()
+    ids = make_records("abha-retry", 30, "91-4444-5555-6666")
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'checkpoint.json')
+        engine = run_sync(StubAbdm(failures=[503, 429]), checkpoint, batch_size=50, max_concurrency=1)
+        assert engine.retries == 2 and engine.failures == 0
+        assert synced_ids(ids) == set(ids)
+    
+    ids = make_records("abha-retry", 30, "91-4444-5555-6666")
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'checkpoint.json')
+        engine = run_sync(StubAbdm(failures=[503] * 3), checkpoint, batch_size=50, max_retries=2)
+        assert engine.failures == 30 and not synced_ids(ids), "Retries should give up after max_retries"
+        
+        engine = run_sync(StubAbdm(failures=[400]), checkpoint, batch_size=50)
+        assert engine.retries == 0 and engine.failures == 30, "A 400 should not be retried"
+        
+        engine = run_sync(StubAbdm(reject=ids[:5]), checkpoint, batch_size=50)
+        assert engine.rejected == 5 and synced_ids(ids) == set(ids[5:])
+    print("✓ Retry and failure test passed")
+
+def test_resumes_from_checkpoint():
+    """Test that a bounded run checkpoints its progress and the next run carries on from there"""
+    clear_patients()
+    ids = make_records("abha-resume", 120, "91-7777-8888-9999")
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, 'checkpoint.json')
+        first = StubAbdm(reject=ids[10:11])
+        run_sync(first, checkpoint, max_records=50, batch_size=20, max_concurrency=2)
+        assert sorted(first.received) == ids[:50]
+        assert AbhaSyncEngine(checkpoint_path=checkpoint).load_checkpoint() == ids[49]
+        
+        second = StubAbdm()
+        run_sync(second, checkpoint, batch_size=20, max_concurrency=2)
+        assert sorted(second.received) == ids[50:], "The rejected record waits for the next pass"
+        
+        third = StubAbdm()
+        run_sync(third, checkpoint, batch_size=20)
+        assert third.received == [ids[10]]
+        assert synced_ids(ids) == set(ids)
+    print("✓ Checkpoint resume test passed")
+
+if __name__ == "__main__":
+    print("Running ABDM sync tests...")
+    test_syncs_in_batches()
+    test_retries_and_failures()
+    test_resumes_from_checkpoint()
+    print("All ABDM sync tests passed!")
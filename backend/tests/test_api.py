@@ -63,6 +63,38 @@ def test_diagnose_endpoint():
     print("✓ Diagnose endpoint test passed")
     return True
 
+@retry_request
+def test_batch_diagnose_endpoint():
+    """Test the batch diagnose endpoint"""
+    print("Testing batch diagnose endpoint...")
+    payload = {
+        "batch": [
+            ["fever", "cough", "headache"],
+            ["increased thirst", "frequent urination"],
+            ["headache", "nausea"]
+        ],
+        "language": "en"
+    }
+    
+    response = requests.post(f"{BASE_URL}/diagnose/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    
+    # One result per batch item, in request order
+    assert data["count"] == len(payload["batch"])
+    assert len(data["results"]) == len(payload["batch"])
+    for result in data["results"]:
+        assert "diagnosis" in result
+        assert "confidence" in result
+        assert "severity" in result
+    
+    # Empty items are rejected
+    response = requests.post(f"{BASE_URL}/diagnose/batch", json={"batch": [["fever"], []]})
+    assert response.status_code == 400
+    
+    print("✓ Batch diagnose endpoint test passed")
+    return True
+
 @retry_request
 def test_multilingual_diagnosis():
     """Test diagnosis with non-English symptoms"""
@@ -111,6 +143,15 @@ def run_all_tests():
         print(f"Diagnose endpoint test failed: {e}")
         tests_failed += 1
     
+    try:
+        if test_batch_diagnose_endpoint():
+            tests_passed += 1
+        else:
+            tests_failed += 1
+    except Exception as e:
+        print(f"Batch diagnose endpoint test failed: {e}")
+        tests_failed += 1
+    
     # Only run multilingual test if translation service is available
     try:
         if test_multilingual_diagnosis():
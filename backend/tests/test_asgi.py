@@ -0,0 +1,95 @@
+import sys
+import os
+import json
+import asyncio
+import tempfile
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never write to the development database
+os.environ.setdefault('DATABASE_PATH', os.path.join(tempfile.gettempdir(), 'kiosk_test.sqlite3'))
+
+from asgi import DiagnosisApp
+from services.diagnostic_service import DiagnosticService
+
+async def call(app, method, path, body=None):
+    """Send one HTTP request through the ASGI app; return (status, json)"""
+    payload = b'' if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app({'type': 'http', 'method': method, 'path': path, 'headers': []}, receive, send)
+    body = sent[1]['body']
+    return sent[0]['status'], json.loads(body) if body else None
+
+def test_diagnose_and_health():
+    """Test that the ASGI app keeps the Flask contract"""
+    service = DiagnosticService(cache_size=0)
+    app = DiagnosisApp(service, inference_threads=2)
+    
+    async def scenario():
+        status, result = await call(app, 'POST', '/api/diagnose', {"symptoms": ["fever", "cough"], "language": "en"})
+        assert status == 200
+        assert result == service.process_symptoms(["fever", "cough"])
+        
+        assert (await call(app, 'POST', '/api/diagnose', {"symptoms": []}))[0] == 400
+        assert (await call(app, 'POST', '/api/diagnose', b'{not json'))[0] == 400
+        assert (await call(app, 'GET', '/api/unknown'))[0] == 404
+        
+        status, health = await call(app, 'GET', '/api/health')
+        assert status == 200 and health["status"] == "ok" and health["model_available"]
+    
+    asyncio.run(scenario())
+    print("✓ ASGI contract test passed")
+
+def test_thousands_in_flight():
+    """Test that thousands of concurrent requests complete on one event loop"""
+    service = DiagnosticService(cache_size=0)
+    service.enable_micro_batching(max_batch_size=256, max_delay_ms=2)
+    app = DiagnosisApp(service, inference_threads=2)
+    
+    async def scenario():
+        requests = [call(app, 'POST', '/api/diagnose', {"symptoms": ["headache", "nausea"]}) for _ in range(2000)]
+        responses = await asyncio.gather(*requests)
+        assert all(status == 200 for status, _ in responses)
+        assert len({result["diagnosis"] for _, result in responses}) == 1
+        assert app.peak_in_flight > 100, "Requests should overlap instead of running one at a time"
+        assert app.in_flight == 0
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        service.disable_micro_batching()
+    print("✓ Concurrent in-flight test passed")
+
+def test_rejects_beyond_limit():
+    """Test that requests past the in-flight limit get 503"""
+    service = DiagnosticService(cache_size=0)
+    service.enable_micro_batching(max_batch_size=64, max_delay_ms=50)
+    app = DiagnosisApp(service, max_in_flight=10)
+    
+    async def scenario():
+        responses = await asyncio.gather(*[call(app, 'POST', '/api/diagnose', {"symptoms": ["fever"]}) for _ in range(30)])
+        statuses = [status for status, _ in responses]
+        assert statuses.count(200) == 10 and statuses.count(503) == 20
+        assert app.rejected == 20
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        service.disable_micro_batching()
+    print("✓ In-flight limit test passed")
+
+if __name__ == "__main__":
+    print("Running ASGI app tests...")
+    test_diagnose_and_health()
+    test_thousands_in_flight()
+    test_rejects_beyond_limit()
+    print("All tests passed!")
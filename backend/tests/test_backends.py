@@ -0,0 +1,56 @@
+import sys
+import os
+import importlib.util
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.backends import BACKEND_LOADERS, resolve_backend
+from services.diagnostic_service import DiagnosticService
+
+def available_backends():
+    """Backends whose runtime package is installed here"""
+    modules = {'tflite_runtime': 'tflite_runtime', 'ai_edge_litert': 'ai_edge_litert', 'tensorflow': 'tensorflow', 'numpy': 'numpy'}
+    return [name for name in BACKEND_LOADERS if importlib.util.find_spec(modules[name]) is not None]
+
+def test_unknown_backend_rejected():
+    """Test that a misspelled backend name fails loudly"""
+    try:
+        resolve_backend('tensorflw')
+        assert False, "Expected ValueError for an unknown backend"
+    except ValueError:
+        pass
+    print("✓ Unknown backend test passed")
+
+def test_model_loads_lazily():
+    """Test that constructing the service does not load the model"""
+    service = DiagnosticService()
+    assert not service.model_version._model_loaded, "Model should not load until first use"
+    
+    result = service.process_symptoms(["fever", "cough"])
+    assert service.model_version._model_loaded and service.backend_name is not None, "First request should load the model"
+    assert "diagnosis" in result
+    print("✓ Lazy loading test passed")
+
+def test_backends_agree():
+    """Test that every installed backend produces the same diagnosis"""
+    symptoms = ["increased thirst", "frequent urination", "weight loss", "fatigue"]
+    results = {}
+    for backend in available_backends():
+        service = DiagnosticService(backend=backend, cache_size=0, lazy=False)
+        assert service.backend_name == backend, f"Expected {backend}, got {service.backend_name}"
+        results[backend] = service.process_symptoms(symptoms)
+    
+    assert results, "No interpreter backend is installed"
+    reference = next(iter(results.values()))
+    for backend, result in results.items():
+        assert result["diagnosis"] == reference["diagnosis"], f"{backend} disagrees"
+        assert abs(result["confidence"] - reference["confidence"]) < 1e-5, f"{backend} confidence differs"
+    print(f"✓ Backend agreement test passed ({', '.join(results)})")
+
+if __name__ == "__main__":
+    print("Running interpreter backend tests...")
+    test_unknown_backend_rejected()
+    test_model_loads_lazily()
+    test_backends_agree()
+    print("All tests passed!")
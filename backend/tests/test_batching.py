@@ -0,0 +1,99 @@
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.batching import MicroBatcher
+from services.diagnostic_service import DiagnosticService
+
+def test_results_routed_to_callers():
+    """Test that every caller gets the result for its own item"""
+    seen_batches = []
+    
+    def process_batch(items):
+        seen_batches.append(len(items))
+        return [item * 10 for item in items]
+    
+    batcher = MicroBatcher(process_batch, max_batch_size=8, max_delay_ms=20)
+    results = {}
+    
+    def caller(i):
+        results[i] = batcher.process(i, timeout=5)
+    
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+    
+    assert results == {i: i * 10 for i in range(20)}, "Results were mixed up between callers"
+    assert max(seen_batches) <= 8, f"Batch exceeded max size: {max(seen_batches)}"
+    assert len(seen_batches) < 20, "Concurrent requests should have been coalesced"
+    
+    stats = batcher.stats()
+    assert stats["items"] == 20 and stats["batch_size"]["count"] == stats["batches"]
+    print("✓ Micro-batch routing test passed")
+
+def test_max_delay_flushes_partial_batch():
+    """Test that a lone request is not held longer than the max delay"""
+    batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_delay_ms=10)
+    
+    start = time.perf_counter()
+    assert batcher.process("only", timeout=5) == "only"
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    
+    assert elapsed < 1.0, f"Single request took {elapsed:.3f}s"
+    print("✓ Micro-batch max delay test passed")
+
+def test_batch_errors_reach_every_caller():
+    """Test that a failing batch raises in each waiting caller"""
+    def process_batch(items):
+        raise ValueError("boom")
+    
+    batcher = MicroBatcher(process_batch, max_batch_size=4, max_delay_ms=5)
+    try:
+        batcher.process(1, timeout=5)
+        assert False, "Expected the batch error to propagate"
+    except ValueError:
+        pass
+    batcher.close()
+    print("✓ Micro-batch error test passed")
+
+def test_service_micro_batching():
+    """Test that coalesced diagnosis matches the direct path"""
+    service = DiagnosticService(cache_size=0)
+    cases = [
+        ["fever", "cough", "runny nose"],
+        ["increased thirst", "frequent urination"],
+        ["headache", "nausea"]
+    ]
+    expected = [service.process_symptoms(symptoms) for symptoms in cases]
+    
+    service.enable_micro_batching(max_batch_size=4, max_delay_ms=5)
+    results = [None] * len(cases)
+    
+    def caller(i):
+        results[i] = service.process_symptoms(cases[i], "hi" if i % 2 else "en")
+    
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(len(cases))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service.disable_micro_batching()
+    
+    assert results == expected, "Micro-batched results differ from direct results"
+    print("✓ Service micro-batching test passed")
+
+if __name__ == "__main__":
+    print("Running micro-batching tests...")
+    test_results_routed_to_callers()
+    test_max_delay_flushes_partial_batch()
+    test_batch_errors_reach_every_caller()
+    test_service_micro_batching()
+    print("All tests passed!")
@@ -0,0 +1,134 @@
+import sys
+import os
+import asyncio
+from aiohttp import web
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.stub_server import StubServer
+from utils.bhashini import BhashiniClient
+
+class StubTranslator(StubServer):
+    """Local stand-in for the /translate endpoint that records how it is called"""
+    
+    path = '/translate'
+    
+    def __init__(self, delay=0.0, accept_lists=True):
+        super().__init__(delay)
+        self.accept_lists = accept_lists
+        self.calls = []
+    
+    async def respond(self, request):
+        data = await request.json()
+        text = data["text"]
+        self.calls.append(text)
+        if isinstance(text, list):
+            if not self.accept_lists:
+                return web.json_response({"error": "text must be a string"}, status=400)
+            return web.json_response({"translated_text": [f"[{data['target_language']}] {t}" for t in text]})
+        return web.json_response({"translated_text": f"[{data['target_language']}] {text}"})
+
+def run_with_stub(scenario, **stub_options):
+    """Run ``scenario(stub, url)`` against a fresh stub server"""
+    async def main():
+        stub = StubTranslator(**stub_options)
+        url = await stub.start()
+        try:
+            await scenario(stub, url)
+        finally:
+            await stub.stop()
+    asyncio.run(main())
+
+def test_translate_many_batches_and_dedupes():
+    """Test that repeated strings are sent once and packed into few calls"""
+    texts = [f"line {i % 50}" for i in range(120)] + ["", "line 0"]
+    
+    async def scenario(stub, url):
+        async with BhashiniClient(url, max_batch=20) as client:
+            translated = await client.translate_many(texts, "en", "hi")
+        assert translated == [f"[hi] {t}" if t else "" for t in texts]
+        assert len(stub.calls) == 3, f"Expected 3 calls for 50 distinct strings, got {len(stub.calls)}"
+        assert sum(len(call) for call in stub.calls) == 50
+    
+    run_with_stub(scenario)
+    print("✓ Batching test passed")
+
+def test_connections_are_reused():
+    """Test that many translations reuse a few keep-alive connections"""
+    async def scenario(stub, url):
+        async with BhashiniClient(url, max_connections=4, max_concurrency=4) as client:
+            for _ in range(5):
+                await asyncio.gather(*[client.translate(f"word {i}", "en", "ta") for i in range(20)])
+        assert len(stub.calls) == 100
+        assert all(isinstance(call, str) for call in stub.calls), "Single strings keep the original request shape"
+        assert len(stub.peers) <= 4, f"Opened {len(stub.peers)} connections for 100 calls"
+        assert stub.peak_active <= 4
+    
+    run_with_stub(scenario, delay=0.01)
+    print("✓ Connection reuse and concurrency limit test passed")
+
+def test_failures_and_timeouts():
+    """Test that upstream errors and timeouts translate to None without hanging"""
+    async def rejected(stub, url):
+        async with BhashiniClient(url, max_batch=10) as client:
+            assert await client.translate_many(["a", "b"], "en", "hi") == [None, None]
+            assert await client.translate("a", "en", "hi") == "[hi] a"
+            assert client.stats()["failures"] == 2
+    
+    async def slow(stub, url):
+        async with BhashiniClient(url, timeout=0.1) as client:
+            assert await asyncio.wait_for(client.translate("slow", "en", "hi"), 5) is None
+    
+    run_with_stub(rejected, accept_lists=False)
+    run_with_stub(slow, delay=1.0)
+    print("✓ Failure and timeout test passed")
+
+def test_same_language_skips_upstream():
+    """Test that translating to the source language makes no call"""
+    async def scenario(stub, url):
+        async with BhashiniClient(url) as client:
+            assert await client.translate_many(["fever", "cough"], "en", "en") == ["fever", "cough"]
+        assert stub.calls == []
+    
+    run_with_stub(scenario)
+    print("✓ Same-language test passed")
+
+def test_one_text_per_call_by_default():
+    """Test that without opting in to list batching every call carries a single string"""
+    async def scenario(stub, url):
+        async with BhashiniClient(url) as client:
+            assert await client.translate_many(["fever", "cough", "rash"], "en", "hi") == \
+                ["[hi] fever", "[hi] cough", "[hi] rash"]
+        assert sorted(stub.calls) == ["cough", "fever", "rash"]
+    
+    run_with_stub(scenario, accept_lists=False)
+    print("✓ One text per call test passed")
+
+def test_session_is_closed_when_the_loop_changes():
+    """Test that moving to a new event loop closes the old session instead of leaking it"""
+    client = BhashiniClient("http://127.0.0.1:9")
+    sessions = []
+    
+    async def scenario(stub, url):
+        client.api_url = url
+        assert await client.translate("fever", "en", "hi") == "[hi] fever"
+        sessions.append(client._session)
+    
+    run_with_stub(scenario)
+    run_with_stub(scenario)
+    assert sessions[0] is not sessions[1]
+    assert sessions[0].closed, "The first loop's session should be closed once replaced"
+    asyncio.run(client.close())
+    assert sessions[1].closed
+    print("✓ Session replacement test passed")
+
+if __name__ == "__main__":
+    print("Running Bhashini client tests...")
+    test_translate_many_batches_and_dedupes()
+    test_connections_are_reused()
+    test_failures_and_timeouts()
+    test_same_language_skips_upstream()
+    test_one_text_per_call_by_default()
+    test_session_is_closed_when_the_loop_changes()
+    print("All tests passed!")
@@ -0,0 +1,91 @@
+import sys
+import os
+import io
+import json
+import tempfile
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bulk_diagnose import parse_args, read_records, resume_offset, run
+from benchmarks.workloads import synthetic_symptom_lists
+
+def write_jsonl(path, count):
+    with open(path, 'w') as f:
+        for i, symptoms in enumerate(synthetic_symptom_lists(count)):
+            f.write(json.dumps({"id": f"p{i}", "symptoms": symptoms}) + '\n')
+
+def read_output(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f]
+
+def test_reads_jsonl_and_csv():
+    """Test that both formats stream records with offsets, ids and per-record errors"""
+    jsonl = io.StringIO('{"id": 7, "symptoms": ["fever", "cough"]}\n'
+                        '["headache"]\n'
+                        '\n'
+                        '{"symptoms": "nausea; vomiting"}\n'
+                        '{"symptoms": 3}\n')
+    records = list(read_records(jsonl, 'jsonl'))
+    assert [r[0] for r in records] == [0, 1, 2, 3], "Blank lines should not count as records"
+    assert records[0][1:3] == (7, ["fever", "cough"])
+    assert records[1][1:3] == (None, ["headache"])
+    assert records[2][2] == ["nausea", "vomiting"]
+    assert records[3][2] is None and records[3][3], "A bad record should carry an error"
+    
+    csv_input = io.StringIO('id,symptoms\r\na,fever;cough\r\nb,\r\nc,"rash; itching"\r\n')
+    records = list(read_records(csv_input, 'csv', skip=1))
+    assert [(r[0], r[1], r[2]) for r in records] == [(1, 'b', []), (2, 'c', ['rash', 'itching'])]
+    print("✓ Record reader test passed")
+
+def test_bulk_run_in_order():
+    """Test that every record gets one output line, in input order, with or without workers"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'records.jsonl')
+        write_jsonl(source, 300)
+        with open(source, 'a') as f:
+            f.write('{broken\n')
+        
+        inline = os.path.join(tmp, 'inline.jsonl')
+        summary = run(parse_args([source, '--output', inline, '--chunk-size', '64']))
+        assert summary == dict(summary, rows=301, errors=1, skipped=0)
+        results = read_output(inline)
+        assert [r["offset"] for r in results] == list(range(301))
+        assert results[5]["id"] == "p5" and "diagnosis" in results[5]
+        assert "error" in results[-1]
+        
+        fanned = os.path.join(tmp, 'workers.jsonl')
+        run(parse_args([source, '--output', fanned, '--chunk-size', '32', '--workers', '2']))
+        assert read_output(fanned) == results, "Worker fan-out should not change results or order"
+    print("✓ Bulk run test passed")
+
+def test_resume_after_interruption():
+    """Test that a resumed run drops a half-written line and ends up identical to a clean run"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'records.jsonl')
+        write_jsonl(source, 200)
+        output = os.path.join(tmp, 'results.jsonl')
+        run(parse_args([source, '--output', output, '--chunk-size', '50']))
+        with open(output, 'rb') as f:
+            complete = f.read()
+        
+        # Cut the file off in the middle of a record
+        with open(output, 'wb') as f:
+            f.write(complete[:len(complete) // 2 + 11])
+        assert 0 < resume_offset(output) < 200
+        assert open(output, 'rb').read().endswith(b'\n'), "The partial line should be truncated"
+        
+        summary = run(parse_args([source, '--output', output, '--chunk-size', '50', '--resume']))
+        assert summary["skipped"] + summary["rows"] == 200
+        with open(output, 'rb') as f:
+            assert f.read() == complete
+        
+        assert resume_offset(os.path.join(tmp, 'missing.jsonl')) == 0
+    print("✓ Resume test passed")
+
+if __name__ == "__main__":
+    print("Running bulk diagnose tests...")
+    test_reads_jsonl_and_csv()
+    test_bulk_run_in_order()
+    test_resume_after_interruption()
+    print("All bulk diagnose tests passed!")
@@ -0,0 +1,218 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never write to the development database
+os.environ.setdefault('DATABASE_PATH', os.path.join(tempfile.gettempdir(), 'kiosk_test.sqlite3'))
+
+from services.diagnosis_recorder import DiagnosisRecorder
+
+RESULT = {"diagnosis": "Common Cold", "confidence": 0.8, "severity": "LOW", "recommendations": ["Rest"]}
+
+class FakeWriter:
+    """Collects batches instead of writing them; can be held to simulate a slow disk"""
+    
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+    
+    def __call__(self, rows):
+        self.gate.wait()
+        if self.fail:
+            raise OSError("disk I/O error")
+        self.batches.append(list(rows))
+
+def spill_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f]
+
+def test_batches_by_size_and_time():
+    """Test that rows are written in size-bounded batches, and a partial batch after the interval"""
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = FakeWriter()
+        writer.gate.clear()
+        recorder = DiagnosisRecorder(batch_size=100, flush_interval_ms=20, spill_path=os.path.join(tmp, 'spill.jsonl'),
+                                     write_batch=writer)
+        for i in range(250):
+            assert recorder.record([f"symptom {i}"], RESULT)
+        writer.gate.set()
+        assert recorder.flush(timeout=5.0)
+        assert sum(len(batch) for batch in writer.batches) == 250
+        assert max(len(batch) for batch in writer.batches) == 100
+        assert [row["symptoms"][0] for batch in writer.batches for row in batch] == [f"symptom {i}" for i in range(250)]
+        
+        started = time.perf_counter()
+        recorder.record(["fever"], RESULT, language="hi")
+        assert recorder.flush(timeout=5.0)
+        assert time.perf_counter() - started < 1.0, "A lone row should be written after the flush interval"
+        assert writer.batches[-1][0]["language"] == "hi" and writer.batches[-1][0]["severity_level"] == "LOW"
+        recorder.close()
+        assert recorder.stats()["written"] == 251
+    print("✓ Batching test passed")
+
+def test_backpressure_spills_and_replays():
+    """Test that a full queue spills rows to disk and the next recorder replays them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        writer = FakeWriter()
+        writer.gate.clear()
+        recorder = DiagnosisRecorder(max_queue=10, batch_size=5, enqueue_timeout_ms=5, spill_path=spill_path,
+                                     write_batch=writer)
+        accepted = [recorder.record([f"s{i}"], RESULT) for i in range(40)]
+        assert not all(accepted), "A full queue should push rows to the spill file"
+        assert len(spill_lines(spill_path)) == accepted.count(False)
+        
+        writer.gate.set()
+        recorder.close()
+        written = sum(len(batch) for batch in writer.batches)
+        assert written + len(spill_lines(spill_path)) == 40, "Every row is either written or spilled"
+        
+        replay_writer = FakeWriter()
+        replayed = DiagnosisRecorder(spill_path=spill_path, write_batch=replay_writer)
+        replayed.close()
+        replayed_rows = [row for batch in replay_writer.batches for row in batch]
+        assert sorted(row["symptoms"][0] for row in replayed_rows + [r for b in writer.batches for r in b]) == \
+            sorted(f"s{i}" for i in range(40))
+        assert all(row["replayed"] for row in replayed_rows)
+        assert not os.path.exists(spill_path), "A fully replayed spill file should be removed"
+    print("✓ Backpressure test passed")
+
+def test_failed_writes_are_kept():
+    """Test that a batch the database rejects lands in the spill file, not on the floor"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        recorder = DiagnosisRecorder(batch_size=10, flush_interval_ms=5, spill_path=spill_path,
+                                     write_batch=FakeWriter(fail=True))
+        for i in range(15):
+            recorder.record([f"s{i}"], RESULT)
+        assert recorder.flush(timeout=5.0)
+        recorder.close()
+        assert recorder.stats()["failures"] >= 1
+        assert sorted(row["symptoms"][0] for row in spill_lines(spill_path)) == sorted(f"s{i}" for i in range(15))
+    print("✓ Failed write test passed")
+
+def test_close_does_not_hang_on_a_stuck_writer():
+    """Test that close returns within its timeout when the writer is stuck and the queue is full"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        writer = FakeWriter()
+        writer.gate.clear()
+        recorder = DiagnosisRecorder(max_queue=5, batch_size=1, enqueue_timeout_ms=1, spill_path=spill_path,
+                                     write_batch=writer)
+        for i in range(20):
+            recorder.record([f"s{i}"], RESULT)
+        assert recorder.stats()["pending"] == 5
+        
+        started = time.perf_counter()
+        recorder.close(timeout=0.2)
+        assert time.perf_counter() - started < 2.0, "close should not wait on a stuck writer"
+        
+        # The row held by the stuck writer is written once it comes unstuck; everything else is on disk
+        writer.gate.set()
+        recorder._thread.join(5.0)
+        assert not recorder._thread.is_alive(), "The writer should exit once it is unstuck"
+        written = [row["symptoms"][0] for batch in writer.batches for row in batch]
+        spilled = [row["symptoms"][0] for row in spill_lines(spill_path)]
+        assert sorted(written + spilled) == sorted(f"s{i}" for i in range(20))
+    print("✓ Stuck writer close test passed")
+
+def test_replay_is_claimed_once_across_recorders():
+    """Test that recorders starting together replay a shared spill file once, and keep writing after"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        with open(spill_path, 'w') as f:
+            f.writelines(json.dumps({"symptoms": [f"s{i}"]}) + '\n' for i in range(100))
+        # Left by a replay that died part way
+        with open(spill_path + '.replay', 'w') as f:
+            f.writelines(json.dumps({"symptoms": [f"r{i}"]}) + '\n' for i in range(10))
+        
+        writer = FakeWriter()
+        writer.gate.clear()
+        recorders = []
+        threads = [threading.Thread(target=lambda: recorders.append(
+            DiagnosisRecorder(batch_size=10, flush_interval_ms=5, spill_path=spill_path, write_batch=writer)))
+            for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        time.sleep(0.05)
+        writer.gate.set()
+        for i, recorder in enumerate(recorders):
+            assert recorder.record([f"new{i}"], RESULT)
+            assert recorder.flush(timeout=5.0), "Every writer should still be running"
+            recorder.close()
+        
+        rows = [row["symptoms"][0] for batch in writer.batches for row in batch]
+        expected = [f"s{i}" for i in range(100)] + [f"r{i}" for i in range(10)] + [f"new{i}" for i in range(4)]
+        assert sorted(rows) == sorted(expected), "Each spilled row should be replayed exactly once"
+        assert [name for name in os.listdir(tmp) if name != 'spill.jsonl.lock'] == []
+    print("✓ Shared replay test passed")
+
+def test_failed_replay_does_not_stop_the_writer():
+    """Test that a replay that raises leaves the writer thread running"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        # Found as a replay left part way, but cannot be read as one
+        os.mkdir(spill_path + '.replay')
+        writer = FakeWriter()
+        recorder = DiagnosisRecorder(flush_interval_ms=5, spill_path=spill_path, write_batch=writer)
+        assert recorder.record(["fever"], RESULT)
+        assert recorder.flush(timeout=5.0)
+        recorder.close()
+        assert [row["symptoms"] for batch in writer.batches for row in batch] == [["fever"]]
+    print("✓ Failed replay test passed")
+
+def test_writes_diagnosis_records():
+    """Test that the default writer bulk-inserts Diagnosis rows into SQLite in WAL mode"""
+    from config.database import setup_database
+    setup_database()
+    from django.db import connection
+    from models.diagnosis import Diagnosis
+    
+    marker = f"test-{os.getpid()}"
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, 'spill.jsonl')
+        with open(spill_path, 'w') as f:
+            row = DiagnosisRecorder._row(["cough"], RESULT, marker, None)
+            f.write(json.dumps(dict(row, recorded_at=946684800.0)) + '\n')
+        
+        recorder = DiagnosisRecorder(batch_size=50, flush_interval_ms=10, spill_path=spill_path)
+        for i in range(120):
+            recorder.record(["fever", f"symptom {i}"], RESULT, marker)
+        assert recorder.flush(timeout=10.0)
+        recorder.close()
+    
+    records = Diagnosis.objects.filter(language=marker)
+    assert records.count() == 121
+    record = records.get(symptoms=["fever", "symptom 7"])
+    assert record.diagnosis_result["diagnosis"] == "Common Cold" and record.severity_level == "LOW"
+    assert record.user_id is None
+    assert records.get(symptoms=["cough"]).created_at.year == 2000, "Replayed rows keep their triage time"
+    
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        assert cursor.fetchone()[0] == 'wal'
+    records.delete()
+    print("✓ Diagnosis record test passed")
+
+if __name__ == "__main__":
+    print("Running diagnosis recorder tests...")
+    test_batches_by_size_and_time()
+    test_backpressure_spills_and_replays()
+    test_failed_writes_are_kept()
+    test_close_does_not_hang_on_a_stuck_writer()
+    test_replay_is_claimed_once_across_recorders()
+    test_failed_replay_does_not_stop_the_writer()
+    test_writes_diagnosis_records()
+    print("All diagnosis recorder tests passed!")
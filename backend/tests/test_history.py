@@ -0,0 +1,102 @@
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never write to the development database
+os.environ.setdefault('DATABASE_PATH', os.path.join(tempfile.gettempdir(), 'kiosk_test.sqlite3'))
+
+from config.database import setup_database
+from services.history_service import InvalidCursor, decode_cursor, diagnosis_history, encode_cursor, \
+    health_record_history
+
+def make_patient(name):
+    from models.user import User
+    User.objects.filter(username=name).delete()
+    return User.objects.create(username=name, phone_number=f"+91{abs(hash(name)) % 10**10:010d}")
+
+def page_through(fetch, limit, **filters):
+    """Every row, following next_cursor until it runs out"""
+    rows, cursor, pages = [], None, 0
+    while True:
+        page = fetch(cursor=cursor, limit=limit, **filters)
+        rows.extend(page["results"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+def test_cursor_round_trip():
+    """Test that cursors decode to what was encoded and foreign cursors are rejected"""
+    created_at = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    for bad in ("not-a-cursor", encode_cursor(created_at, 42)[:-3], ""):
+        try:
+            decode_cursor(bad)
+            assert False, f"{bad!r} should be rejected"
+        except InvalidCursor:
+            pass
+    print("✓ Cursor round trip test passed")
+
+def test_diagnosis_history_pages():
+    """Test that keyset pages cover a patient's history once each, newest first, across timestamp ties"""
+    setup_database()
+    from models.diagnosis import Diagnosis
+    
+    patient = make_patient("history-patient")
+    other = make_patient("history-other")
+    severities = ("LOW", "MEDIUM", "HIGH")
+    Diagnosis.objects.bulk_create([
+        Diagnosis(user=patient if i % 4 else other, symptoms=[f"s{i}"], diagnosis_result={"diagnosis": "Flu"},
+                  confidence_score=0.5, severity_level=severities[i % 3])
+        for i in range(103)
+    ])
+    mine = Diagnosis.objects.filter(user=patient)
+    # Rows sharing a timestamp are ordered by id
+    base = datetime(2026, 5, 1, tzinfo=timezone.utc)
+    for n, pk in enumerate(mine.values_list('id', flat=True)):
+        Diagnosis.objects.filter(id=pk).update(created_at=base + timedelta(seconds=n // 5))
+    
+    expected = list(mine.order_by('-created_at', '-id').values_list('id', flat=True))
+    rows, pages = page_through(diagnosis_history, 7, user_id=patient.id)
+    assert [row["id"] for row in rows] == expected
+    assert pages == -(-len(expected) // 7)
+    assert set(rows[0]) >= {"symptoms", "diagnosis_result", "severity_level", "created_at"}
+    assert isinstance(rows[0]["created_at"], str)
+    
+    rows, _ = page_through(diagnosis_history, 10, severity="HIGH")
+    assert [row["id"] for row in rows] == \
+        list(Diagnosis.objects.filter(severity_level="HIGH").order_by('-created_at', '-id').values_list('id', flat=True))
+    
+    first = diagnosis_history(user_id=patient.id, limit=10 ** 6)
+    assert len(first["results"]) == 77 and first["next_cursor"] is None, "An oversized limit is capped, and 77 rows fit in one page"
+    
+    patient.delete()
+    other.delete()
+    print("✓ Diagnosis history test passed")
+
+def test_health_record_history_pages():
+    """Test that health records page the same way"""
+    setup_database()
+    from models.health_record import HealthRecord
+    
+    patient = make_patient("history-records")
+    HealthRecord.objects.bulk_create([
+        HealthRecord(user=patient, record_type="vitals", data={"pulse": 60 + i}, source="kiosk")
+        for i in range(25)
+    ])
+    rows, pages = page_through(health_record_history, 10, user_id=patient.id)
+    assert pages == 3
+    assert [row["data"]["pulse"] for row in rows] == list(range(84, 59, -1))
+    patient.delete()
+    print("✓ Health record history test passed")
+
+if __name__ == "__main__":
+    print("Running history tests...")
+    test_cursor_round_trip()
+    test_diagnosis_history_pages()
+    test_health_record_history_pages()
+    print("All history tests passed!")
@@ -0,0 +1,105 @@
+import sys
+import os
+import threading
+import time
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.interpreter_pool import InterpreterPool, PoolTimeoutError
+
+class FakeInterpreter:
+    """Stands in for tf.lite.Interpreter: doubles its input"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.shape = [1, 4]
+        self.tensor = None
+    
+    def allocate_tensors(self):
+        pass
+    
+    def get_input_details(self):
+        return [{'index': 0, 'shape': np.array(self.shape)}]
+    
+    def get_output_details(self):
+        return [{'index': 1}]
+    
+    def resize_tensor_input(self, index, shape):
+        self.shape = shape
+    
+    def set_tensor(self, index, value):
+        assert list(value.shape) == list(self.shape), "Input does not match allocated shape"
+        self.tensor = value
+    
+    def invoke(self):
+        time.sleep(self.delay)
+    
+    def get_tensor(self, index):
+        return self.tensor * 2
+
+def test_pool_runs_batches():
+    """Test that pooled interpreters resize for any batch size"""
+    pool = InterpreterPool(FakeInterpreter, size=2, timeout=1.0)
+    
+    single = pool.run(np.ones((1, 4), dtype=np.float32))
+    batch = pool.run(np.ones((8, 4), dtype=np.float32))
+    assert single.shape == (1, 4) and batch.shape == (8, 4), "Output shape should follow the input batch"
+    assert (batch == 2).all(), "Output should come from the checked-out interpreter"
+    print("✓ Pool batch test passed")
+
+def test_pool_concurrent_checkout():
+    """Test that concurrent callers never share an interpreter"""
+    pool = InterpreterPool(lambda: FakeInterpreter(delay=0.01), size=3, timeout=5.0)
+    active = set()
+    active_lock = threading.Lock()
+    errors = []
+    
+    def worker():
+        for _ in range(5):
+            with pool.checkout() as pooled:
+                with active_lock:
+                    if id(pooled) in active:
+                        errors.append("interpreter checked out twice")
+                    active.add(id(pooled))
+                pooled.run(np.ones((1, 4), dtype=np.float32))
+                with active_lock:
+                    active.discard(id(pooled))
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    stats = pool.stats()
+    assert not errors, errors[0] if errors else ""
+    assert stats["checkouts"] == 40, f"Expected 40 checkouts, got {stats['checkouts']}"
+    assert stats["in_use"] == 0, "All interpreters should be returned"
+    assert stats["peak_in_use"] == 3, f"Pool should have been saturated, peak was {stats['peak_in_use']}"
+    assert stats["wait_seconds"]["count"] == 40, "Every checkout should record its wait time"
+    print("✓ Pool concurrency test passed")
+
+def test_pool_timeout():
+    """Test that a saturated pool gives up after the wait timeout"""
+    pool = InterpreterPool(FakeInterpreter, size=1, timeout=0.05)
+    
+    with pool.checkout():
+        try:
+            with pool.checkout():
+                pass
+            assert False, "Expected PoolTimeoutError"
+        except PoolTimeoutError:
+            pass
+        assert pool.stats()["saturation"] == 1.0, "Pool with every interpreter out should be saturated"
+    
+    assert pool.stats()["timeouts"] == 1, "Timeout should be counted"
+    print("✓ Pool timeout test passed")
+
+if __name__ == "__main__":
+    print("Running interpreter pool tests...")
+    test_pool_runs_batches()
+    test_pool_concurrent_checkout()
+    test_pool_timeout()
+    print("All tests passed!")
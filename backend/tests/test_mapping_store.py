@@ -0,0 +1,66 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.mapping_store import COMPILED_NAME, compile_mappings, load_mappings
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', 'models')
+SOURCES = ['symptom_mapping.json', 'condition_mapping.json', 'symptom_synonyms.json']
+
+def copy_sources():
+    directory = tempfile.mkdtemp()
+    for name in SOURCES:
+        shutil.copy(os.path.join(MODELS_DIR, name), directory)
+    return directory, [os.path.join(directory, name) for name in SOURCES]
+
+def test_compiled_matches_json():
+    """Test that the compiled mappings load back identical to the JSON files"""
+    directory, paths = copy_sources()
+    try:
+        output = os.path.join(directory, COMPILED_NAME)
+        compile_mappings(*paths, output)
+        symptom_mapping, conditions, synonyms = load_mappings(output, *paths)
+
+        with open(paths[0], 'r') as f:
+            assert symptom_mapping == json.load(f)
+        with open(paths[1], 'r') as f:
+            assert conditions == json.load(f)
+        with open(paths[2], 'r', encoding='utf-8') as f:
+            assert synonyms == json.load(f)
+    finally:
+        shutil.rmtree(directory)
+    print("✓ Compiled mappings test passed")
+
+def test_stale_or_missing_compiled_file_ignored():
+    """Test that a compiled file is not used once its JSON sources change"""
+    directory, paths = copy_sources()
+    try:
+        output = os.path.join(directory, COMPILED_NAME)
+        assert load_mappings(output, *paths) is None, "Missing file should load as None"
+
+        compile_mappings(*paths, output)
+        with open(paths[1], 'r') as f:
+            conditions = json.load(f)
+        with open(paths[1], 'w') as f:
+            json.dump(conditions[::-1], f)
+        stat = os.stat(paths[1])
+        os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert load_mappings(output, *paths) is None, "Stale compiled file should be ignored"
+
+        with open(output, 'wb') as f:
+            f.write(b'garbage')
+        assert load_mappings(output, *paths) is None, "Corrupt compiled file should be ignored"
+    finally:
+        shutil.rmtree(directory)
+    print("✓ Stale compiled mappings test passed")
+
+if __name__ == "__main__":
+    print("Running mapping store tests...")
+    test_compiled_matches_json()
+    test_stale_or_missing_compiled_file_ignored()
+    print("All mapping store tests passed!")
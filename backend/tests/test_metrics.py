@@ -0,0 +1,82 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import MetricsRegistry, merge_snapshots, render_text
+from services.diagnostic_service import DiagnosticService, DIAGNOSES, FALLBACKS, STAGE_SECONDS
+
+def sample_count(metric, *values):
+    sample = metric.samples().get(values)
+    if sample is None:
+        return 0
+    return sample[2] if metric.type == 'histogram' else sample
+
+def test_exposition_format():
+    """Test counters and histograms render in the Prometheus text format"""
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('outcome',))
+    latency = registry.histogram('latency_seconds', 'Latency', (0.1, 1.0))
+    requests.inc(2, 'ok')
+    requests.labels('error').inc()
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3.0)
+    
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{outcome="ok"} 2' in text
+    assert 'requests_total{outcome="error"} 1' in text
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    assert registry.counter('requests_total', 'Requests', ('outcome',)) is requests, "Re-registering should reuse the metric"
+    print("✓ Exposition format test passed")
+
+def test_snapshots_merge_across_processes():
+    """Test that snapshots from several registries add up"""
+    registries = [MetricsRegistry() for _ in range(3)]
+    for registry in registries:
+        registry.counter('rows_total', 'Rows').inc(5)
+        registry.histogram('wait_seconds', 'Wait', (1.0,)).observe(0.5)
+    
+    merged = merge_snapshots([registry.snapshot() for registry in registries])
+    text = render_text(merged)
+    assert 'rows_total 15' in text
+    assert 'wait_seconds_bucket{le="1.0"} 3' in text
+    print("✓ Snapshot merge test passed")
+
+def test_service_records_stages_and_outcomes():
+    """Test that the service times each stage and counts outcomes"""
+    service = DiagnosticService(cache_size=16)
+    symptoms = ["fever", "cough", "fatigue"]
+    before = {stage: sample_count(STAGE_SECONDS, stage)
+              for stage in ('preprocess', 'set_tensor', 'invoke', 'postprocess', 'severity')}
+    model, cache = sample_count(DIAGNOSES, 'model'), sample_count(DIAGNOSES, 'cache')
+    
+    service.process_symptoms(symptoms)
+    service.process_symptoms(symptoms)
+    if service.interpreter_pool:
+        assert sample_count(DIAGNOSES, 'model') == model + 1
+        for stage, count in before.items():
+            assert sample_count(STAGE_SECONDS, stage) == count + 1, f"Stage {stage} was not timed"
+    assert sample_count(DIAGNOSES, 'cache') == cache + 1
+    
+    # No model at all: the rules answer, and that is counted rather than silent
+    unavailable = sample_count(FALLBACKS, 'model_unavailable')
+    broken = DiagnosticService(cache_size=0)
+    broken.model_path = '/nonexistent/model.tflite'
+    broken.registry.active = broken._build_version()
+    broken.process_symptoms(symptoms)
+    assert sample_count(FALLBACKS, 'model_unavailable') == unavailable + 1
+    print("✓ Service metrics test passed")
+
+if __name__ == "__main__":
+    print("Running metrics tests...")
+    test_exposition_format()
+    test_snapshots_merge_across_processes()
+    test_service_records_stages_and_outcomes()
+    print("All metrics tests passed!")
@@ -1,5 +1,6 @@
 import sys
 import os
+import threading
 import numpy as np
 
 # Add the parent directory to the path so we can import the services
@@ -67,6 +68,55 @@ def test_diagnosis():
     
     print("✓ Diagnosis test passed")
 
+def test_batch_diagnosis():
+    """Test that batched diagnosis matches per-call diagnosis"""
+    model = DiagnosticService(cache_size=0)
+    
+    batch = [
+        ["fever", "cough", "runny nose", "sore throat"],
+        ["increased thirst", "frequent urination", "weight loss", "fatigue"],
+        ["unknown_symptom1", "unknown_symptom2"],
+        ["headache", "nausea"]
+    ]
+    batch_results = model.process_symptoms_batch(batch)
+    
+    # One result per row, in the same order as the input
+    assert len(batch_results) == len(batch), f"Expected {len(batch)} results, got {len(batch_results)}"
+    for symptoms, result in zip(batch, batch_results):
+        assert result == model.process_symptoms(symptoms), f"Batch result differs for {symptoms}"
+    
+    # Empty batches need no inference
+    assert model.process_symptoms_batch([]) == [], "Empty batch should return no results"
+    
+    print("✓ Batch diagnosis test passed")
+
+def test_concurrent_diagnosis():
+    """Test that concurrent requests through the interpreter pool get consistent results"""
+    model = DiagnosticService(pool_size=2, cache_size=0)
+    cases = [
+        ["fever", "cough", "runny nose", "sore throat"],
+        ["increased thirst", "frequent urination", "weight loss", "fatigue"],
+        ["headache", "nausea", "dizziness"]
+    ]
+    expected = [model.process_symptoms(symptoms) for symptoms in cases]
+    mismatches = []
+    
+    def worker():
+        for _ in range(20):
+            for symptoms, result in zip(cases, expected):
+                if model.process_symptoms(symptoms) != result:
+                    mismatches.append(symptoms)
+    
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not mismatches, f"Concurrent results differ for {mismatches[0] if mismatches else None}"
+    assert model.interpreter_pool.stats()["in_use"] == 0, "All interpreters should be returned to the pool"
+    print("✓ Concurrent diagnosis test passed")
+
 def test_severity_determination():
     """Test severity determination"""
     model = DiagnosticService()
@@ -90,5 +140,7 @@ if __name__ == "__main__":
     test_model_loading()
     test_symptom_preprocessing()
     test_diagnosis()
+    test_batch_diagnosis()
+    test_concurrent_diagnosis()
     test_severity_determination()
     print("All tests passed!")
\ No newline at end of file
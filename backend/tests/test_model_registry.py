@@ -0,0 +1,191 @@
+import sys
+import os
+import gc
+import json
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.diagnostic_service import DiagnosticService
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', 'models')
+MODEL_FILES = ['diagnostic_model.tflite', 'symptom_mapping.json', 'symptom_synonyms.json', 'condition_mapping.json']
+
+SYMPTOMS = ["increased thirst", "frequent urination", "weight loss", "fatigue"]
+
+def service_on_copy(**kwargs):
+    """Service serving a private copy of the model files, so a test can change them"""
+    directory = tempfile.mkdtemp()
+    for name in MODEL_FILES:
+        shutil.copy(os.path.join(MODELS_DIR, name), directory)
+    
+    service = DiagnosticService(**kwargs)
+    service.model_path = os.path.join(directory, 'diagnostic_model.tflite')
+    service.symptom_mapping_path = os.path.join(directory, 'symptom_mapping.json')
+    service.symptom_synonyms_path = os.path.join(directory, 'symptom_synonyms.json')
+    service.condition_mapping_path = os.path.join(directory, 'condition_mapping.json')
+    assert service.reload_model(force=True)["status"] == "swapped"
+    return service, directory
+
+def rewrite_conditions(directory, conditions):
+    path = os.path.join(directory, 'condition_mapping.json')
+    with open(path, 'w') as f:
+        json.dump(conditions, f)
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_unchanged_files_not_reloaded():
+    """Test that a reload without file changes keeps the active version"""
+    service, directory = service_on_copy()
+    try:
+        version = service.model_version
+        result = service.reload_model()
+        assert result["status"] == "unchanged", result
+        assert service.model_version is version
+    finally:
+        shutil.rmtree(directory)
+    print("✓ Unchanged reload test passed")
+
+def test_loaded_pool_does_not_load():
+    """Test that monitoring can read the pool without loading the model"""
+    service = DiagnosticService()
+    version = service._build_version()
+    assert version.loaded_pool is None, "loaded_pool should not load the model"
+    assert version.loaded_pool is None
+    pool = version.interpreter_pool
+    assert pool is not None and version.loaded_pool is pool
+    print("✓ Loaded pool test passed")
+
+def test_swap_replaces_model_and_mappings():
+    """Test that a reload serves the new mappings and drops stale cached results"""
+    service, directory = service_on_copy()
+    try:
+        before = service.process_symptoms(SYMPTOMS)
+        old_version = service.model_version
+        old_pool = weakref.ref(old_version.interpreter_pool)
+        conditions = list(service.conditions)
+        renamed = [f"{condition} (v2)" for condition in conditions]
+        rewrite_conditions(directory, renamed)
+        
+        result = service.reload_model()
+        assert result["status"] == "swapped", result
+        after = service.process_symptoms(SYMPTOMS)
+        assert after["diagnosis"] == f"{before['diagnosis']} (v2)", "Cached result from the old version was served"
+        assert service.registry.stats()["reloads"] >= 2
+        
+        # Once drained, the old version's interpreters are actually freed
+        deadline = time.monotonic() + 5
+        while service.registry.stats()["draining"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not service.registry.stats()["draining"]
+        assert old_version.interpreter_pool is None, "A drained version should not keep or reload its interpreters"
+        assert old_version.loaded_pool is None
+        del old_version
+        gc.collect()
+        assert old_pool() is None, "The drained interpreter pool should be freed"
+    finally:
+        shutil.rmtree(directory)
+    print("✓ Swap test passed")
+
+def test_broken_candidate_keeps_active_version():
+    """Test that unreadable or mismatched files are rejected and the old version keeps serving"""
+    service, directory = service_on_copy()
+    try:
+        version = service.model_version
+        conditions = list(service.conditions)
+        
+        # Condition table no longer matches the model's output width
+        rewrite_conditions(directory, conditions[:-1])
+        result = service.reload_model()
+        assert result["status"] == "failed" and "does not match" in result["error"], result
+        assert service.model_version is version
+        
+        # Not JSON at all
+        with open(os.path.join(directory, 'symptom_mapping.json'), 'w') as f:
+            f.write('{"fever": 0,')
+        result = service.reload_model()
+        assert result["status"] == "failed", result
+        assert service.model_version is version
+        assert service.registry.stats()["failures"] == 2
+        
+        result = service.process_symptoms(SYMPTOMS)
+        assert result["diagnosis"] in conditions, "Old version should still serve requests"
+    finally:
+        shutil.rmtree(directory)
+    print("✓ Broken candidate test passed")
+
+def test_swap_under_load():
+    """Test that repeated swaps during concurrent requests fail none of them"""
+    service, directory = service_on_copy(cache_size=0, pool_size=2)
+    try:
+        conditions = list(service.conditions)
+        allowed = set(conditions) | {f"{condition} (v2)" for condition in conditions}
+        stop = threading.Event()
+        errors = []
+        served = [0]
+        
+        def client():
+            while not stop.is_set():
+                try:
+                    result = service.process_symptoms(SYMPTOMS)
+                    if result["diagnosis"] not in allowed:
+                        errors.append(result)
+                    served[0] += 1
+                except Exception as e:
+                    errors.append(e)
+        
+        threads = [threading.Thread(target=client) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i in range(6):
+                rewrite_conditions(directory, conditions if i % 2 else [f"{c} (v2)" for c in conditions])
+                assert service.reload_model()["status"] == "swapped"
+                time.sleep(0.02)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        
+        assert not errors, f"Requests failed during reload: {errors[:3]}"
+        assert served[0] > 0
+    finally:
+        shutil.rmtree(directory)
+    print("✓ Swap under load test passed")
+
+def test_watcher_picks_up_change():
+    """Test that the file watcher swaps in a changed mapping by itself"""
+    service, directory = service_on_copy()
+    try:
+        version = service.model_version
+        service.registry.start_watching(0.05)
+        rewrite_conditions(directory, [f"{c} (v2)" for c in service.conditions])
+        
+        deadline = time.monotonic() + 5
+        while service.model_version is version and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert service.model_version is not version, "Watcher did not reload the changed files"
+        assert service.conditions[0].endswith("(v2)")
+        
+        # The replaced version is released once nothing is using it
+        assert version.drain(timeout=2)
+    finally:
+        service.registry.stop_watching()
+        shutil.rmtree(directory)
+    print("✓ Watcher test passed")
+
+if __name__ == "__main__":
+    print("Running model registry tests...")
+    test_unchanged_files_not_reloaded()
+    test_loaded_pool_does_not_load()
+    test_swap_replaces_model_and_mappings()
+    test_broken_candidate_keeps_active_version()
+    test_swap_under_load()
+    test_watcher_picks_up_change()
+    print("All model registry tests passed!")
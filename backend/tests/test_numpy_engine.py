@@ -0,0 +1,124 @@
+import sys
+import os
+import gc
+import shutil
+import tempfile
+import weakref
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.backends import resolve_backend
+from ai import numpy_engine
+from ai.numpy_engine import NumpyInterpreter, load_model, load_npz, parse_tflite
+from services.diagnostic_service import DiagnosticService
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', 'models', 'diagnostic_model.tflite')
+
+def random_inputs(rows, seed=0):
+    """Sparse binary symptom vectors like the encoder produces"""
+    return (np.random.default_rng(seed).random((rows, 50)) < 0.1).astype(np.float32)
+
+def run(interpreter, inputs):
+    """Resize, invoke and read back the output of a TFLite-style interpreter"""
+    input_index = interpreter.get_input_details()[0]['index']
+    interpreter.resize_tensor_input(input_index, list(inputs.shape))
+    interpreter.allocate_tensors()
+    interpreter.set_tensor(input_index, inputs)
+    interpreter.invoke()
+    return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+
+def test_parity_with_tflite():
+    """Test that the NumPy engine matches the TFLite interpreter"""
+    try:
+        _, interpreter_class = resolve_backend('auto')
+    except ImportError:
+        print("✓ Parity test skipped (no TFLite backend installed)")
+        return
+    
+    for rows in (1, 64):
+        inputs = random_inputs(rows)
+        expected = run(interpreter_class(model_path=MODEL_PATH), inputs)
+        actual = run(NumpyInterpreter(model_path=MODEL_PATH), inputs)
+        assert actual.shape == expected.shape
+        assert np.allclose(actual, expected, atol=1e-5), f"Max difference {np.abs(actual - expected).max()}"
+    print("✓ TFLite parity test passed")
+
+def test_npz_round_trip():
+    """Test that exported weights reproduce the flatbuffer model"""
+    model = load_model(MODEL_PATH)
+    inputs = random_inputs(16)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        model.save_npz(path)
+        exported = load_npz(path)
+        assert np.array_equal(exported.forward(inputs.copy()), model.forward(inputs.copy()))
+        assert np.array_equal(run(NumpyInterpreter(model_path=path), inputs), model.forward(inputs.copy()))
+    print("✓ NPZ round trip test passed")
+
+def test_rejects_invalid_input():
+    """Test that bad files and tensor shapes fail loudly"""
+    try:
+        parse_tflite(b'\x00' * 64)
+        assert False, "Expected ValueError for a non-TFLite buffer"
+    except ValueError:
+        pass
+    
+    interpreter = NumpyInterpreter(model_path=MODEL_PATH)
+    try:
+        interpreter.set_tensor(0, np.zeros((2, 50), dtype=np.float32))
+        assert False, "Expected ValueError for a batch that was not resized"
+    except ValueError:
+        pass
+    print("✓ Invalid input test passed")
+
+def test_model_cache_keeps_newest_version():
+    """Test that a rewritten model file replaces its cached copy instead of adding another"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.tflite')
+        shutil.copyfile(MODEL_PATH, path)
+        first = load_model(path)
+        assert load_model(path) is first, "An unchanged file should reuse the parsed model"
+        released = weakref.ref(first)
+        del first
+        
+        # A hot reload rewrites the file in place
+        shutil.copyfile(MODEL_PATH, path)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = load_model(path)
+        gc.collect()
+        assert released() is None, "The superseded model should be freed once nothing serves it"
+        assert numpy_engine._models[os.path.abspath(path)][1] is second
+        assert load_model(path) is second
+        del numpy_engine._models[os.path.abspath(path)]
+    print("✓ Model cache replacement test passed")
+
+def test_service_with_numpy_backend():
+    """Test that the service produces the same diagnoses on the NumPy engine"""
+    symptoms = [["fever", "cough", "sore throat"], ["increased thirst", "frequent urination"], ["headache"]]
+    numpy_service = DiagnosticService(backend='numpy', cache_size=0)
+    
+    results = numpy_service.process_symptoms_batch(symptoms)
+    assert numpy_service.backend_name == 'numpy'
+    
+    try:
+        reference = DiagnosticService(cache_size=0, lazy=False)
+    except ImportError:
+        reference = None
+    if reference is not None and reference.interpreter_pool is not None:
+        for result, expected in zip(results, reference.process_symptoms_batch(symptoms)):
+            assert result["diagnosis"] == expected["diagnosis"]
+            assert abs(result["confidence"] - expected["confidence"]) < 1e-5
+    print("✓ Service NumPy backend test passed")
+
+if __name__ == "__main__":
+    print("Running NumPy engine tests...")
+    test_parity_with_tflite()
+    test_npz_round_trip()
+    test_rejects_invalid_input()
+    test_model_cache_keeps_newest_version()
+    test_service_with_numpy_backend()
+    print("All tests passed!")
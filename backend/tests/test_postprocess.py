@@ -0,0 +1,65 @@
+import sys
+import os
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.postprocess import DiagnosisPostprocessor, DEFAULT_RECOMMENDATIONS
+from services.diagnostic_service import DiagnosticService
+
+CONDITIONS = ["Common Cold", "Influenza", "Possible Pneumonia", "Migraine", "Rare Condition"]
+
+def test_top_k_matches_full_sort():
+    """Test that argpartition top-k agrees with a full descending sort"""
+    postprocessor = DiagnosisPostprocessor(CONDITIONS)
+    output = np.random.default_rng(0).random((100, 5)).astype(np.float32)
+    
+    for k in (1, 3, 5, 10):
+        indices, probs = postprocessor.top_k(output, k)
+        expected = np.argsort(-output, axis=1, kind='stable')[:, :min(k, 5)]
+        assert (indices == expected).all(), f"Top-{k} order mismatch"
+        assert np.array_equal(probs, np.take_along_axis(output, expected, axis=1))
+    print("✓ Top-k test passed")
+
+def test_tables_and_high_risk_override():
+    """Test the precomputed severity and recommendation tables"""
+    postprocessor = DiagnosisPostprocessor(CONDITIONS)
+    output = np.array([[0.1, 0.5, 0.3, 0.05, 0.05],
+                       [0.05, 0.05, 0.1, 0.2, 0.6]], dtype=np.float32)
+    
+    ranked = postprocessor.rank(output, [["fever"], ["Chest Pain"]], k=2)
+    assert [r["diagnosis"] for r in ranked[0]] == ["Influenza", "Possible Pneumonia"]
+    assert [r["severity"] for r in ranked[0]] == ["medium", "high"]
+    assert ranked[0][0]["recommendations"][0] == "Rest"
+    assert "recommendations" not in ranked[0][1], "Only the top diagnosis carries recommendations"
+    
+    # A high-risk symptom makes every candidate in the row high severity
+    assert [r["severity"] for r in ranked[1]] == ["high", "high"]
+    assert ranked[1][0]["recommendations"] == DEFAULT_RECOMMENDATIONS
+    
+    # Callers get their own lists, not the shared table entries
+    ranked[1][0]["recommendations"].append("mutated")
+    assert postprocessor.rank(output, [[], []])[1][0]["recommendations"] == DEFAULT_RECOMMENDATIONS
+    print("✓ Severity and recommendation table test passed")
+
+def test_service_top_k():
+    """Test that the service lists runners-up when top_k is above 1"""
+    service = DiagnosticService(cache_size=0, top_k=3)
+    single = DiagnosticService(cache_size=0)
+    symptoms = ["fever", "cough", "sore throat"]
+    
+    result = service.process_symptoms(symptoms)
+    expected = single.process_symptoms(symptoms)
+    if service.interpreter_pool is not None:
+        assert len(result["alternatives"]) == 2
+        assert all(alt["confidence"] <= result["confidence"] for alt in result["alternatives"])
+    assert {k: v for k, v in result.items() if k != "alternatives"} == expected
+    print("✓ Service top-k test passed")
+
+if __name__ == "__main__":
+    print("Running post-processing tests...")
+    test_top_k_matches_full_sort()
+    test_tables_and_high_risk_override()
+    test_service_top_k()
+    print("All tests passed!")
@@ -0,0 +1,118 @@
+import sys
+import os
+import gzip
+import json
+import zlib
+from datetime import datetime
+
+# Add the parent directory to the path so we can import the utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask import Flask, jsonify
+
+from utils import fast_json
+from utils.compression import COMPRESS_MIN_SIZE, compress_stream, negotiate
+from utils.responses import init_responses, ndjson_response
+
+def make_app():
+    app = Flask(__name__)
+    init_responses(app)
+    
+    @app.route('/small')
+    def small():
+        return jsonify({"ok": True})
+    
+    @app.route('/large')
+    def large():
+        return jsonify({"results": [{"diagnosis": "Flu", "confidence": np.float32(0.5)}] * 200})
+    
+    @app.route('/stream')
+    def stream():
+        return ndjson_response(([{"row": i * 10 + j} for j in range(10)] for i in range(5)))
+    
+    return app
+
+def test_numpy_encoding():
+    """Test that every backend encodes NumPy scalars and arrays, contiguous or not"""
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+    payload = {
+        "confidence": np.float32(0.25),
+        "count": np.int64(3),
+        "flag": np.bool_(True),
+        "row": matrix[1],
+        "column": matrix[:, 1],
+        "transposed": matrix.T,
+        "when": datetime(2026, 1, 2, 3, 4, 5),
+    }
+    expected = {
+        "confidence": 0.25, "count": 3, "flag": True,
+        "row": [4.0, 5.0, 6.0, 7.0], "column": [1.0, 5.0, 9.0],
+        "transposed": matrix.T.tolist(), "when": "2026-01-02T03:04:05",
+    }
+    current = fast_json.backend_name
+    try:
+        for name in fast_json.BACKENDS:
+            fast_json.use_backend(name)
+            body = fast_json.dumps(payload)
+            assert isinstance(body, bytes)
+            assert json.loads(body) == expected, name
+            assert fast_json.loads(body) == expected, name
+    finally:
+        fast_json.use_backend(current)
+    try:
+        fast_json.use_backend('no-such-backend')
+        assert False, "An unknown backend should be refused"
+    except ValueError:
+        pass
+    print("✓ NumPy encoding test passed")
+
+def test_negotiation_and_threshold():
+    """Test Accept-Encoding negotiation and that only large enough JSON bodies are compressed"""
+    assert negotiate(None) is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*") is not None
+    assert negotiate("deflate, gzip;q=0.5") == "gzip"
+    
+    client = make_app().test_client()
+    small = client.get('/small', headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers and small.json == {"ok": True}
+    
+    plain = client.get('/large')
+    assert "Content-Encoding" not in plain.headers and len(plain.data) >= COMPRESS_MIN_SIZE
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    
+    packed = client.get('/large', headers={"Accept-Encoding": "gzip, deflate"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert int(packed.headers["Content-Length"]) == len(packed.data) < len(plain.data)
+    assert json.loads(gzip.decompress(packed.data)) == plain.json
+    assert plain.json["results"][0]["confidence"] == 0.5
+    print("✓ Negotiation and threshold test passed")
+
+def test_ndjson_stream():
+    """Test that streamed rows arrive one per line, and that a compressed stream decodes chunk by chunk"""
+    client = make_app().test_client()
+    response = client.get('/stream')
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.data.splitlines()]
+    assert [row["row"] for row in rows] == list(range(50))
+    
+    packed = client.get('/stream', headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.data) == response.data
+    
+    # Each chunk is flushed, so a client can decode it before the stream ends
+    decoder = zlib.decompressobj(31)
+    parts = list(compress_stream([b'{"a":1}\n', b'{"b":2}\n'], 'gzip'))
+    assert decoder.decompress(parts[0]) == b'{"a":1}\n'
+    assert decoder.decompress(parts[1]) == b'{"b":2}\n'
+    print("✓ NDJSON stream test passed")
+
+if __name__ == "__main__":
+    print("Running response tests...")
+    test_numpy_encoding()
+    test_negotiation_and_threshold()
+    test_ndjson_stream()
+    print("All response tests passed!")
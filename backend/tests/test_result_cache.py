@@ -0,0 +1,127 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.result_cache import ResultCache, canonical_symptom_key
+from ai.rule_engine import DEFAULT_RESULT, RuleEngine
+from services.diagnostic_service import DiagnosticService
+
+MAPPING = {"fever": 0, "cough": 1, "headache": 2}
+
+def test_canonical_key():
+    """Test that permutations, case and unknown tokens share a key"""
+    key = canonical_symptom_key(["fever", "cough"], MAPPING)
+    assert canonical_symptom_key(["Cough", "FEVER"], MAPPING) == key, "Order and case should not matter"
+    assert canonical_symptom_key(["cough", "fever", "made up"], MAPPING) == key, "Unknown tokens should be ignored"
+    assert canonical_symptom_key(["cough", "fever", "severe pain"], MAPPING, ["severe pain"]) != key, \
+        "Flagged symptoms change the result and must change the key"
+    print("✓ Canonical key test passed")
+
+def test_lru_eviction_and_ttl():
+    """Test LRU eviction order, TTL expiry and counters"""
+    cache = ResultCache(maxsize=2, ttl=0)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None, "Least recently used entry should be evicted"
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1), stats
+    
+    expiring = ResultCache(maxsize=2, ttl=0.01)
+    expiring.put("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None, "Entry should expire after its TTL"
+    assert expiring.stats()["expirations"] == 1
+    print("✓ LRU eviction and TTL test passed")
+
+def test_invalidation_on_file_change():
+    """Test that touching a watched file clears the cache"""
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "mapping.json")
+        with open(path, "w") as f:
+            f.write("{}")
+        cache = ResultCache(maxsize=4, watched_paths=[path], check_interval=0)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        
+        with open(path, "w") as f:
+            f.write('{"fever": 0}')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        
+        assert cache.get("a") is None, "Cache should be cleared when a watched file changes"
+        assert cache.stats()["invalidations"] == 1
+    finally:
+        shutil.rmtree(directory)
+    print("✓ File change invalidation test passed")
+
+def test_service_cache_hits():
+    """Test that equivalent symptom lists are served from the cache"""
+    service = DiagnosticService(cache_size=16)
+    first = service.process_symptoms(["fever", "cough"])
+    second = service.process_symptoms(["COUGH", "fever", "unknown_symptom"])
+    batch = service.process_symptoms_batch([["cough", "fever"], ["headache", "nausea"]])
+    
+    assert first == second == batch[0], "Equivalent symptom lists should share one result"
+    stats = service.result_cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2, stats
+    
+    # Callers get their own copy of the cached result
+    second["diagnosis"] = "changed"
+    assert service.process_symptoms(["fever", "cough"])["diagnosis"] == first["diagnosis"]
+    
+    # ... down to the nested lists, on the way in and on the way out
+    recommendations = list(first["recommendations"])
+    first["recommendations"].append("changed")
+    second["recommendations"].clear()
+    assert service.process_symptoms(["cough", "fever"])["recommendations"] == recommendations
+    print("✓ Service cache test passed")
+
+def test_unusable_symptoms():
+    """Test that symptoms that are not strings get the error result, and only their row in a batch"""
+    service = DiagnosticService(cache_size=16)
+    for bad in ([1], [None], ["fever", None]):
+        assert service.process_symptoms(bad)["diagnosis"] == "Unable to process symptoms", bad
+    
+    results = service.process_symptoms_batch([["fever", "cough"], [None], ["headache"]])
+    assert results[1]["diagnosis"] == "Unable to process symptoms"
+    assert results[0] == service.process_symptoms(["fever", "cough"])
+    assert results[2]["diagnosis"] != "Unable to process symptoms"
+    print("✓ Unusable symptoms test passed")
+
+def test_rule_only_symptoms_change_the_key():
+    """Test that cached rule fallbacks tell apart symptoms only the rules know"""
+    service = DiagnosticService(cache_size=16)
+    version = service.model_version
+    rule = {"name": "glow", "priority": 10, "all": ["fever", "glowing toes"],
+            "diagnosis": "Possible Glow Fever", "confidence": 0.6, "severity": "medium"}
+    version.rules = RuleEngine([rule], DEFAULT_RESULT, version.symptom_mapping)
+    # Without a model every answer comes from the rules
+    version.release()
+    assert "glowing toes" not in version.symptom_mapping
+    
+    plain = service.process_symptoms(["fever"])
+    assert service.process_symptoms(["fever", "glowing toes"])["diagnosis"] == "Possible Glow Fever"
+    assert plain["diagnosis"] != "Possible Glow Fever"
+    batch = service.process_symptoms_batch([["Glowing toes", "fever"], ["fever", "made up"]])
+    assert batch[0]["diagnosis"] == "Possible Glow Fever" and batch[1] == plain
+    print("✓ Rule-only symptom key test passed")
+
+if __name__ == "__main__":
+    print("Running result cache tests...")
+    test_canonical_key()
+    test_lru_eviction_and_ttl()
+    test_invalidation_on_file_change()
+    test_service_cache_hits()
+    test_unusable_symptoms()
+    test_rule_only_symptoms_change_the_key()
+    print("All tests passed!")
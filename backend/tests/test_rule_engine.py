@@ -0,0 +1,113 @@
+import sys
+import os
+import json
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.rule_engine import RuleEngine
+from services.diagnostic_service import DiagnosticService
+from benchmarks.workloads import synthetic_symptom_lists
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai', 'models')
+DEFAULT = {"diagnosis": "Unknown", "confidence": 0.5, "severity": "low"}
+
+def hardcoded_rules(symptoms):
+    """The if-chain the rule file replaced, kept as the reference"""
+    symptoms_lower = [s.lower() for s in symptoms]
+    if "fever" in symptoms_lower and "cough" in symptoms_lower:
+        if "shortness of breath" in symptoms_lower:
+            return "Possible Pneumonia", "HIGH"
+        return "Common Cold or Influenza", "MEDIUM"
+    if "headache" in symptoms_lower and "nausea" in symptoms_lower:
+        return "Possible Migraine", "MEDIUM"
+    return "Unspecified Condition", "LOW"
+
+def rule(name, priority=0, **predicates):
+    return dict({"name": name, "priority": priority, "diagnosis": name, "confidence": 0.9, "severity": "medium"},
+                **predicates)
+
+def test_rule_file_matches_hardcoded_chain():
+    """Test that the shipped rule file gives the same answers as the old if-chain"""
+    service = DiagnosticService(cache_size=0)
+    cases = synthetic_symptom_lists(500) + [
+        ["fever", "cough"], ["FEVER", "Cough", "shortness of breath"], ["headache", "nausea"],
+        ["headache", "nausea", "fever", "cough"], ["runny nose"], []
+    ]
+    batch = service.rule_based_diagnosis_batch(cases)
+    for symptoms, batched in zip(cases, batch):
+        single = service.rule_based_diagnosis(symptoms)
+        assert single == batched
+        assert (single["diagnosis"], single["severity"]) == hardcoded_rules(symptoms), symptoms
+    assert "recommendations" in batch[0]
+    print("✓ Rule file parity test passed")
+
+def test_priority_and_predicates():
+    """Test that priorities, 'any' and 'none' decide which rule wins"""
+    engine = RuleEngine([
+        rule("flu", 10, all=["fever"], any=["cough", "sore throat"]),
+        rule("dengue", 20, all=["fever", "rash"], none=["cough"]),
+        rule("fever only", 5, all=["fever"]),
+    ], DEFAULT)
+    cases = {
+        ("fever", "rash"): "dengue",
+        ("fever", "rash", "cough"): "flu",
+        ("fever", "sore throat"): "flu",
+        ("fever",): "fever only",
+        ("rash",): "Unknown",
+    }
+    results = engine.diagnose_batch([list(symptoms) for symptoms in cases])
+    for (symptoms, expected), result in zip(cases.items(), results):
+        assert result["diagnosis"] == expected, (symptoms, result)
+        assert engine.diagnose(list(symptoms))["diagnosis"] == expected
+    print("✓ Priority and predicate test passed")
+
+def test_many_rules_over_wide_vocabulary():
+    """Test that hundreds of rules over more than 64 symptoms agree between the batch and row paths"""
+    with open(os.path.join(MODELS_DIR, 'symptom_mapping.json'), 'r') as f:
+        vocabulary = list(json.load(f)) + [f"rare symptom {i}" for i in range(100)]
+    rules = [rule(f"rule {i}", i % 7, all=[vocabulary[i % 150], vocabulary[(i * 7) % 150]],
+                  none=[vocabulary[(i * 13) % 150]]) for i in range(400)]
+    engine = RuleEngine(rules, DEFAULT, vocabulary)
+    assert engine.words == 3
+    
+    cases = synthetic_symptom_lists(300) + [[vocabulary[i], vocabulary[(i * 7) % 150]] for i in range(50, 150)]
+    matched = engine.match(engine.encode(cases)).tolist()
+    assert matched == [engine._match_one(symptoms) for symptoms in cases]
+    assert any(index >= 0 for index in matched[300:]), "Rules on rare symptoms should match"
+    print("✓ Many rules test passed")
+
+def test_invalid_rules_rejected():
+    """Test that malformed rules fail at load time, not on a request"""
+    for bad in (
+        rule("no predicate"),
+        rule("bad severity", all=["fever"], severity="severe"),
+        rule("typo", alll=["fever"]),
+    ):
+        try:
+            RuleEngine([bad], DEFAULT)
+            assert False, f"Expected ValueError for {bad['name']}"
+        except ValueError:
+            pass
+    print("✓ Invalid rules test passed")
+
+def test_default_labels_are_lowercase():
+    """Test that the rule file renders with the lowercase labels DiagnosticModel uses by default"""
+    engine = RuleEngine.from_file(os.path.join(MODELS_DIR, 'diagnosis_rules.json'))
+    result = engine.diagnose_batch([["fever", "cough", "shortness of breath"]])
+    assert result == [{
+        "diagnosis": "Possible Pneumonia",
+        "confidence": 0.75,
+        "severity": "high",
+        "recommendations": ["Seek medical attention", "Rest", "Stay hydrated"]
+    }]
+    print("✓ Model labels test passed")
+
+if __name__ == "__main__":
+    print("Running rule engine tests...")
+    test_rule_file_matches_hardcoded_chain()
+    test_priority_and_predicates()
+    test_many_rules_over_wide_vocabulary()
+    test_invalid_rules_rejected()
+    test_default_labels_are_lowercase()
+    print("All rule engine tests passed!")
@@ -0,0 +1,63 @@
+import sys
+import os
+import numpy as np
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.symptom_encoder import SymptomEncoder
+
+MAPPING = {"fever": 0, "cough": 1, "headache": 2, "nausea": 4}
+
+def legacy_encode(symptoms):
+    """The original per-call one-hot encoding"""
+    input_vector = np.zeros(5, dtype=np.float32)
+    for symptom in symptoms:
+        symptom = symptom.lower()
+        if symptom in MAPPING:
+            input_vector[MAPPING[symptom]] = 1.0
+    return input_vector
+
+BATCH = [["fever", "Cough"], [], ["unknown", "NAUSEA", "nausea"], ["headache"]]
+
+def test_encode_matches_legacy():
+    """Test that single and batched encodings match the original encoding"""
+    encoder = SymptomEncoder(MAPPING, num_features=5)
+    
+    for symptoms in BATCH:
+        assert (encoder.encode(symptoms) == legacy_encode(symptoms)).all(), f"Mismatch for {symptoms}"
+    
+    matrix = encoder.encode_batch(BATCH)
+    assert matrix.shape == (4, 5) and matrix.dtype == np.float32
+    assert (matrix == np.stack([legacy_encode(s) for s in BATCH])).all(), "Batch encoding mismatch"
+    print("✓ Encoder parity test passed")
+
+def test_buffer_is_reused_and_cleared():
+    """Test that the per-thread buffer is reused without leaking old rows"""
+    encoder = SymptomEncoder(MAPPING, num_features=5)
+    
+    first = encoder.encode_batch(BATCH)
+    second = encoder.encode_batch([["cough"]])
+    assert np.shares_memory(first, second), "Encoder should reuse its buffer"
+    assert (second == legacy_encode(["cough"])).all(), "Stale symptoms leaked into a reused buffer"
+    
+    out = np.empty((2, 5), dtype=np.float32)
+    assert encoder.encode_batch([["fever"], ["headache"]], out=out) is out
+    print("✓ Encoder buffer reuse test passed")
+
+def test_csr_round_trip():
+    """Test the sparse index representation"""
+    encoder = SymptomEncoder(MAPPING, num_features=5)
+    
+    indptr, indices = encoder.to_csr(BATCH)
+    assert indptr.tolist() == [0, 2, 2, 4, 5], indptr.tolist()
+    assert indices.tolist() == [0, 1, 4, 4, 2], indices.tolist()
+    assert (encoder.encode_csr(indptr, indices) == np.stack([legacy_encode(s) for s in BATCH])).all()
+    print("✓ Encoder CSR test passed")
+
+if __name__ == "__main__":
+    print("Running symptom encoder tests...")
+    test_encode_matches_legacy()
+    test_buffer_is_reused_and_cleared()
+    test_csr_round_trip()
+    print("All tests passed!")
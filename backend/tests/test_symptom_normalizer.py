@@ -0,0 +1,59 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.symptom_normalizer import SymptomNormalizer, normalize_text
+from services.diagnostic_service import DiagnosticService
+
+MAPPING = {"fever": 0, "cough": 1, "shortness of breath": 11, "runny nose": 5, "chest pain": 12, "ear pain": 30}
+SYNONYMS = {"fever": ["feverish"], "shortness of breath": ["short of breath"]}
+
+def test_exact_and_synonym_matches():
+    """Test normalization, synonyms and word-order variants"""
+    normalizer = SymptomNormalizer(MAPPING, SYNONYMS)
+    
+    assert normalize_text("  Runny-Nose!! ") == "runny nose"
+    assert normalizer.resolve("runny-nose") == (5,)
+    assert normalizer.resolve("Feverish") == (0,)
+    assert normalizer.resolve("short of breath") == (11,)
+    assert normalizer.resolve("pain chest") == (12,)
+    print("✓ Exact and synonym match test passed")
+
+def test_fuzzy_matches():
+    """Test that small typos resolve and unrelated phrases do not"""
+    normalizer = SymptomNormalizer(MAPPING, SYNONYMS)
+    
+    assert normalizer.resolve("cogh") == (1,)
+    assert normalizer.resolve("chest pian") == (12,)
+    assert normalizer.resolve("leg pain") == (), "Unrelated phrase should not be forced onto a symptom"
+    assert normalizer.resolve("xyz") == ()
+    print("✓ Fuzzy match test passed")
+
+def test_canonicalize_lists():
+    """Test phrase lists, de-duplication and unknown passthrough"""
+    normalizer = SymptomNormalizer(MAPPING, SYNONYMS)
+    
+    assert normalizer.canonicalize(["fever and cough", "Feverish", "severe pain"]) == ["fever", "cough", "severe pain"]
+    normalizer.canonicalize(["Feverish"])
+    assert normalizer.cache_info()["hits"] >= 1, "Resolved phrases should be cached"
+    print("✓ Canonicalize test passed")
+
+def test_service_uses_normalizer():
+    """Test that free-text variants get the same diagnosis as canonical symptoms"""
+    service = DiagnosticService(cache_size=0)
+    canonical = service.process_symptoms(["fever", "cough", "shortness of breath"])
+    variant = service.process_symptoms(["Feverish", "coughing", "short of breath"])
+    
+    assert variant == canonical, "Variants should resolve to the same symptoms"
+    assert variant["severity"] == "HIGH", "Resolved high-risk symptoms should raise severity"
+    print("✓ Service normalizer test passed")
+
+if __name__ == "__main__":
+    print("Running symptom normalizer tests...")
+    test_exact_and_synonym_matches()
+    test_fuzzy_matches()
+    test_canonicalize_lists()
+    test_service_uses_normalizer()
+    print("All tests passed!")
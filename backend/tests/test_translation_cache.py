@@ -0,0 +1,125 @@
+import sys
+import os
+import tempfile
+import threading
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bhashini import BhashiniClient
+from utils.translation_cache import TranslationCache, known_strings
+from tests.test_bhashini import run_with_stub
+
+def test_two_tiers_survive_restart():
+    """Test that translations come back from disk after the process restarts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'translations.sqlite3')
+        cache = TranslationCache(path, maxsize=2)
+        cache.put_many({"fever": "बुखार", "cough": "खांसी", "rash": None}, "en", "hi")
+        assert cache.get("fever", "en", "hi") == "बुखार"
+        assert cache.get("fever", "en", "ta") is None, "Target language is part of the key"
+        assert cache.get("rash", "en", "hi") is None, "Failed translations are not stored"
+        cache.close()
+        
+        restarted = TranslationCache(path, maxsize=2)
+        assert restarted.get_many(["fever", "cough", "rash"], "en", "hi") == {"fever": "बुखार", "cough": "खांसी"}
+        stats = restarted.stats()
+        assert stats["disk_hits"] == 2 and stats["misses"] == 1 and stats["disk_size"] == 2
+        
+        # Disk hits are promoted into the LRU tier
+        assert restarted.get("fever", "en", "hi") == "बुखार"
+        assert restarted.stats()["memory_hits"] == 1
+        restarted.close()
+    print("✓ Two-tier restart test passed")
+
+def test_lru_tier_is_bounded():
+    """Test that the memory tier evicts the least recently used entry"""
+    cache = TranslationCache(None, maxsize=2)
+    cache.put_many({"a": "A", "b": "B"}, "en", "hi")
+    cache.get("a", "en", "hi")
+    cache.put("c", "en", "hi", "C")
+    assert cache.get_many(["a", "b", "c"], "en", "hi") == {"a": "A", "c": "C"}
+    assert cache.stats()["memory_size"] == 2
+    print("✓ LRU bound test passed")
+
+def test_client_only_fetches_misses():
+    """Test that cached strings never reach the upstream, even after a restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'translations.sqlite3')
+        
+        async def scenario(stub, url):
+            async with BhashiniClient(url, cache=TranslationCache(path)) as client:
+                assert await client.translate_many(["fever", "cough"], "en", "hi") == ["[hi] fever", "[hi] cough"]
+                calls = len(stub.calls)
+                assert await client.translate_many(["cough", "fever", "rash"], "en", "hi") == ["[hi] cough", "[hi] fever", "[hi] rash"]
+                assert stub.calls[calls:] == ["rash"], "Only the new string should go upstream"
+            
+            async with BhashiniClient(url, cache=TranslationCache(path)) as restarted:
+                calls = len(stub.calls)
+                assert await restarted.translate("fever", "en", "hi") == "[hi] fever"
+                assert len(stub.calls) == calls
+        
+        run_with_stub(scenario)
+    print("✓ Client cache test passed")
+
+class ThreadRecordingCache(TranslationCache):
+    """Notes the thread every SQLite call runs on"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.disk_threads = []
+    
+    def get_disk(self, *args):
+        self.disk_threads.append(threading.get_ident())
+        return super().get_disk(*args)
+    
+    def put_many(self, *args):
+        self.disk_threads.append(threading.get_ident())
+        return super().put_many(*args)
+
+def test_disk_tier_stays_off_the_event_loop():
+    """Test that the client runs SQLite lookups and writes on a thread, not on the event loop"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ThreadRecordingCache(os.path.join(tmp, 'nested', 'translations.sqlite3'))
+        
+        async def scenario(stub, url):
+            async with BhashiniClient(url, cache=cache) as client:
+                assert await client.translate_many(["fever", "cough"], "en", "hi") == ["[hi] fever", "[hi] cough"]
+                cache.clear_memory()
+                assert await client.translate("fever", "en", "hi") == "[hi] fever"
+                calls = len(cache.disk_threads)
+                assert await client.translate("fever", "en", "hi") == "[hi] fever"
+                assert len(cache.disk_threads) == calls, "A memory hit needs no thread"
+        
+        # asyncio.run drives the loop on this thread
+        run_with_stub(scenario)
+        assert len(cache.disk_threads) == 3 and threading.get_ident() not in cache.disk_threads
+        cache.close()
+    print("✓ Off-loop disk tier test passed")
+
+def test_prewarm_known_vocabulary():
+    """Test that prewarming translates the vocabulary once per language"""
+    vocabulary = known_strings()
+    assert "fever" in vocabulary and "Influenza" in vocabulary and "Rest" in vocabulary
+    # Fallback answers from the rule engine, shown while the model is down
+    assert "Possible Pneumonia" in vocabulary and "Seek medical attention" in vocabulary
+    assert "Unspecified Condition" in vocabulary and "Monitor symptoms" in vocabulary
+    
+    async def scenario(stub, url):
+        async with BhashiniClient(url, max_batch=64, cache=TranslationCache(None)) as client:
+            assert await client.prewarm(["hi", "ta"]) == 2 * len(vocabulary)
+            assert await client.prewarm(["hi", "ta"]) == 0
+            assert await client.translate("Stay hydrated", "en", "ta") == "[ta] Stay hydrated"
+        assert sum(len(call) if isinstance(call, list) else 1 for call in stub.calls) == 2 * len(vocabulary)
+    
+    run_with_stub(scenario)
+    print("✓ Prewarm test passed")
+
+if __name__ == "__main__":
+    print("Running translation cache tests...")
+    test_two_tiers_survive_restart()
+    test_lru_tier_is_bounded()
+    test_client_only_fetches_misses()
+    test_disk_tier_stays_off_the_event_loop()
+    test_prewarm_known_vocabulary()
+    print("All tests passed!")
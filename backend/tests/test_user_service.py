@@ -0,0 +1,222 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests never write to the development database
+os.environ.setdefault('DATABASE_PATH', os.path.join(tempfile.gettempdir(), 'kiosk_test.sqlite3'))
+
+import jwt as pyjwt
+from flask import Flask, jsonify
+from flask_jwt_extended import create_access_token, decode_token
+
+from config.database import setup_database
+from services import user_service
+from services.user_service import (
+    ClaimsCache, LoginBusy, authenticate_user, create_token, create_user, current_user, revoke_token, token_required
+)
+
+def make_app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-of-at-least-thirty-two-bytes'
+    # Cheap hashes keep the tests fast
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+    user_service.init_user_service(app)
+    
+    @app.route('/me')
+    @token_required
+    def me():
+        return jsonify(current_user())
+    
+    return app
+
+def make_patient(name, password, **fields):
+    setup_database()
+    from models.user import User
+    User.objects.filter(username=name).delete()
+    user_service.directory.invalidate()
+    return create_user(name, password, f"+91{abs(hash(name)) % 10**10:010d}", **fields)
+
+def test_claims_cache():
+    """Test that a token is verified once, and forged, expired or revoked tokens are never served from the cache"""
+    app = make_app()
+    client = app.test_client()
+    cache = user_service.claims_cache
+    cache.clear()
+    with app.app_context():
+        patient = make_patient("claims-patient", "s3cret")
+        token = create_token(patient["id"])
+        expired = create_access_token(identity=str(patient["id"]), expires_delta=timedelta(seconds=-1))
+        claims = decode_token(token)
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    before = cache.stats()
+    for _ in range(3):
+        assert client.get('/me', headers=headers).status_code == 200
+    stats = cache.stats()
+    assert stats["misses"] - before["misses"] == 1 and stats["hits"] - before["hits"] == 2
+    
+    # Same claims, signed with another key
+    forged = pyjwt.encode(claims, 'not-the-secret-but-just-as-long-as-it', algorithm='HS256')
+    for bad in (forged, forged, expired, token[:-2]):
+        response = client.get('/me', headers={"Authorization": f"Bearer {bad}"})
+        assert response.status_code in (401, 422), response.status_code
+    assert cache.stats()["size"] == stats["size"], "Only verified tokens are cached"
+    assert client.get('/me').status_code == 401
+    
+    with app.app_context():
+        revoke_token(claims)
+    assert client.get('/me', headers=headers).status_code == 401, "A revoked token is refused on a cache hit"
+    
+    small = ClaimsCache(maxsize=2)
+    small.put("expired", {"sub": "1", "exp": time.time() - 1})
+    assert small.get("expired") is None
+    for key in ("a", "b", "c"):
+        small.put(key, {"sub": key, "exp": time.time() + 60})
+    assert small.get("a") is None and small.get("c")["sub"] == "c"
+    assert small.stats()["evictions"] == 1
+    
+    from models.user import User
+    User.objects.filter(id=patient["id"]).delete()
+    print("✓ Claims cache test passed")
+
+def test_login_lookup_and_revocation():
+    """Test logins against the user map, authenticated requests without queries, and revoked tokens"""
+    app = make_app()
+    client = app.test_client()
+    with app.app_context():
+        patient = make_patient("auth-patient", "s3cret", preferred_language="hi")
+        assert "password" not in patient
+        assert authenticate_user("auth-patient", "s3cret")["id"] == patient["id"]
+        assert authenticate_user("auth-patient", "wrong") is None
+        assert authenticate_user("nobody", "s3cret") is None
+        token = create_token(patient["id"])
+    
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    headers = {"Authorization": f"Bearer {token}"}
+    # Load the user and the blocklist now, so the requests below find both in memory
+    client.get('/me', headers=headers)
+    user_service.blocklist.sync(force=True)
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(20):
+            response = client.get('/me', headers=headers)
+            assert response.status_code == 200
+    assert response.json["username"] == "auth-patient" and response.json["preferred_language"] == "hi"
+    assert len(queries) == 0, "Authenticated requests should be served from memory"
+    
+    with app.app_context():
+        revoke_token(decode_token(token))
+    assert client.get('/me', headers=headers).status_code == 401, "A revoked token is refused even when cached"
+    
+    from models.user import User
+    with app.app_context():
+        token = create_token(patient["id"])
+    User.objects.filter(id=patient["id"]).update(is_active=False)
+    user_service.directory.invalidate(patient["id"])
+    assert client.get('/me', headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    User.objects.filter(id=patient["id"]).delete()
+    print("✓ Login, lookup and revocation test passed")
+
+def test_user_directory_per_user_entries():
+    """Test single-flight loads, per-user expiry, and that ORM writes take effect at once"""
+    app = make_app()
+    client = app.test_client()
+    with app.app_context():
+        patient = make_patient("directory-patient", "s3cret")
+        token = create_token(patient["id"])
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    directory = user_service.UserDirectory(ttl=0.05)
+    loads = []
+    load = directory._load
+    def slow_load(user_id):
+        loads.append(user_id)
+        time.sleep(0.05)
+        return load(user_id)
+    directory._load = slow_load
+    users = []
+    threads = [threading.Thread(target=lambda: users.append(directory.get(patient["id"]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == [patient["id"]], "Concurrent misses for one user should share a query"
+    assert all(user["username"] == "directory-patient" and "password" not in user for user in users)
+    
+    from models.user import User
+    User.objects.filter(id=patient["id"]).update(preferred_language="ta")
+    assert directory.get(patient["id"])["preferred_language"] == "en"
+    time.sleep(0.06)
+    assert directory.get(patient["id"])["preferred_language"] == "ta", "An entry should expire after its TTL"
+    
+    # Saves through the ORM drop the shared directory's entry right away
+    assert client.get('/me', headers=headers).status_code == 200
+    user = User.objects.get(id=patient["id"])
+    user.password = user_service.hash_password("changed")
+    user.save()
+    assert authenticate_user("directory-patient", "s3cret") is None, "The old password should stop working at once"
+    assert authenticate_user("directory-patient", "changed")["id"] == patient["id"]
+    user.is_active = False
+    user.save()
+    assert client.get('/me', headers=headers).status_code == 401, "A deactivated user should be refused at once"
+    user.delete()
+    print("✓ User directory test passed")
+
+def test_revocation_reaches_other_workers():
+    """Test that a token revoked by one worker is refused by another, and after a restart"""
+    setup_database()
+    from models.revoked_token import RevokedToken
+    here = user_service.TokenBlocklist(sync_interval=0.05)
+    elsewhere = user_service.TokenBlocklist(sync_interval=0.05)
+    assert not elsewhere.is_revoked("jti-shared")
+    
+    here.revoke("jti-shared", time.time() + 60)
+    here.revoke("jti-expired", time.time() - 1)
+    assert here.is_revoked("jti-shared")
+    time.sleep(0.06)
+    assert elsewhere.is_revoked("jti-shared"), "Another worker should pick up the revocation after its interval"
+    
+    restarted = user_service.TokenBlocklist()
+    assert restarted.is_revoked("jti-shared") and not restarted.is_revoked("jti-expired")
+    assert not RevokedToken.objects.filter(jti="jti-expired").exists(), "Expired rows should be pruned"
+    RevokedToken.objects.filter(jti="jti-shared").delete()
+    print("✓ Shared revocation test passed")
+
+def test_logins_are_shed_when_pool_is_full():
+    """Test that password checks beyond the pending limit fail fast instead of queueing"""
+    if user_service._password_pool is None:
+        print("✓ Login shedding test skipped (no bcrypt pool)")
+        return
+    slow_hash = user_service.bcrypt.generate_password_hash("pw", rounds=12).decode()
+    limit = user_service.BCRYPT_MAX_PENDING
+    user_service.BCRYPT_MAX_PENDING = 1
+    try:
+        worker = threading.Thread(target=user_service.check_password, args=(slow_hash, "pw"))
+        worker.start()
+        time.sleep(0.02)
+        try:
+            user_service.check_password(slow_hash, "pw")
+            assert False, "A second check should be shed while the first is pending"
+        except LoginBusy:
+            pass
+        worker.join()
+    finally:
+        user_service.BCRYPT_MAX_PENDING = limit
+    assert user_service.check_password(slow_hash, "pw")
+    assert not user_service.check_password("pbkdf2_sha256$not-bcrypt", "pw")
+    print("✓ Login shedding test passed")
+
+if __name__ == "__main__":
+    print("Running user service tests...")
+    test_claims_cache()
+    test_login_lookup_and_revocation()
+    test_user_directory_per_user_entries()
+    test_revocation_reaches_other_workers()
+    test_logins_are_shed_when_pool_is_full()
+    print("All user service tests passed!")
@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import signal
+
+# Add the parent directory to the path so we can import the services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.diagnostic_service import DiagnosticService
+from services.worker_pool import InferenceWorkerPool, WorkerPoolError
+from utils.metrics import merge_snapshots
+
+BATCH = [["fever", "cough"], ["increased thirst", "frequent urination", "weight loss"], ["headache", "nausea"]]
+
+def wait_until(condition, timeout=30.0):
+    """Poll ``condition`` until it holds or ``timeout`` passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_workers_match_in_process():
+    """Test that worker processes return the same results as in-process inference"""
+    expected = DiagnosticService(cache_size=0).process_symptoms_batch(BATCH)
+    
+    service = DiagnosticService(cache_size=0)
+    service.start_workers(2, health_interval=0.2)
+    try:
+        assert service.workers.ready_count() == 2
+        assert service.process_symptoms_batch(BATCH) == expected
+        assert service.process_symptoms(BATCH[0]) == expected[0]
+        assert service.model_version.loaded_pool is None, "The web process should not load the model"
+        
+        # Each worker counts what it served; the parent adds them up
+        snapshots = service.workers.collect_metrics()
+        assert len(snapshots) == 2
+        served = merge_snapshots(snapshots)["diagnosis_results_total"]["samples"]
+        assert served[("model",)] == len(BATCH) + 1
+    finally:
+        service.stop_workers()
+    print("✓ Worker parity test passed")
+
+def test_crashed_worker_is_restarted():
+    """Test that a killed worker is detected, replaced and serving again"""
+    pool = InferenceWorkerPool(1, health_interval=0.2).start()
+    try:
+        old_pid = pool.stats()["processes"][0]["pid"]
+        os.kill(old_pid, signal.SIGKILL)
+        
+        assert wait_until(lambda: pool.stats()["crashes"] == 1), "Crash was not detected"
+        assert wait_until(lambda: pool.ready_count() == 1), "Worker was not restarted"
+        process = pool.stats()["processes"][0]
+        assert process["pid"] != old_pid and process["restarts"] == 1
+        assert pool.diagnose_batch(BATCH[:1])[0]["diagnosis"]
+    finally:
+        pool.shutdown()
+    print("✓ Worker restart test passed")
+
+def test_graceful_shutdown():
+    """Test that shutdown finishes queued work, stops workers and rejects new requests"""
+    pool = InferenceWorkerPool(1).start()
+    futures = [pool.submit(BATCH) for _ in range(20)]
+    processes = [slot.process for slot in pool._slots]
+    pool.shutdown()
+    
+    assert all(len(future.result(timeout=0)) == len(BATCH) for future in futures), "In-flight work was dropped"
+    assert not any(process.is_alive() for process in processes)
+    assert pool.stats()["crashes"] == 0, "A clean stop must not count as a crash"
+    try:
+        pool.submit(BATCH)
+        assert False, "Expected WorkerPoolError after shutdown"
+    except WorkerPoolError:
+        pass
+    print("✓ Graceful shutdown test passed")
+
+if __name__ == "__main__":
+    print("Running inference worker pool tests...")
+    test_workers_match_in_process()
+    test_crashed_worker_is_restarted()
+    test_graceful_shutdown()
+    print("All tests passed!")
@@ -0,0 +1,254 @@
+import aiohttp
+import asyncio
+import collections
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Sync defaults, overridable per deployment
+SYNC_BATCH = int(os.getenv('ABDM_SYNC_BATCH', '100'))
+MAX_CONNECTIONS = int(os.getenv('ABDM_MAX_CONNECTIONS', '8'))
+MAX_CONCURRENCY = int(os.getenv('ABDM_MAX_CONCURRENCY', '4'))
+MAX_RETRIES = int(os.getenv('ABDM_MAX_RETRIES', '5'))
+BACKOFF_BASE = float(os.getenv('ABDM_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.getenv('ABDM_BACKOFF_MAX', '30.0'))
+REQUEST_TIMEOUT = float(os.getenv('ABDM_TIMEOUT', '30.0'))
+CONNECT_TIMEOUT = float(os.getenv('ABDM_CONNECT_TIMEOUT', '5.0'))
+KEEPALIVE_TIMEOUT = float(os.getenv('ABDM_KEEPALIVE_TIMEOUT', '30.0'))
+DEFAULT_CHECKPOINT_PATH = os.getenv('ABDM_SYNC_CHECKPOINT', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'abdm_sync_checkpoint.json'))
+
+# Rate limiting and upstream trouble are worth another attempt; other errors are not
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+class AbdmError(Exception):
+    """ABDM refused a batch"""
+
+class RetryableAbdmError(AbdmError):
+    """ABDM could not take a batch right now"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def select_unsynced(after_id: int, limit: int) -> List[Dict[str, Any]]:
+    """The next ``limit`` unsynced records after ``after_id``, in id order, with their ABHA number.
+    
+    Served by the partial index on unsynced records. Records of patients
+    without an ABHA number have nothing to link to and are skipped.
+    """
+    from models.health_record import HealthRecord
+    
+    return list(HealthRecord.objects
+                .filter(is_synced_with_abha=False, id__gt=after_id, user__abha_id__isnull=False)
+                .order_by('id')
+                .values('id', 'record_type', 'data', 'source', 'created_at', 'user__abha_id')[:limit])
+
+def mark_synced(ids: List[int]) -> int:
+    """Flag records as synced with one UPDATE; returns how many changed"""
+    from django.utils import timezone
+    from models.health_record import HealthRecord
+    
+    if not ids:
+        return 0
+    return HealthRecord.objects.filter(id__in=ids, is_synced_with_abha=False).update(
+        is_synced_with_abha=True, updated_at=timezone.now())
+
+def close_connection():
+    """Close this thread's database connection"""
+    from django.db import connection
+    connection.close()
+
+class AbhaSyncEngine:
+    """Push unsynced HealthRecords to ABDM in batches.
+    
+    ``run`` reads unsynced records in id order, ``batch_size`` at a time,
+    and posts each batch to ``/health-records/batch`` over one pooled,
+    keep-alive session, with up to ``max_concurrency`` batches in flight
+    while the next one is read. Timeouts, connection errors and
+    408/429/5xx responses are retried up to ``max_retries`` times with
+    jittered exponential backoff (honouring Retry-After); other errors
+    fail the batch. Accepted records are flagged with one UPDATE per
+    batch; failed and rejected ones stay unsynced for the next pass.
+    
+    After each batch the id up to which every batch has finished is saved
+    to the checkpoint file, so an interrupted or ``max_records``-bounded
+    run resumes there. A run that reaches the end resets it, so the next
+    pass retries what failed. Each record carries its id, letting ABDM
+    de-duplicate a batch that was sent again after a crash.
+    """
+    
+    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None,
+                 batch_size: int = SYNC_BATCH, max_connections: int = MAX_CONNECTIONS,
+                 max_concurrency: int = MAX_CONCURRENCY, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX,
+                 timeout: float = REQUEST_TIMEOUT, connect_timeout: float = CONNECT_TIMEOUT,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT, checkpoint_path: Optional[str] = None):
+        self.api_url = (api_url or os.getenv('ABDM_API_URL') or '').rstrip('/')
+        self.api_key = api_key or os.getenv('ABDM_API_KEY')
+        self.batch_size = max(1, batch_size)
+        self.max_connections = max_connections
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.keepalive_timeout = keepalive_timeout
+        self.checkpoint_path = checkpoint_path or DEFAULT_CHECKPOINT_PATH
+        
+        self.batches = 0
+        self.synced = 0
+        self.rejected = 0
+        self.retries = 0
+        self.failures = 0
+    
+    def load_checkpoint(self) -> int:
+        """Id up to which the current pass is done; 0 starts a new pass"""
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return int(json.load(f)["after_id"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+    
+    def save_checkpoint(self, after_id: int):
+        # Written whole and renamed into place; losing the latest one only means resending
+        # batches that ABDM de-duplicates, so it is not fsynced
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({"after_id": after_id}, f)
+        os.replace(temp_path, self.checkpoint_path)
+    
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        # Jitter keeps batches that failed together from retrying in lockstep
+        return random.uniform(delay / 2, delay)
+    
+    async def _post(self, session: aiohttp.ClientSession, payload: Dict[str, Any]) -> Dict[int, str]:
+        """One upstream call; returns the reasons for any records ABDM rejected, by id"""
+        async with session.post(f"{self.api_url}/health-records/batch", json=payload) as response:
+            if response.status in RETRY_STATUSES:
+                retry_after = response.headers.get('Retry-After')
+                raise RetryableAbdmError(f"HTTP {response.status}",
+                                         float(retry_after) if retry_after and retry_after.isdigit() else None)
+            if response.status >= 400:
+                raise AbdmError(f"HTTP {response.status}: {(await response.text())[:200]}")
+            data = await response.json()
+            return {item["id"]: item.get("reason", "") for item in data.get("rejected", [])}
+    
+    async def _push(self, session, rows: List[Dict[str, Any]], in_db):
+        payload = {"records": [
+            {
+                "id": row["id"],
+                "abha_id": row["user__abha_id"],
+                "record_type": row["record_type"],
+                "data": row["data"],
+                "source": row["source"],
+                "created_at": row["created_at"].isoformat(),
+            }
+            for row in rows
+        ]}
+        for attempt in range(self.max_retries + 1):
+            try:
+                rejected = await self._post(session, payload)
+                break
+            except (RetryableAbdmError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    print(f"Error syncing {len(rows)} health records after {attempt + 1} attempts: {e!r}")
+                    self.failures += len(rows)
+                    return
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt, getattr(e, 'retry_after', None)))
+            except AbdmError as e:
+                print(f"Error syncing {len(rows)} health records: {e}")
+                self.failures += len(rows)
+                return
+        
+        for record_id, reason in rejected.items():
+            print(f"ABDM rejected health record {record_id}: {reason}")
+        self.rejected += len(rejected)
+        updated = await in_db(mark_synced, [row["id"] for row in rows if row["id"] not in rejected])
+        self.synced += updated
+        self.batches += 1
+    
+    def _advance(self, pending):
+        """Checkpoint past every leading batch that has finished"""
+        after_id = None
+        while pending and pending[0][1].done():
+            after_id, task = pending.popleft()
+            # Re-raises an unexpected error (e.g. the database failed) before it is checkpointed past
+            task.result()
+        if after_id is not None:
+            self.save_checkpoint(after_id)
+    
+    async def run(self, max_records: Optional[int] = None) -> Dict[str, int]:
+        """Sync unsynced records, up to ``max_records`` of them; returns the stats"""
+        from config.database import setup_database
+        
+        loop = asyncio.get_running_loop()
+        # The ORM is synchronous and SQLite has one writer: all queries go through one thread
+        db = ThreadPoolExecutor(max_workers=1, thread_name_prefix='abdm-db')
+        
+        def in_db(func, *args):
+            return loop.run_in_executor(db, func, *args)
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=headers)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending = collections.deque()
+        
+        after_id = self.load_checkpoint()
+        fetched = 0
+        exhausted = False
+        try:
+            await in_db(setup_database)
+            while max_records is None or fetched < max_records:
+                limit = self.batch_size if max_records is None else min(self.batch_size, max_records - fetched)
+                rows = await in_db(select_unsynced, after_id, limit)
+                if not rows:
+                    exhausted = True
+                    break
+                after_id = rows[-1]["id"]
+                fetched += len(rows)
+                
+                # Reading ahead stops while max_concurrency batches are in flight
+                await semaphore.acquire()
+                task = asyncio.create_task(self._push(session, rows, in_db))
+                task.add_done_callback(lambda _: semaphore.release())
+                pending.append((after_id, task))
+                self._advance(pending)
+            
+            if pending:
+                await asyncio.wait([task for _, task in pending])
+                self._advance(pending)
+            if exhausted:
+                self.save_checkpoint(0)
+        finally:
+            for _, task in pending:
+                task.cancel()
+            await session.close()
+            await in_db(close_connection)
+            db.shutdown()
+        return self.stats()
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "synced": self.synced,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+async def sync_health_records(max_records: Optional[int] = None, **options) -> Dict[str, int]:
+    """Run one ABHA sync pass with the configured defaults"""
+    return await AbhaSyncEngine(**options).run(max_records)
@@ -1,22 +1,189 @@
 import aiohttp
+import asyncio
 import os
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 
-async def translate_text(text: str, source: str, target: str) -> Optional[str]:
-    api_key = os.getenv('BHASHINI_API_KEY')
-    api_url = os.getenv('BHASHINI_API_URL')
+from utils.translation_cache import DEFAULT_CACHE_PATH, TranslationCache, known_strings
+
+# Client defaults, overridable per deployment
+MAX_CONNECTIONS = int(os.getenv('BHASHINI_MAX_CONNECTIONS', '16'))
+MAX_CONCURRENCY = int(os.getenv('BHASHINI_MAX_CONCURRENCY', '8'))
+# Strings per /translate call. The documented contract is one "text" string per request, so list
+# batching is opt-in: set this above 1 only for an endpoint known to accept a list of texts
+MAX_BATCH = int(os.getenv('BHASHINI_MAX_BATCH', '1'))
+REQUEST_TIMEOUT = float(os.getenv('BHASHINI_TIMEOUT', '10.0'))
+CONNECT_TIMEOUT = float(os.getenv('BHASHINI_CONNECT_TIMEOUT', '3.0'))
+KEEPALIVE_TIMEOUT = float(os.getenv('BHASHINI_KEEPALIVE_TIMEOUT', '30.0'))
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{api_url}/translate",
-            json={
-                "text": text,
-                "source_language": source,
-                "target_language": target
-            },
-            headers={"Authorization": f"Bearer {api_key}"}
-        ) as response:
-            if response.status == 200:
+class BhashiniClient:
+    """Long-lived translation client sharing one pooled, keep-alive session.
+    
+    ``translate_many`` sends each distinct string once, concurrently over
+    the shared pool. By default each call carries one string, the request
+    shape the upstream documents. With ``max_batch`` above 1, up to that
+    many strings are packed into one /translate call: ``"text"`` is then a
+    list and ``"translated_text"`` must come back as a list in the same
+    order. Only enable that for an endpoint that accepts lists. Failed
+    strings translate to None.
+    
+    With a ``cache`` only strings it does not already hold go upstream,
+    and successful translations are stored in it.
+    """
+    
+    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_connections: int = MAX_CONNECTIONS, max_concurrency: int = MAX_CONCURRENCY,
+                 max_batch: int = MAX_BATCH, timeout: float = REQUEST_TIMEOUT,
+                 connect_timeout: float = CONNECT_TIMEOUT, keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                 cache: Optional[TranslationCache] = None):
+        self.api_url = (api_url or os.getenv('BHASHINI_API_URL') or '').rstrip('/')
+        self.api_key = api_key or os.getenv('BHASHINI_API_KEY')
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_batch = max(1, max_batch)
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        
+        # The session and semaphore belong to the event loop that created them
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+        
+        self.calls = 0
+        self.strings = 0
+        self.failures = 0
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is not loop:
+            # A session cannot move between event loops; release the old one before replacing it
+            await self._close_session()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=headers)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+    
+    async def _close_session(self):
+        session, session_loop = self._session, self._loop
+        self._session = None
+        if session is None or session.closed:
+            return
+        if session_loop is not None and session_loop.is_running() and session_loop is not asyncio.get_running_loop():
+            # Its loop is still running elsewhere: close it there, where its sockets are registered
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
+        else:
+            # Its loop has finished: closing here still releases the connector; sockets that were
+            # registered with that loop are freed as they are collected
+            await session.close()
+    
+    async def close(self):
+        """Close the pooled connections"""
+        await self._close_session()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def _post(self, text, source: str, target: str):
+        """One upstream call; ``text`` is a string or a list of strings"""
+        session = await self._get_session()
+        async with self._semaphore:
+            self.calls += 1
+            async with session.post(
+                f"{self.api_url}/translate",
+                json={
+                    "text": text,
+                    "source_language": source,
+                    "target_language": target
+                }
+            ) as response:
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                      status=response.status, message="translation failed")
                 data = await response.json()
                 return data.get("translated_text")
-            return None
\ No newline at end of file
+    
+    async def _translate_chunk(self, chunk: List[str], source: str, target: str) -> List[Optional[str]]:
+        try:
+            if len(chunk) == 1:
+                # A lone string keeps the original single-text request shape
+                return [await self._post(chunk[0], source, target)]
+            translated = await self._post(chunk, source, target)
+            if not isinstance(translated, list) or len(translated) != len(chunk):
+                raise ValueError(f"expected {len(chunk)} translations, got {translated!r:.80}")
+            return translated
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error translating {len(chunk)} strings ({source}->{target}): {e}")
+            self.failures += len(chunk)
+            return [None] * len(chunk)
+    
+    async def translate_many(self, texts: Sequence[str], source: str, target: str) -> List[Optional[str]]:
+        """Translate many strings with as few upstream calls as possible, preserving order"""
+        if source == target:
+            return list(texts)
+        
+        # Each distinct non-empty string goes upstream once, unless already cached
+        unique = list(dict.fromkeys(t for t in texts if t))
+        translations: Dict[str, Optional[str]] = {}
+        pending = unique
+        loop = asyncio.get_running_loop()
+        if self.cache is not None:
+            # Memory hits are answered here; SQLite reads and writes block, so they run on a thread
+            translations, missing = self.cache.get_memory(unique, source, target)
+            if missing:
+                translations.update(await loop.run_in_executor(None, self.cache.get_disk, missing, source, target))
+            pending = [t for t in unique if t not in translations]
+        self.strings += len(pending)
+        
+        chunks = [pending[i:i + self.max_batch] for i in range(0, len(pending), self.max_batch)]
+        results = await asyncio.gather(*[self._translate_chunk(chunk, source, target) for chunk in chunks])
+        fetched = {}
+        for chunk, translated in zip(chunks, results):
+            fetched.update(zip(chunk, translated))
+        if self.cache is not None and fetched:
+            await loop.run_in_executor(None, self.cache.put_many, fetched, source, target)
+        
+        translations.update(fetched)
+        return [translations[t] if t else t for t in texts]
+    
+    async def translate(self, text: str, source: str, target: str) -> Optional[str]:
+        """Translate a single string"""
+        return (await self.translate_many([text], source, target))[0]
+    
+    async def prewarm(self, targets: Sequence[str], source: str = "en", texts: Optional[Sequence[str]] = None) -> int:
+        """Translate the fixed kiosk vocabulary into every target language ahead of time.
+        
+        Returns how many strings had to go upstream.
+        """
+        texts = list(texts) if texts is not None else known_strings()
+        before = self.strings
+        await asyncio.gather(*[self.translate_many(texts, source, target) for target in targets])
+        return self.strings - before
+    
+    def stats(self) -> Dict[str, int]:
+        stats = {"calls": self.calls, "strings": self.strings, "failures": self.failures}
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+# Shared client so callers reuse one connection pool
+_client = None
+
+def get_client() -> BhashiniClient:
+    """Process-wide translation client"""
+    global _client
+    if _client is None:
+        _client = BhashiniClient(cache=TranslationCache(DEFAULT_CACHE_PATH or None))
+    return _client
+
+async def translate_text(text: str, source: str, target: str) -> Optional[str]:
+    return await get_client().translate(text, source, target)
@@ -0,0 +1,90 @@
+import gzip
+import os
+import zlib
+from typing import Iterable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compression defaults, overridable per deployment
+COMPRESS_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', '4'))
+
+# Content types worth compressing; everything else (e.g. already compressed) is sent as-is
+COMPRESSIBLE_TYPES = frozenset({'application/json', 'application/x-ndjson', 'text/plain', 'text/html'})
+
+def supported_encodings():
+    """Encodings this process can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The best encoding the client accepts per its Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        # On equal weights the earlier (preferred) encoding wins
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding '{encoding}'")
+
+class StreamCompressor:
+    """Incremental compressor for streamed responses.
+    
+    Every chunk is flushed, so the client can decode each row as soon as it
+    arrives instead of waiting for the compressor's buffer to fill.
+    """
+    
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == 'gzip':
+            # wbits 31: a gzip header and trailer around the deflate stream
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+    
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Compress a stream of chunks, or pass it through when ``encoding`` is None"""
+    if encoding is None:
+        yield from chunks
+        return
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
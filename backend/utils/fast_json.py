@@ -0,0 +1,60 @@
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Encoder used for responses: 'auto' picks orjson when installed, 'json' forces the standard library
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+def _default(obj):
+    """Encode what the backend does not handle natively"""
+    if isinstance(obj, np.ndarray):
+        # orjson only takes C-contiguous arrays directly
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _orjson_dumps(obj) -> bytes:
+    # NumPy scalars and arrays are written straight from their buffers, without Python floats in between
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+# name -> (dumps returning UTF-8 bytes, loads accepting str or bytes)
+BACKENDS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[Any], Any]]] = {'json': (_json_dumps, json.loads)}
+if orjson is not None:
+    BACKENDS['orjson'] = (_orjson_dumps, orjson.loads)
+
+backend_name = None
+dumps = None
+loads = None
+
+def register_backend(name: str, dumps_func: Callable[[Any], bytes], loads_func: Callable[[Any], Any]):
+    """Make another encoder available to ``use_backend``"""
+    BACKENDS[name] = (dumps_func, loads_func)
+
+def use_backend(name: str = 'auto') -> str:
+    """Switch the module's ``dumps``/``loads``; returns the backend now in use"""
+    global backend_name, dumps, loads
+    if name == 'auto':
+        name = 'orjson' if 'orjson' in BACKENDS else 'json'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}' (available: {', '.join(BACKENDS)})")
+    backend_name = name
+    dumps, loads = BACKENDS[name]
+    return name
+
+use_backend(JSON_BACKEND)
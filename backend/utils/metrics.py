@@ -0,0 +1,209 @@
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Histogram:
+    """Thread-safe bucketed histogram with Prometheus-style cumulative buckets"""
+    
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+    
+    def state(self):
+        """Raw per-bucket counts, sum and count, for merging across processes"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+    
+    def snapshot(self):
+        """Return cumulative bucket counts keyed by upper bound, plus sum and count"""
+        counts, total, count = self.state()
+        
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[bound] = running
+        cumulative[float('inf')] = count
+        
+        return {
+            "buckets": cumulative,
+            "sum": total,
+            "count": count,
+            "mean": total / count if count else 0.0
+        }
+
+class _Metric:
+    """A named metric with one child per combination of label values"""
+    
+    type = None
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def labels(self, *values):
+        """The child for these label values, in ``labelnames`` order"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests by outcome"""
+    
+    type = 'counter'
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount=1, *values):
+        self.labels(*values).inc(amount)
+    
+    def samples(self):
+        return {values: child.value for values, child in list(self._children.items())}
+
+class HistogramFamily(_Metric):
+    """Histograms sharing a name and buckets, one per combination of label values"""
+    
+    type = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self):
+        return Histogram(self.buckets)
+    
+    def observe(self, value, *values):
+        self.labels(*values).observe(value)
+    
+    def samples(self):
+        return {values: child.state() for values, child in list(self._children.items())}
+
+class MetricsRegistry:
+    """Every metric of one process, rendered in the Prometheus text format.
+    
+    ``snapshot`` returns plain data that can cross a pipe, so a parent can
+    add its worker processes' metrics to its own with ``render``.
+    """
+    
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric):
+        with self._lock:
+            # Registering the same name again returns the existing metric, so modules can be re-imported
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float],
+                  labelnames: Sequence[str] = ()) -> HistogramFamily:
+        return self._register(HistogramFamily(name, documentation, buckets, labelnames))
+    
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": metric.labelnames,
+                "buckets": getattr(metric, 'buckets', None),
+                "samples": metric.samples()
+            }
+            for metric in metrics
+        }
+    
+    def render(self, extra_snapshots: Iterable[Dict[str, dict]] = ()) -> str:
+        """This process's metrics, summed with ``extra_snapshots``, as exposition text"""
+        return render_text(merge_snapshots([self.snapshot(), *extra_snapshots]))
+
+def merge_snapshots(snapshots: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """Sum snapshots from several processes into one"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, dict(metric, samples={}))
+            for values, sample in metric["samples"].items():
+                current = target["samples"].get(values)
+                if current is None:
+                    target["samples"][values] = sample
+                elif metric["type"] == 'histogram':
+                    counts = [a + b for a, b in zip(current[0], sample[0])]
+                    target["samples"][values] = (counts, current[1] + sample[1], current[2] + sample[2])
+                else:
+                    target["samples"][values] = current + sample
+    return merged
+
+def _format_value(value) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def render_text(snapshot: Dict[str, dict]) -> str:
+    """Prometheus text exposition (format 0.0.4) of a snapshot"""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for values in sorted(metric["samples"]):
+            sample = metric["samples"][values]
+            pairs = list(zip(metric["labelnames"], values))
+            if metric["type"] == 'histogram':
+                counts, total, count = sample
+                running = 0
+                for bound, bucket_count in zip(metric["buckets"], counts):
+                    running += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {running}")
+                lines.append(f"{name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(pairs)} {count}")
+            else:
+                lines.append(f"{name}{_format_labels(pairs)} {_format_value(sample)}")
+    return '\n'.join(lines) + '\n'
+
+# Default registry of this process, served by /api/metrics
+REGISTRY = MetricsRegistry()
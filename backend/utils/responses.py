@@ -0,0 +1,68 @@
+from typing import Any, Iterable
+
+from flask import Response, request
+from flask.json.provider import JSONProvider
+
+from utils import fast_json
+from utils.compression import COMPRESS_MIN_SIZE, COMPRESSIBLE_TYPES, compress, compress_stream, negotiate
+
+NDJSON_TYPE = 'application/x-ndjson'
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by ``utils.fast_json``, so ``jsonify`` takes NumPy values as they are"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return fast_json.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return fast_json.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # Encoded straight to bytes, skipping the str round trip of the default provider
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(fast_json.dumps(obj), mimetype='application/json')
+
+def _compress_response(response):
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304) or response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    # Caches must keep the plain and the compressed variants apart
+    response.vary.add('Accept-Encoding')
+    if response.content_length is not None and response.content_length < COMPRESS_MIN_SIZE:
+        return response
+    
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_responses(app):
+    """Use the fast JSON encoder and compress large responses the client accepts compressed"""
+    app.json = FastJSONProvider(app)
+    app.after_request(_compress_response)
+
+def wants_ndjson() -> bool:
+    """Whether the client asked for an NDJSON stream instead of one JSON document"""
+    return request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == NDJSON_TYPE
+
+def ndjson_response(chunks: Iterable[Iterable[Any]]) -> Response:
+    """Stream each chunk of rows as NDJSON lines, compressed if the client accepts it.
+    
+    Rows are encoded and sent one chunk at a time, so memory holds a single
+    chunk however large the result, and the first rows leave before the last
+    are computed. The size is unknown up front, so the threshold does not apply.
+    """
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    dumps = fast_json.dumps
+    lines = (b''.join(dumps(row) + b'\n' for row in chunk) for chunk in chunks)
+    response = Response(compress_stream(lines, encoding), mimetype=NDJSON_TYPE)
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cache defaults, overridable per deployment (an empty path keeps it in memory only)
+DEFAULT_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '4096'))
+DEFAULT_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH', os.path.join(BACKEND_DIR, 'cache', 'translation_cache.sqlite3'))
+
+# SQLite limits bound parameters per statement; stay well below it
+SQL_CHUNK = 500
+
+class TranslationCache:
+    """Two-tier cache of translations keyed on (text, source, target).
+    
+    An in-process LRU answers hot strings without I/O; behind it a SQLite
+    table keeps every translation across restarts, so a fresh process only
+    goes upstream for strings no earlier process has seen.
+    
+    ``get_memory`` never touches the disk, so async callers can answer
+    from it on the event loop and hand only its misses (``get_disk``) and
+    ``put_many`` to a thread.
+    """
+    
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Held for SQLite work only, so memory lookups never wait on the disk
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " text TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL,"
+                " translated TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (text, source, target)) WITHOUT ROWID"
+            )
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def _remember(self, key: Tuple[str, str, str], translated: str):
+        """Insert into the LRU tier; caller holds the lock"""
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+    
+    def get_memory(self, texts: Iterable[str], source: str, target: str) -> Tuple[Dict[str, str], List[str]]:
+        """Translations the LRU tier holds, and the distinct texts it does not"""
+        found = {}
+        missing = []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                key = (text, source, target)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                else:
+                    missing.append(text)
+            self.memory_hits += len(found)
+        return found, missing
+    
+    def get_disk(self, texts: List[str], source: str, target: str) -> Dict[str, str]:
+        """Translations of ``texts`` from the SQLite tier, promoted into the LRU tier"""
+        found = {}
+        with self._db_lock:
+            if self._db is not None:
+                for i in range(0, len(texts), SQL_CHUNK):
+                    chunk = texts[i:i + SQL_CHUNK]
+                    rows = self._db.execute(
+                        f"SELECT text, translated FROM translations WHERE source = ? AND target = ?"
+                        f" AND text IN ({','.join('?' * len(chunk))})",
+                        [source, target, *chunk]
+                    ).fetchall()
+                    found.update(rows)
+        with self._lock:
+            for text, translated in found.items():
+                self._remember((text, source, target), translated)
+            self.disk_hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+    
+    def get_many(self, texts: Iterable[str], source: str, target: str) -> Dict[str, str]:
+        """Cached translations for whichever of ``texts`` are known"""
+        found, missing = self.get_memory(texts, source, target)
+        if missing:
+            found.update(self.get_disk(missing, source, target))
+        return found
+    
+    def put_many(self, translations: Dict[str, str], source: str, target: str):
+        """Store successful translations in both tiers"""
+        translations = {text: translated for text, translated in translations.items() if translated is not None}
+        if not translations:
+            return
+        with self._lock:
+            for text, translated in translations.items():
+                self._remember((text, source, target), translated)
+        with self._db_lock:
+            if self._db is not None:
+                now = time.time()
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO translations (text, source, target, translated, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(text, source, target, translated, now) for text, translated in translations.items()]
+                )
+                self._db.execute("COMMIT")
+    
+    def get(self, text: str, source: str, target: str) -> Optional[str]:
+        return self.get_many([text], source, target).get(text)
+    
+    def put(self, text: str, source: str, target: str, translated: str):
+        self.put_many({text: translated}, source, target)
+    
+    def clear_memory(self):
+        """Drop the LRU tier (the disk tier is kept)"""
+        with self._lock:
+            self._memory.clear()
+    
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    def stats(self):
+        disk_size = None
+        with self._db_lock:
+            if self._db is not None:
+                disk_size = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_size": len(self._memory),
+                "memory_maxsize": self.maxsize,
+                "disk_size": disk_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+def known_strings() -> List[str]:
+    """Every fixed string the kiosk shows: symptoms, conditions, recommendations, and fallback answers"""
+    from ai.postprocess import DEFAULT_RECOMMENDATIONS, RECOMMENDATIONS
+    from ai.rule_engine import DEFAULT_RESULT, RuleEngine
+    
+    models_dir = os.path.join(BACKEND_DIR, 'ai', 'models')
+    with open(os.path.join(models_dir, 'symptom_mapping.json'), 'r') as f:
+        symptoms = list(json.load(f))
+    with open(os.path.join(models_dir, 'condition_mapping.json'), 'r') as f:
+        conditions = json.load(f)
+    recommendations = [line for lines in RECOMMENDATIONS.values() for line in lines] + DEFAULT_RECOMMENDATIONS
+    
+    # What the rule engine answers while the model is unavailable
+    try:
+        rules = RuleEngine.from_file(os.path.join(models_dir, 'diagnosis_rules.json'))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load diagnosis rules for prewarming: {e}")
+        rules = RuleEngine([], DEFAULT_RESULT)
+    fallbacks = []
+    for result in rules.results + [rules.default]:
+        fallbacks.append(result["diagnosis"])
+        fallbacks.extend(result["recommendations"])
+    return list(dict.fromkeys(symptoms + conditions + recommendations + fallbacks))